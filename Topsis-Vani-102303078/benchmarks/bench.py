@@ -0,0 +1,322 @@
+"""
+Benchmark harness for the TOPSIS engine, the web-service path and the CLI.
+
+Generates seeded synthetic decision matrices in tall, wide and square shapes,
+times every pipeline stage (parse, validate, normalize, weight, ideal,
+distance, rank, write) plus the end-to-end paths and every registered
+normalization and distance kernel, records peak traced memory,
+and writes everything to JSON. A stored run can be used as a baseline: any
+timing slower than baseline * (1 + threshold) is reported and makes the
+script exit with status 1.
+
+    python benchmarks/bench.py --cells 1e3,1e4,1e5,1e6 --out results.json
+    python benchmarks/bench.py --baseline results.json --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_ROOT = os.path.dirname(HERE)
+sys.path.insert(0, PACKAGE_ROOT)
+
+from topsis_vani_102303078 import engine, loader  # noqa: E402
+
+SHAPES = ("tall", "wide", "square")
+STAGES = ("parse", "validate", "normalize", "weight", "ideal", "distance", "rank", "write")
+
+# columns of a tall matrix, rows of a wide matrix
+NARROW = 8
+
+# parametrized distances benchmarked next to every registered one
+EXTRA_DISTANCES = ("lp:3",)
+
+# longer weight strings do not fit in one command line argument; the CLI run
+# is skipped for such wide matrices
+MAX_ARG_CHARS = 100_000
+
+
+def matrix_shape(shape, cells):
+    """(rows, criteria) with rows * criteria close to cells."""
+    cells = int(cells)
+    if shape == "tall":
+        return max(2, cells // NARROW), NARROW
+    if shape == "wide":
+        return NARROW, max(2, cells // NARROW)
+    side = max(2, int(round(cells ** 0.5)))
+    return side, side
+
+
+def make_dataset(shape, cells, seed=0):
+    """Seeded synthetic (names, matrix, weights, impacts)."""
+    rng = np.random.default_rng(seed)
+    n_rows, n_cols = matrix_shape(shape, cells)
+    matrix = rng.uniform(1.0, 100.0, size=(n_rows, n_cols))
+    weights = np.round(rng.uniform(0.5, 5.0, size=n_cols), 2)
+    impacts = rng.choice(["+", "-"], size=n_cols).tolist()
+    names = [f"A{i}" for i in range(n_rows)]
+    return names, matrix, weights, impacts
+
+
+def write_csv(path, names, matrix):
+    df = pd.DataFrame(matrix, columns=[f"C{j + 1}" for j in range(matrix.shape[1])])
+    df.insert(0, "Name", names)
+    df.to_csv(path, index=False)
+
+
+def measure(func, repeat):
+    """
+    Run func repeat times untraced and keep the best time, then once more
+    under tracemalloc for the peak allocation (tracing slows pandas down a
+    lot, so it is kept out of the timings). Returns (result, seconds, peak).
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def measure_inplace(matrix, func, repeat):
+    """
+    measure() for a func(work) that overwrites its matrix: every run gets a
+    fresh copy, made before the clock and the memory tracing start, so the
+    peak is what scoring allocates on top of the matrix itself.
+    """
+    best = None
+    for _ in range(repeat):
+        work = matrix.copy()
+        start = time.perf_counter()
+        func(work)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    work = matrix.copy()
+    tracemalloc.start()
+    result = func(work)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def bench_stages(csv_path, out_path, weights, impacts, repeat):
+    """Time each pipeline stage separately, the way the CLI runs them."""
+    stages = {}
+
+    def record(name, func):
+        result, seconds, peak = measure(func, repeat)
+        stages[name] = {"seconds": seconds, "peak_bytes": peak}
+        return result
+
+    # the stages are split where the CLI's profiler splits them: load_csv
+    # parses and copies the criteria block, score() then validates its input
+    df, data = record("parse", lambda: loader.load_csv(csv_path))
+
+    def validate():
+        matrix = engine.as_matrix(data)
+        return matrix, engine.as_impacts(impacts, matrix.shape[1])
+
+    data, signs = record("validate", validate)
+    norms = record("normalize", lambda: engine.column_norms(data))
+    weighted = record("weight", lambda: data * (weights / norms))
+    ideal_best, ideal_worst = record("ideal", lambda: engine.ideal_points(weighted, signs))
+    scores = record("distance", lambda: engine.closeness(weighted, ideal_best, ideal_worst))
+    ranks = record("rank", lambda: engine.dense_rank(scores))
+
+    def write():
+        result = df.copy()
+        result["Topsis Score"] = np.round(scores * 100, 2)
+        result["Rank"] = ranks
+        result.to_csv(out_path, index=False)
+
+    record("write", write)
+    return stages
+
+
+def web_service_topsis(df, weights, impacts):
+    """The DataFrame-in, DataFrame-out path of web-service/app.py:topsis()."""
+    scores, ranks = engine.rank(df.iloc[:, 1:].to_numpy(dtype=float), weights, impacts)
+    result = df.copy()
+    result["Topsis Score"] = (scores * 100).round(2)
+    result["Rank"] = ranks
+    return result
+
+
+def bench_paths(csv_path, out_path, matrix, weights, impacts, repeat, cli):
+    paths = {}
+
+    (scores, _), seconds, peak = measure(lambda: engine.rank(matrix, weights, impacts), repeat)
+    paths["engine"] = {"seconds": seconds, "peak_bytes": peak}
+
+    # float32 from a float32 matrix, as the loaders produce it with --dtype float32
+    matrix32 = matrix.astype(np.float32)
+    (scores32, _), seconds, peak = measure(lambda: engine.rank(matrix32, weights, impacts, dtype="float32"), repeat)
+    paths["engine_float32"] = {"seconds": seconds, "peak_bytes": peak,
+                               "max_score_error": float(np.abs(scores32 - scores).max())}
+
+    # weighted in place into a preallocated scores buffer: peak should be O(rows)
+    out = np.empty(matrix.shape[0])
+    _, seconds, peak = measure_inplace(matrix, lambda work: engine.score(work, weights, impacts, out=out,
+                                                                         overwrite=True), repeat)
+    paths["engine_inplace"] = {"seconds": seconds, "peak_bytes": peak, "matrix_bytes": matrix.nbytes}
+
+    # every registered kernel, one at a time against the defaults, so that a
+    # slow variant shows up as its own path (and as a baseline regression)
+    variants = [(f"engine_normalization_{name}", {"normalization": name}) for name in engine.NORMALIZATIONS]
+    variants += [(f"engine_distance_{name}", {"distance": name})
+                 for name in list(engine.DISTANCES) + list(EXTRA_DISTANCES)]
+    for name, kernels in variants:
+        _, seconds, peak = measure(lambda: engine.rank(matrix, weights, impacts, **kernels), repeat)
+        paths[name] = {"seconds": seconds, "peak_bytes": peak,
+                       "vs_engine": seconds / paths["engine"]["seconds"] if paths["engine"]["seconds"] else None}
+
+    df = pd.read_csv(csv_path)
+    _, seconds, peak = measure(lambda: web_service_topsis(df, weights, impacts), repeat)
+    paths["web_service"] = {"seconds": seconds, "peak_bytes": peak}
+
+    weights_arg = ",".join(str(w) for w in weights)
+    if cli and len(weights_arg) > MAX_ARG_CHARS:
+        paths["cli"] = None
+    elif cli:
+        cmd = [sys.executable, "-m", "topsis_vani_102303078.topsis", csv_path,
+               weights_arg, ",".join(impacts), out_path]
+        env = dict(os.environ, PYTHONPATH=PACKAGE_ROOT)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, env=env)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        # a separate process: traced memory is not available
+        paths["cli"] = {"seconds": best, "peak_bytes": None}
+
+    return paths
+
+
+def run(shapes, cells_list, repeat, seed, cli, workdir):
+    results = []
+    for shape in shapes:
+        for cells in cells_list:
+            names, matrix, weights, impacts = make_dataset(shape, cells, seed)
+            csv_path = os.path.join(workdir, f"{shape}-{int(cells)}.csv")
+            out_path = os.path.join(workdir, f"{shape}-{int(cells)}-out.csv")
+            write_csv(csv_path, names, matrix)
+
+            entry = {
+                "shape": shape,
+                "cells": int(cells),
+                "rows": matrix.shape[0],
+                "criteria": matrix.shape[1],
+                "stages": bench_stages(csv_path, out_path, weights, impacts, repeat),
+                "paths": bench_paths(csv_path, out_path, matrix, weights, impacts, repeat, cli),
+            }
+            results.append(entry)
+            total = sum(stage["seconds"] for stage in entry["stages"].values())
+            print(f"{shape:>6} {int(cells):>10} cells  {matrix.shape[0]:>8} x {matrix.shape[1]:<6} "
+                  f"stages {total * 1000:9.2f} ms  engine {entry['paths']['engine']['seconds'] * 1000:9.2f} ms")
+    return results
+
+
+def compare(results, baseline, threshold, min_seconds=0.001):
+    """
+    Return a list of regression messages against a baseline result file.
+    Timings below min_seconds in both runs are too noisy to compare.
+    """
+    old = {(r["shape"], r["cells"]): r for r in baseline["results"]}
+    regressions = []
+    for entry in results:
+        base = old.get((entry["shape"], entry["cells"]))
+        if base is None:
+            continue
+        for group in ("stages", "paths"):
+            for name, current in entry[group].items():
+                before = base.get(group, {}).get(name)
+                if not current or not before or not before["seconds"]:
+                    continue
+                if max(current["seconds"], before["seconds"]) < min_seconds:
+                    continue
+                ratio = current["seconds"] / before["seconds"]
+                if ratio > 1 + threshold:
+                    regressions.append(f"{entry['shape']} {entry['cells']} {group}.{name}: "
+                                       f"{before['seconds'] * 1000:.2f} ms -> {current['seconds'] * 1000:.2f} ms "
+                                       f"(x{ratio:.2f})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the TOPSIS pipeline.")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="comma separated: tall, wide, square")
+    parser.add_argument("--cells", default="1e3,1e4,1e5,1e6",
+                        help="comma separated matrix sizes in cells (up to 1e8)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cli", action="store_true", help="skip the end-to-end CLI runs")
+    parser.add_argument("--out", default=None, help="write results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="compare against this JSON result file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (default: %(default)s)")
+    parser.add_argument("--min-seconds", type=float, default=0.001,
+                        help="ignore timings below this in both runs (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    shapes = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    unknown = set(shapes) - set(SHAPES)
+    if unknown:
+        parser.error(f"unknown shapes: {', '.join(sorted(unknown))}")
+    cells_list = [int(float(c)) for c in args.cells.split(",") if c.strip()]
+
+    with tempfile.TemporaryDirectory(prefix="topsis-bench-") as workdir:
+        results = run(shapes, cells_list, args.repeat, args.seed, not args.no_cli, workdir)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to '{args.out}'")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions above {args.threshold:.0%} against '{args.baseline}'")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -36,6 +36,10 @@ setup(
         'pandas>=1.0.0',
         'numpy>=1.18.0',
     ],
+    extras_require={
+        'arrow': ['pyarrow>=7.0.0'],
+        'yaml': ['pyyaml>=5.1'],
+    },
     python_requires='>=3.7',
     entry_points={
         'console_scripts': [
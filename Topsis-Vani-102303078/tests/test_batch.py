@@ -0,0 +1,50 @@
+import json
+import os
+
+import pytest
+
+from topsis_vani_102303078.batch import glob_jobs, read_manifest, run_job
+from topsis_vani_102303078.engine import InputError
+
+DATA = 'n,a,b\nx,1,2\ny,2,1\n'
+
+
+def write(path, text=DATA):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+
+def test_glob_never_writes_over_its_inputs(tmp_path):
+    write(str(tmp_path / 'a.csv'))
+    with pytest.raises(InputError):
+        glob_jobs(str(tmp_path / '*.csv'), '1,1', '+,-', str(tmp_path))
+
+
+def test_glob_skips_earlier_results(tmp_path):
+    write(str(tmp_path / 'a.csv'))
+    write(str(tmp_path / 'out' / 'a.csv'))
+    jobs = glob_jobs(str(tmp_path / '**' / '*.csv'), '1,1', '+,-', str(tmp_path / 'out'))
+    assert [job.input for job in jobs] == [str(tmp_path / 'a.csv')]
+
+
+def test_manifest_output_may_not_be_another_input(tmp_path):
+    write(str(tmp_path / 'a.csv'))
+    write(str(tmp_path / 'b.csv'))
+    manifest = write(str(tmp_path / 'jobs.json'), json.dumps({
+        'weights': '1,1', 'impacts': '+,-',
+        'jobs': [{'input': 'a.csv', 'output': 'b.csv'}, {'input': 'b.csv', 'output': 'out/b.csv'}],
+    }))
+    with pytest.raises(InputError, match='overwrite an input'):
+        read_manifest(manifest)
+
+
+def test_manifest_output_directories_are_created(tmp_path):
+    write(str(tmp_path / 'a.csv'))
+    manifest = write(str(tmp_path / 'jobs.json'), json.dumps([
+        {'input': 'a.csv', 'output': 'ranked/2024/a.csv', 'weights': '1,1', 'impacts': '+,-'},
+    ]))
+    result = run_job(read_manifest(manifest)[0])
+    assert result.ok, result.error
+    assert os.path.exists(tmp_path / 'ranked' / '2024' / 'a.csv')
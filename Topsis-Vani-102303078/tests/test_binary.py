@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from topsis_vani_102303078.binary import convert, is_binary, open_matrix, write_matrix
+from topsis_vani_102303078.engine import InputError, rank
+from topsis_vani_102303078.fileio import load_input, save_result
+from topsis_vani_102303078.loader import load_csv
+
+DATA = 'Name,P1,P2,P3\nM1,1.5,5,3\nM2,2,4,1\nM3,3,1,2.25\n'
+
+
+@pytest.fixture
+def tmx(tmp_path):
+    csv_path = tmp_path / 'data.csv'
+    csv_path.write_text(DATA)
+    path = str(tmp_path / 'data.tmx')
+    convert(str(csv_path), path)
+    return path
+
+
+def test_criteria_select_columns_by_name(tmx):
+    df, data = load_input(tmx, criteria=['P3', 'P1'])
+    assert list(df.columns) == ['Name', 'P3', 'P1']
+    assert np.array_equal(data, [[3, 1.5], [1, 2], [2.25, 3]])
+    assert not data.flags.writeable
+
+
+def test_criteria_errors_match_csv(tmx):
+    with pytest.raises(InputError, match='not found: PX'):
+        load_input(tmx, criteria=['P1', 'PX'])
+    with pytest.raises(InputError, match='three or more columns'):
+        load_input(tmx, criteria=['Name', 'P1'])
+
+
+def test_all_criteria_keep_the_memmap(tmx):
+    _, data = load_input(tmx, criteria=['P1', 'P2', 'P3'])
+    assert isinstance(data, np.memmap)
+
+
+def test_write_matrix_round_trip(tmp_path):
+    path = str(tmp_path / 'm.tmx')
+    matrix = np.random.default_rng(0).normal(size=(37, 5))
+    matrix[3, 2] = np.finfo(np.float64).tiny
+    names = ['Ä', 'b,c', '"q"'] + [f'r{i}' for i in range(34)]
+    write_matrix(path, names, ['Name', 'a', 'b', 'c', 'd', 'e'], matrix)
+
+    assert is_binary(path)
+    m = open_matrix(path)
+    assert m.names == names
+    assert m.columns == ['Name', 'a', 'b', 'c', 'd', 'e']
+    assert isinstance(m.data, np.memmap) and not m.data.flags.writeable
+    assert m.data.ctypes.data % 64 == 0
+    assert np.array_equal(m.data, matrix)
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 1000])
+def test_convert_matches_csv(tmp_path, chunksize):
+    csv_path = tmp_path / 'data.csv'
+    csv_path.write_text(DATA)
+    path = str(tmp_path / 'data.tmx')
+    assert convert(str(csv_path), path, chunksize=chunksize) == 3
+
+    df, data = load_csv(str(csv_path))
+    m = open_matrix(path)
+    assert m.names == list(df['Name'])
+    assert np.array_equal(m.data, data)
+
+
+def test_result_matches_csv_input(tmp_path, tmx):
+    csv_path = tmp_path / 'data.csv'
+    results = []
+    for path in (str(csv_path), tmx):
+        df, data = load_input(path)
+        scores, ranks = rank(data, [1, 2, 1], ['+', '-', '+'])
+        out = str(tmp_path / f'out-{len(results)}.csv')
+        save_result(df, scores, ranks, out)
+        results.append(pd.read_csv(out))
+    # the binary format stores float64, so integer columns come back as floats
+    pd.testing.assert_frame_equal(results[0], results[1], check_dtype=False)
+
+
+def test_empty_matrix_round_trip(tmp_path):
+    path = str(tmp_path / 'm.tmx')
+    write_matrix(path, [], ['Name', 'a', 'b'], np.empty((0, 2)))
+    assert open_matrix(path).data.shape == (0, 2)
+
+
+@pytest.mark.parametrize('cut', [10, 80, -3])
+def test_truncated_file(tmx, cut):
+    with open(tmx, 'rb') as f:
+        data = f.read()
+    with open(tmx, 'wb') as f:
+        f.write(data[:cut])
+    with pytest.raises(InputError):
+        open_matrix(tmx)
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+from topsis_vani_102303078 import NormCache
+from topsis_vani_102303078.cache import matrix_key
+from topsis_vani_102303078.engine import score
+
+WEIGHTS = [1, 2, 1]
+IMPACTS = ['+', '-', '+']
+
+
+@pytest.fixture
+def matrix():
+    return np.random.default_rng(0).uniform(0.1, 10.0, size=(200, 3))
+
+
+def entry_path(directory, matrix):
+    return os.path.join(directory, f"{matrix_key(matrix)}.npz")
+
+
+@pytest.mark.parametrize('damage', [lambda data: data[:len(data) // 2], lambda data: b''])
+def test_damaged_disk_entry_is_a_miss(tmp_path, matrix, damage):
+    directory = str(tmp_path)
+    expected = score(matrix, WEIGHTS, IMPACTS, cache=NormCache(directory=directory))
+    path = entry_path(directory, matrix)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(damage(data))
+
+    cache = NormCache(directory=directory)
+    assert np.array_equal(score(matrix, WEIGHTS, IMPACTS, cache=cache), expected)
+    assert cache.stats()['misses'] == 1
+    # rewritten whole
+    assert np.array_equal(score(matrix, WEIGHTS, IMPACTS, cache=NormCache(directory=directory)), expected)
+
+
+def test_disk_tier_is_trimmed(tmp_path):
+    rng = np.random.default_rng(1)
+    cache = NormCache(directory=str(tmp_path), max_disk_bytes=1000)
+    for _ in range(10):
+        score(rng.uniform(0.1, 10.0, size=(5, 3)), WEIGHTS, IMPACTS, cache=cache)
+    files = [name for name in os.listdir(tmp_path) if name.endswith('.npz')]
+    assert 0 < len(files) < 10
+    assert sum(os.path.getsize(tmp_path / name) for name in files) <= 1000
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_keyed_lookups_skip_hashing(matrix):
+    cache = NormCache()
+    keyed = cache.keyed('upload-1')
+    expected = score(matrix, WEIGHTS, IMPACTS)
+    assert np.array_equal(score(matrix, WEIGHTS, IMPACTS, cache=keyed), expected)
+    assert np.array_equal(score(matrix, WEIGHTS, IMPACTS, cache=keyed), expected)
+    assert cache.stats()['hits'] == 1
+    assert cache.keyed('upload-1').norms(matrix) is cache.norms(matrix, key='upload-1')
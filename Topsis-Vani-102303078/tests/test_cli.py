@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+import pytest
+
+from topsis_vani_102303078.topsis import main, protect_lists
+
+DATA = 'Name,P1,P2,P3\nM1,1,5,3\nM2,2,4,1\nM3,3,1,2\n'
+
+
+@pytest.fixture
+def data_csv(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text(DATA)
+    return str(path)
+
+
+@pytest.mark.parametrize('arg', ['-,+,+', '-1,2', '-0.5,1e-3', '-, +'])
+def test_lists_starting_with_minus_are_protected(arg):
+    assert protect_lists([arg]) == [f' {arg}']
+
+
+@pytest.mark.parametrize('arg', ['--criteria=P1,P2', '--weights=-1,2', '-j4', '--top-k', 'P1,P2', '-x,y'])
+def test_options_are_left_alone(arg):
+    assert protect_lists([arg]) == [arg]
+
+
+def test_negative_leading_impacts(data_csv, tmp_path):
+    out = str(tmp_path / 'out.csv')
+    main([data_csv, '1,1,1', '-,+,+', out])
+    assert len(pd.read_csv(out)) == 3
+
+
+def test_criteria_with_equals(data_csv, tmp_path):
+    out = str(tmp_path / 'out.csv')
+    main([data_csv, '1,1', '+,-', out, '--criteria=P1,P3'])
+    assert list(pd.read_csv(out).columns) == ['Name', 'P1', 'P3', 'Topsis Score', 'Rank']
+
+
+def test_batch_options_with_equals(data_csv, tmp_path):
+    out_dir = str(tmp_path / 'out')
+    main(['batch', '--glob', data_csv, '--weights=1,1,1', '--impacts=-,+,+', '--output-dir', out_dir, '--quiet'])
+    assert os.path.exists(os.path.join(out_dir, 'data.csv'))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from topsis_vani_102303078.engine import SCORE_TOLERANCE_FLOAT32, rank, score
+
+IMPACTS = ['+', '-', '+', '-', '+', '+', '-', '+']
+
+
+def matrix(seed, n_rows, n_cols=8):
+    return np.random.default_rng(seed).uniform(0.1, 1000.0, size=(n_rows, n_cols))
+
+
+@pytest.mark.parametrize('seed, n_rows', [(0, 10), (1, 1000), (2, 200_000)])
+@pytest.mark.parametrize('distance', ['euclidean', 'manhattan'])
+def test_float32_scores_within_tolerance(seed, n_rows, distance):
+    data = matrix(seed, n_rows)
+    weights = np.random.default_rng(seed).uniform(0.5, 3.0, size=data.shape[1])
+    s64 = score(data, weights, IMPACTS, distance=distance)
+    s32 = score(data.astype(np.float32), weights, IMPACTS, dtype='float32', distance=distance)
+
+    assert s32.dtype == np.float32
+    assert np.abs(s32.astype(np.float64) - s64).max() <= SCORE_TOLERANCE_FLOAT32
+
+    # alternatives further apart than twice the tolerance keep their order
+    order = np.argsort(-s64, kind='stable')
+    apart = -np.diff(s64[order]) > 2 * SCORE_TOLERANCE_FLOAT32
+    assert (np.diff(s32[order])[apart] < 0).all()
+
+
+def test_float32_ranks_match_without_near_ties():
+    data = matrix(3, 500)
+    weights = [1, 2, 1, 1, 3, 1, 2, 1]
+    s64, r64 = rank(data, weights, IMPACTS)
+    gaps = np.diff(np.sort(s64))
+    assert gaps.min() > 2 * SCORE_TOLERANCE_FLOAT32  # the data has no near-ties
+    _, r32 = rank(data, weights, IMPACTS, dtype='float32')
+    assert np.array_equal(r32, r64)
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from topsis_vani_102303078.engine import (BLOCK_ROWS, DISTANCES, NormalizationError, ParameterError, rank,
+                                          rank_batch, register_distance, score, top_k)
+
+WEIGHTS = [1, 2, 1, 0.5]
+IMPACTS = ['+', '-', '+', '-']
+METRICS = {
+    'euclidean': lambda d: np.sqrt((d ** 2).sum(axis=1)),
+    'manhattan': lambda d: np.abs(d).sum(axis=1),
+    'chebyshev': lambda d: np.abs(d).max(axis=1),
+    'lp:3': lambda d: (np.abs(d) ** 3).sum(axis=1) ** (1 / 3),
+}
+
+
+def matrix(seed=0, n_rows=300):
+    return np.random.default_rng(seed).uniform(0.1, 50.0, size=(n_rows, len(WEIGHTS)))
+
+
+def reference(data, weights, impacts, normalization='vector', distance='euclidean'):
+    """Textbook TOPSIS, one step at a time."""
+    if normalization == 'vector':
+        normalized = data / np.sqrt((data ** 2).sum(axis=0))
+    elif normalization == 'sum':
+        normalized = data / data.sum(axis=0)
+    else:
+        normalized = (data - data.min(axis=0)) / (data.max(axis=0) - data.min(axis=0))
+    weighted = normalized * np.asarray(weights, dtype=float)
+    benefit = np.array([imp == '+' for imp in impacts])
+    best = np.where(benefit, weighted.max(axis=0), weighted.min(axis=0))
+    worst = np.where(benefit, weighted.min(axis=0), weighted.max(axis=0))
+    d_best = METRICS[distance](weighted - best)
+    d_worst = METRICS[distance](weighted - worst)
+    return d_worst / (d_best + d_worst)
+
+
+@pytest.mark.parametrize('normalization', ['vector', 'sum', 'minmax'])
+@pytest.mark.parametrize('distance', list(METRICS))
+def test_kernels_match_reference(normalization, distance):
+    data = matrix()
+    got = score(data, WEIGHTS, IMPACTS, normalization=normalization, distance=distance)
+    np.testing.assert_allclose(got, reference(data, WEIGHTS, IMPACTS, normalization, distance), rtol=1e-12)
+
+
+def test_lp_1_is_manhattan():
+    data = matrix(1)
+    np.testing.assert_allclose(score(data, WEIGHTS, IMPACTS, distance='lp:1'),
+                               score(data, WEIGHTS, IMPACTS, distance='manhattan'), rtol=1e-13)
+
+
+def test_bad_kernels():
+    with pytest.raises(ParameterError):
+        score(matrix(), WEIGHTS, IMPACTS, distance='lp:0.5')
+    with pytest.raises(ParameterError):
+        score(matrix(), WEIGHTS, IMPACTS, normalization='zscore')
+    data = matrix()
+    data[:, 1] = 3.0
+    with pytest.raises(NormalizationError):
+        score(data, WEIGHTS, IMPACTS, normalization='minmax')
+
+
+def test_registered_distance(monkeypatch):
+    # the registry is module state; put it back afterwards
+    monkeypatch.setattr('topsis_vani_102303078.engine.DISTANCES', dict(DISTANCES))
+    register_distance('squared', lambda diff: np.einsum('ij,ij->i', diff, diff))
+    data = matrix(2)
+    got = score(data, WEIGHTS, IMPACTS, distance='squared')
+    # with c = d_worst / (d_best + d_worst), squared distances give c^2 / (c^2 + (1 - c)^2)
+    c = score(data, WEIGHTS, IMPACTS)
+    np.testing.assert_allclose(got, c ** 2 / (c ** 2 + (1 - c) ** 2), rtol=1e-10)
+
+
+def test_workers_are_bit_for_bit_serial():
+    data = matrix(3, n_rows=3 * BLOCK_ROWS + 17)
+    assert np.array_equal(score(data, WEIGHTS, IMPACTS, workers=4), score(data, WEIGHTS, IMPACTS))
+
+
+def test_rank_batch_rows_match_rank():
+    data = matrix(4)
+    rng = np.random.default_rng(4)
+    weights = rng.uniform(0.5, 3.0, size=(10, len(WEIGHTS)))
+    impacts = np.where(rng.random((10, len(WEIGHTS))) < 0.5, 1, -1)
+    scores, ranks = rank_batch(data, weights, impacts, chunk_size=3)
+    for k in range(10):
+        expected_scores, expected_ranks = rank(data, weights[k], list(impacts[k]))
+        assert np.array_equal(scores[k], expected_scores)
+        assert np.array_equal(ranks[k], expected_ranks)
+
+
+def test_top_k_matches_rank():
+    data = np.round(matrix(5), 0)  # coarse values, so some scores tie
+    scores, ranks = rank(data, WEIGHTS, IMPACTS)
+    rows, top, top_ranks = top_k(data, WEIGHTS, IMPACTS, 25)
+    order = np.lexsort((np.arange(len(scores)), -scores))[:25]
+    assert np.array_equal(rows, order)
+    assert np.array_equal(top, scores[order])
+    assert np.array_equal(top_ranks, ranks[order])
@@ -0,0 +1,56 @@
+import numpy as np
+
+from topsis_vani_102303078 import TopsisIndex
+from topsis_vani_102303078.engine import score
+
+WEIGHTS = [1, 1, 1, 2, 1]
+IMPACTS = ['+', '+', '-', '+', '+']
+# the index rounds exact column sums once; score() sums in floating point
+TOLERANCE = 1e-12
+
+
+def index_scores(index):
+    keys, matrix = index.table()
+    return np.array([index.score(key) for key in keys]), score(matrix, WEIGHTS, IMPACTS)
+
+
+def test_scores_match_engine_after_updates():
+    rng = np.random.default_rng(0)
+    matrix = rng.uniform(0.1, 100.0, size=(5000, 5))
+    keys = [f"A{i}" for i in range(len(matrix))]
+    index = TopsisIndex.from_matrix(keys, matrix, WEIGHTS, IMPACTS)
+
+    for i in rng.choice(len(matrix), 50, replace=False):
+        matrix[i] = rng.uniform(0.1, 100.0, size=5)
+        index.update(keys[i], matrix[i])
+
+    got, expected = index_scores(index)
+    np.testing.assert_allclose(got, expected, rtol=0, atol=TOLERANCE)
+
+
+def test_scores_match_engine_after_adds_and_removes():
+    rng = np.random.default_rng(1)
+    index = TopsisIndex(WEIGHTS, IMPACTS, capacity=4)
+    index.add_many([f"A{i}" for i in range(300)], rng.uniform(0.1, 100.0, size=(300, 5)))
+    for i in range(0, 300, 7):
+        index.remove(f"A{i}")
+    for i in range(20):
+        index.add(f"B{i}", rng.uniform(0.1, 100.0, size=5))
+
+    got, expected = index_scores(index)
+    np.testing.assert_allclose(got, expected, rtol=0, atol=TOLERANCE)
+
+
+def test_changes_match_index_built_from_scratch():
+    rng = np.random.default_rng(2)
+    keys = [f"A{i}" for i in range(500)]
+    index = TopsisIndex.from_matrix(keys, rng.uniform(0.1, 100.0, size=(500, 5)), WEIGHTS, IMPACTS)
+    for i in range(0, 500, 3):
+        index.update(keys[i], rng.uniform(0.1, 100.0, size=5))
+    for i in range(1, 500, 11):
+        index.remove(keys[i])
+    index.add("B", rng.uniform(0.1, 100.0, size=5))
+
+    live, matrix = index.table()
+    fresh = TopsisIndex.from_matrix(live, matrix, WEIGHTS, IMPACTS)
+    assert [index.score(key) for key in live] == [fresh.score(key) for key in live]
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from topsis_vani_102303078.engine import InputError
+from topsis_vani_102303078.loader import load_csv
+
+ENGINES = ['c', 'pyarrow']
+
+
+def write(tmp_path, text):
+    path = tmp_path / 'data.csv'
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_bool_column_counts_as_zero_one(tmp_path, engine):
+    path = write(tmp_path, 'n,a,b\nx,1,True\ny,2,False\n')
+    _, data = load_csv(path, engine=engine)
+    assert np.array_equal(data, [[1.0, 1.0], [2.0, 0.0]])
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_header_only_file(tmp_path, engine):
+    path = write(tmp_path, 'n,a,b\n')
+    with pytest.raises(InputError, match='no alternatives'):
+        load_csv(path, engine=engine)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_names_first_offending_cell(tmp_path, engine):
+    path = write(tmp_path, 'n,a,b\nx,1,2\ny,2,abc\n')
+    with pytest.raises(InputError, match="row 2, column 'b': 'abc'"):
+        load_csv(path, engine=engine)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_names_missing_cell(tmp_path, engine):
+    path = write(tmp_path, 'n,a,b\nx,1,True\ny,2,\n')
+    with pytest.raises(InputError, match="row 2, column 'b': missing value"):
+        load_csv(path, engine=engine)
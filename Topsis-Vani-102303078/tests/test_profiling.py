@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from topsis_vani_102303078 import profiling
+from topsis_vani_102303078.profiling import Profiler, stage
+
+
+@pytest.mark.parametrize('reset_peak', [True, False])
+def test_trace_memory_records_bytes(monkeypatch, reset_peak):
+    # without reset_peak (Python < 3.9) the growth over the stage is recorded
+    monkeypatch.setattr(profiling, '_RESET_PEAK', reset_peak and profiling._RESET_PEAK)
+    with Profiler(trace_memory=True) as prof:
+        with stage('alloc'):
+            kept = np.ones(100_000)
+    assert prof.records[0]['bytes'] >= kept.nbytes
+
+
+def test_bytes_are_not_traced_by_default():
+    with Profiler() as prof:
+        with stage('alloc', rows=3):
+            pass
+    assert prof.records[0]['bytes'] is None
+    assert prof.summary()['alloc']['rows'] == 3
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from topsis_vani_102303078.engine import rank, score
+from topsis_vani_102303078.sensitivity import (critical_weights, crossovers, monte_carlo, sample_weights,
+                                               score_gradients, sweep)
+
+WEIGHTS = np.array([1.0, 2.0, 1.0, 1.5])
+IMPACTS = ['+', '-', '+', '+']
+# sensitivity sums the distance terms in another order than score()
+TOLERANCE = 1e-12
+
+
+@pytest.fixture
+def matrix():
+    return np.random.default_rng(0).uniform(1.0, 10.0, size=(12, 4))
+
+
+def with_weight(weights, j, value):
+    weights = weights.copy()
+    weights[j] = value
+    return weights
+
+
+def leader(matrix, weights):
+    return int(np.argmax(score(matrix, weights, IMPACTS)))
+
+
+def test_sweep_matches_rescoring(matrix):
+    values = np.linspace(0.1, 5.0, 9)
+    scores, ranks = sweep(matrix, WEIGHTS, IMPACTS, 2, values)
+    for i, value in enumerate(values):
+        expected_scores, expected_ranks = rank(matrix, with_weight(WEIGHTS, 2, value), IMPACTS)
+        np.testing.assert_allclose(scores[i], expected_scores, rtol=0, atol=TOLERANCE)
+        assert np.array_equal(ranks[i], expected_ranks)
+
+
+def test_monte_carlo_matches_rescoring(matrix):
+    result = monte_carlo(matrix, IMPACTS, n_samples=500, seed=7, ranks=True)
+    # one chunk, so the same draws as a single sample_weights call
+    samples = sample_weights(500, 4, np.random.default_rng(7))
+    scores = np.array([score(matrix, w, IMPACTS) for w in samples])
+
+    wins = np.bincount(scores.argmax(axis=1), minlength=len(matrix))
+    np.testing.assert_array_equal(result.rank1_probability, wins / 500)
+    np.testing.assert_allclose(result.mean_score, scores.mean(axis=0), atol=TOLERANCE)
+    np.testing.assert_allclose(result.std_score, scores.std(axis=0), atol=1e-9)
+    mean_rank = np.mean([rank(matrix, w, IMPACTS)[1] for w in samples], axis=0)
+    np.testing.assert_allclose(result.mean_rank, mean_rank)
+
+
+def test_monte_carlo_is_independent_of_chunking(matrix):
+    small = monte_carlo(matrix, IMPACTS, n_samples=300, seed=3, memory_budget=12 * 8 * 4 * 7)
+    large = monte_carlo(matrix, IMPACTS, n_samples=300, seed=3)
+    np.testing.assert_array_equal(small.rank1_probability, large.rank1_probability)
+
+
+def test_gradients_match_finite_differences(matrix):
+    scores, gradients = score_gradients(matrix, WEIGHTS, IMPACTS)
+    np.testing.assert_allclose(scores, score(matrix, WEIGHTS, IMPACTS), atol=TOLERANCE)
+    h = 1e-6
+    for j in range(4):
+        up = score(matrix, with_weight(WEIGHTS, j, WEIGHTS[j] + h), IMPACTS)
+        down = score(matrix, with_weight(WEIGHTS, j, WEIGHTS[j] - h), IMPACTS)
+        np.testing.assert_allclose(gradients[:, j], (up - down) / (2 * h), atol=1e-7)
+
+
+def test_critical_weights_match_rescoring(matrix):
+    factor = 20.0
+    base = leader(matrix, WEIGHTS)
+    thresholds = critical_weights(matrix, WEIGHTS, IMPACTS, factor=factor)
+    found = 0
+    for t in thresholds:
+        assert t.best == base
+        for limit, below in ((t.lower, True), (t.upper, False)):
+            if limit is None:
+                # no change anywhere between the weight and its bound
+                bound = WEIGHTS[t.criterion] / factor if below else WEIGHTS[t.criterion] * factor
+                grid = np.geomspace(WEIGHTS[t.criterion], bound, 200)[1:]
+                assert all(leader(matrix, with_weight(WEIGHTS, t.criterion, w)) == base for w in grid)
+                continue
+            found += 1
+            inside, outside = (1 + 1e-6, 1 - 1e-6) if below else (1 - 1e-6, 1 + 1e-6)
+            assert leader(matrix, with_weight(WEIGHTS, t.criterion, limit * inside)) == base
+            new_best = t.lower_best if below else t.upper_best
+            assert leader(matrix, with_weight(WEIGHTS, t.criterion, limit * outside)) == new_best
+    assert found  # the data is chosen so that some threshold exists
+
+
+def test_crossovers_swap_the_pair(matrix):
+    checked = 0
+    for c in crossovers(matrix, WEIGHTS, IMPACTS, top=3):
+        for limit, outward in ((c.lower, 1 - 1e-6), (c.upper, 1 + 1e-6)):
+            if limit is None:
+                continue
+            inward = 2 - outward
+            before = score(matrix, with_weight(WEIGHTS, c.criterion, limit * inward), IMPACTS)
+            after = score(matrix, with_weight(WEIGHTS, c.criterion, limit * outward), IMPACTS)
+            assert before[c.first] > before[c.second]
+            assert after[c.first] < after[c.second]
+            checked += 1
+    assert checked
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from topsis_vani_102303078.engine import InputError, ParameterError
+from topsis_vani_102303078.server import JSON, handle_rank
+
+MATRIX = [[250, 16, 12], [200, 16, 8], [300, 32, 16]]
+
+
+def rank_json(**payload):
+    body = json.dumps(dict({"matrix": MATRIX, "weights": [1, 1, 2], "impacts": "+,+,-"}, **payload))
+    return json.loads(handle_rank(JSON, body.encode(), {})[1])
+
+
+def test_lists_and_strings_rank_alike():
+    assert rank_json() == rank_json(weights="1,1,2", impacts=["+", "+", "-"])
+
+
+@pytest.mark.parametrize("field, value", [("weights", 5), ("impacts", 5), ("weights", {"a": 1}),
+                                          ("impacts", "+-+"), ("weights", "112")])
+def test_bad_weights_or_impacts(field, value):
+    with pytest.raises(ParameterError):
+        rank_json(**{field: value})
+
+
+@pytest.mark.parametrize("field", ["names", "columns"])
+def test_names_and_columns_must_be_lists(field):
+    with pytest.raises(InputError, match=field):
+        rank_json(**{field: 5})
+
+
+@pytest.mark.parametrize("value", [1.7, True, "1.5", "x", [2]])
+def test_top_k_must_be_an_integer(value):
+    with pytest.raises(ParameterError, match="top_k"):
+        rank_json(top_k=value)
+
+
+@pytest.mark.parametrize("value", [2, "2"])
+def test_top_k(value):
+    assert len(rank_json(top_k=value)["rows"]) == 2
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from topsis_vani_102303078.engine import InputError, dense_rank, rank, top_k
+from topsis_vani_102303078.ranking import RUN_DTYPE, RunWriter, external_dense_rank
+from topsis_vani_102303078.stream import topsis_stream
+
+WEIGHTS = [1, 1, 2]
+IMPACTS = ['+', '-', '+']
+
+
+@pytest.fixture
+def data_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    # few distinct values, so many rows tie
+    matrix = rng.integers(1, 6, size=(2000, 3)).astype(float)
+    df = pd.DataFrame(matrix, columns=['P1', 'P2', 'P3'])
+    df.insert(0, 'Name', [f'A{i}' for i in range(len(df))])
+    path = tmp_path / 'data.csv'
+    df.to_csv(path, index=False)
+    return str(path), matrix
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_external_dense_rank_matches_in_memory(tmp_path, seed):
+    scores = np.random.default_rng(seed).integers(0, 50, size=5000) / 7.0
+    writer = RunWriter(str(tmp_path), run_rows=333)
+    for start in range(0, len(scores), 250):
+        writer.add(scores[start:start + 250], start)
+    paths = writer.finish()
+    assert len(paths) > 1
+
+    ranks = np.zeros(len(scores), dtype=np.int64)
+    distinct = external_dense_rank(paths, ranks, block_rows=17)
+    assert np.array_equal(ranks, dense_rank(scores))
+    assert distinct == len(np.unique(scores))
+
+
+def test_stream_matches_in_memory(data_csv, tmp_path):
+    path, matrix = data_csv
+    out = str(tmp_path / 'out.csv')
+    # a budget of a few hundred rows per run forces an external merge
+    topsis_stream(path, WEIGHTS, IMPACTS, out, chunksize=300, memory_budget=400 * RUN_DTYPE.itemsize)
+    result = pd.read_csv(out)
+
+    scores, ranks = rank(matrix, WEIGHTS, IMPACTS)
+    assert list(result['Name']) == [f'A{i}' for i in range(len(matrix))]
+    assert np.array_equal(result['Topsis Score'], np.round(scores * 100, 2))
+    assert np.array_equal(result['Rank'], ranks)
+
+
+def test_stream_top_k_matches_in_memory(data_csv, tmp_path):
+    path, matrix = data_csv
+    out = str(tmp_path / 'out.csv')
+    topsis_stream(path, WEIGHTS, IMPACTS, out, chunksize=300, top_k=50)
+    result = pd.read_csv(out)
+
+    rows, scores, ranks = top_k(matrix, WEIGHTS, IMPACTS, 50)
+    assert list(result['Name']) == [f'A{i}' for i in rows]
+    assert np.array_equal(result['Rank'], ranks)
+
+
+def test_stream_header_only(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('Name,P1,P2,P3\n')
+    with pytest.raises(InputError, match='no alternatives'):
+        topsis_stream(str(path), WEIGHTS, IMPACTS, str(tmp_path / 'out.csv'), chunksize=10)
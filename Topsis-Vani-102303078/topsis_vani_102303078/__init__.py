@@ -7,9 +7,46 @@ Roll Number: 102303078
 Email: vgoyal_be23@thapar.edu
 """
 
+import importlib
+
 from .topsis import topsis
 
+# everything else is imported on first use, so that the CLI (and anything
+# that only needs a few names) does not load NumPy and pandas up front
+_EXPORTS = {
+    'rank': 'engine', 'rank_batch': 'engine', 'score': 'engine', 'top_k': 'engine',
+    'TopsisError': 'engine', 'InputError': 'engine', 'ParameterError': 'engine',
+    'NormalizationError': 'engine', 'OutputError': 'engine',
+    'topsis_stream': 'stream',
+    'TopsisIndex': 'index',
+    'open_matrix': 'binary', 'write_matrix': 'binary',
+    'NormCache': 'cache',
+    'read_table': 'formats', 'write_table': 'formats',
+    'Profiler': 'profiling', 'JsonLinesSink': 'profiling',
+    'load_csv': 'loader',
+    'load_input': 'fileio', 'save_result': 'fileio',
+    'TopsisServer': 'server',
+    'JobQueue': 'jobs', 'JobStore': 'jobs',
+    'WeightScorer': 'sensitivity', 'critical_weights': 'sensitivity', 'crossovers': 'sensitivity',
+    'monte_carlo': 'sensitivity', 'score_gradients': 'sensitivity', 'sweep': 'sensitivity',
+    'GroupRanker': 'group', 'group_rank': 'group',
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
 __version__ = "1.0.0"
 __author__ = "Vani Goyal"
 __email__ = "vgoyal_be23@thapar.edu"
-__all__ = ['topsis']
+__all__ = ['topsis', 'rank', 'rank_batch', 'score', 'top_k', 'TopsisError', 'InputError', 'ParameterError', 'NormalizationError', 'OutputError', 'topsis_stream', 'TopsisIndex', 'open_matrix', 'write_matrix', 'NormCache', 'read_table', 'write_table', 'Profiler', 'JsonLinesSink', 'load_csv', 'load_input', 'save_result', 'TopsisServer', 'JobQueue', 'JobStore', 'WeightScorer', 'critical_weights', 'crossovers', 'monte_carlo', 'score_gradients', 'sweep', 'GroupRanker', 'group_rank']
@@ -0,0 +1,228 @@
+"""
+Batch mode: rank many input files in one process.
+
+A manifest lists the jobs (input, weights, impacts, output, and optionally
+top_k, criteria, normalization and distance) as CSV, JSON or YAML; a glob with shared weights and
+impacts covers a directory of similar files. Jobs run on a bounded thread
+pool: parsing, NumPy and file writes release the GIL, so one job's file I/O
+overlaps another's scoring. A failing job is reported and the rest carry on.
+
+    jobs = read_manifest('regions.json')      # or glob_jobs('regions/*.csv', '1,1,2', '+,-,+', 'out')
+    summary = run_batch(jobs, workers=4, report=print)
+    summary['failed'], summary['rows_per_s']
+
+JSON and YAML manifests are a list of jobs, or an object with a "jobs" list
+whose other keys (weights, impacts, top_k, ...) are defaults for every
+job. Relative paths are resolved against the manifest's directory.
+"""
+
+import csv
+import glob
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .engine import InputError, OutputError, TopsisError, parse_impacts, parse_weights, rank, top_k as select_best
+from .fileio import load_input, save_result
+
+Job = namedtuple("Job", "input weights impacts output top_k criteria normalization distance",
+                 defaults=(None, None, "vector", "euclidean"))
+JobResult = namedtuple("JobResult", "job ok rows bytes seconds error")
+
+FIELDS = ("input", "weights", "impacts", "output", "top_k", "criteria", "normalization", "distance")
+
+
+def default_workers():
+    return min(4, os.cpu_count() or 1)
+
+
+def _load_yaml(f):
+    try:
+        import yaml
+    except ImportError:
+        raise InputError("YAML manifests require PyYAML (pip install pyyaml).")
+    try:
+        return yaml.safe_load(f)
+    except yaml.YAMLError as e:
+        raise InputError(f"Unable to read manifest: {e}")
+
+
+def _entries(path):
+    """(entries, defaults) of a manifest file."""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, newline="") as f:
+            if ext == ".csv":
+                # empty cells are treated as missing
+                return [{k: v for k, v in row.items() if v} for row in csv.DictReader(f)], {}
+            if ext == ".json":
+                data = json.load(f)
+            elif ext in (".yaml", ".yml"):
+                data = _load_yaml(f)
+            else:
+                raise InputError("Manifest must be a .csv, .json, .yaml or .yml file.")
+    except OSError:
+        raise InputError(f"Unable to read manifest '{path}'.")
+    except ValueError as e:
+        raise InputError(f"Unable to read manifest: {e}")
+
+    if isinstance(data, dict):
+        defaults = {k: v for k, v in data.items() if k != "jobs"}
+        data = data.get("jobs")
+    else:
+        defaults = {}
+    if not isinstance(data, list) or not all(isinstance(entry, dict) for entry in data):
+        raise InputError("Manifest must be a list of jobs, or an object with a 'jobs' list.")
+    return data, defaults
+
+
+def _as_list_string(value):
+    # JSON and YAML may give weights and impacts as lists
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(v) for v in value)
+    return None if value is None else str(value)
+
+
+def _job(entry, number, base, defaults):
+    values = dict(defaults, **entry)
+    unknown = sorted(set(values) - set(FIELDS))
+    if unknown:
+        raise InputError(f"Manifest job {number}: unknown field(s) {', '.join(unknown)}.")
+    for field in ("input", "weights", "impacts", "output"):
+        if values.get(field) in (None, ""):
+            raise InputError(f"Manifest job {number}: missing '{field}'.")
+
+    top_k = values.get("top_k")
+    if top_k is not None:
+        try:
+            top_k = int(top_k)
+        except (TypeError, ValueError):
+            raise InputError(f"Manifest job {number}: top_k must be an integer.")
+
+    criteria = values.get("criteria")
+    if isinstance(criteria, str):
+        criteria = [c.strip() for c in criteria.split(",") if c.strip()]
+
+    return Job(os.path.join(base, str(values["input"])), _as_list_string(values["weights"]),
+               _as_list_string(values["impacts"]), os.path.join(base, str(values["output"])), top_k, criteria,
+               values.get("normalization", "vector"), values.get("distance", "euclidean"))
+
+
+def _check_outputs(jobs):
+    """Raise InputError if two jobs write the same file or a job would overwrite any job's input."""
+    inputs = {os.path.realpath(job.input) for job in jobs}
+    seen = set()
+    for job in jobs:
+        output = os.path.realpath(job.output)
+        if output in inputs:
+            raise InputError(f"Output '{job.output}' would overwrite an input file.")
+        if output in seen:
+            raise InputError(f"Several jobs write to '{job.output}'.")
+        seen.add(output)
+    return jobs
+
+
+def read_manifest(path, weights=None, impacts=None, top_k=None, normalization=None, distance=None):
+    """
+    Jobs listed in a manifest file. weights, impacts, top_k, normalization
+    and distance are used for jobs that do not set them. Raises InputError
+    for a malformed manifest.
+    """
+    entries, defaults = _entries(path)
+    fallback = {k: v for k, v in (("weights", weights), ("impacts", impacts), ("top_k", top_k),
+                                  ("normalization", normalization), ("distance", distance)) if v is not None}
+    defaults = dict(fallback, **defaults)
+    base = os.path.dirname(os.path.abspath(path))
+    return _check_outputs([_job(entry, i + 1, base, defaults) for i, entry in enumerate(entries)])
+
+
+def glob_jobs(pattern, weights, impacts, output_dir, top_k=None, criteria=None, normalization="vector",
+              distance="euclidean"):
+    """
+    One job per file matching pattern, each written to output_dir under its
+    own file name. Files already in output_dir (results of an earlier run)
+    are skipped.
+    """
+    output_dir_real = os.path.realpath(output_dir)
+    inputs = [path for path in sorted(glob.glob(pattern, recursive=True))
+              if os.path.dirname(os.path.realpath(path)) != output_dir_real]
+    if not inputs:
+        raise InputError(f"No input files match '{pattern}' outside the output directory.")
+    return _check_outputs([Job(path, weights, impacts, os.path.join(output_dir, os.path.basename(path)),
+                               top_k, criteria, normalization, distance) for path in inputs])
+
+
+def _make_parent(path):
+    """Create the directory path is written to, like --output-dir for --glob."""
+    parent = os.path.dirname(path)
+    if parent:
+        try:
+            os.makedirs(parent, exist_ok=True)
+        except OSError:
+            raise OutputError(f"Unable to create output directory '{parent}'.")
+
+
+def run_job(job, dtype=None):
+    """Run one job; errors are returned in the JobResult instead of raised."""
+    start = time.perf_counter()
+    try:
+        df, data = load_input(job.input, job.criteria, dtype)
+        weights = parse_weights(job.weights, data.shape[1])
+        impacts = parse_impacts(job.impacts, data.shape[1])
+
+        # data is not used after scoring, so it is weighted in place
+        rows = None
+        kernels = {"normalization": job.normalization, "distance": job.distance}
+        if job.top_k is None:
+            scores, ranks = rank(data, weights, impacts, dtype=dtype, overwrite=True, **kernels)
+        else:
+            rows, scores, ranks = select_best(data, weights, impacts, job.top_k, dtype=dtype, overwrite=True,
+                                              **kernels)
+        _make_parent(job.output)
+        save_result(df, scores, ranks, job.output, rows)
+        n_rows = data.shape[0]
+    except TopsisError as e:
+        return JobResult(job, False, 0, 0, time.perf_counter() - start, str(e))
+    except Exception as e:
+        # keep going: one unreadable file should not stop the batch
+        return JobResult(job, False, 0, 0, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+    return JobResult(job, True, n_rows, os.path.getsize(job.input), time.perf_counter() - start, None)
+
+
+def run_batch(jobs, workers=None, dtype=None, report=None):
+    """
+    Run jobs on a pool of `workers` threads (default: up to 4). report(result)
+    is called for every JobResult, in job order. Returns a summary dict with
+    counts, totals, throughput and one record per job.
+    """
+    workers = workers or default_workers()
+    results = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers, thread_name_prefix="topsis-batch") as pool:
+        for result in pool.map(lambda job: run_job(job, dtype), jobs):
+            results.append(result)
+            if report is not None:
+                report(result)
+    elapsed = time.perf_counter() - start
+
+    succeeded = sum(r.ok for r in results)
+    rows = sum(r.rows for r in results)
+    n_bytes = sum(r.bytes for r in results)
+    rate = (lambda n: n / elapsed) if elapsed > 0 else (lambda n: None)
+    return {
+        "jobs": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "workers": workers,
+        "seconds": elapsed,
+        "rows": rows,
+        "input_bytes": n_bytes,
+        "jobs_per_s": rate(len(results)),
+        "rows_per_s": rate(rows),
+        "mb_per_s": rate(n_bytes / 2 ** 20),
+        "results": [{"input": r.job.input, "output": r.job.output, "ok": r.ok, "rows": r.rows,
+                     "seconds": r.seconds, "error": r.error} for r in results],
+    }
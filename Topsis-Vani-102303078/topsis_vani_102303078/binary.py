@@ -0,0 +1,130 @@
+"""
+Binary decision matrix format for repeated runs over the same dataset.
+
+`topsis convert data.csv data.tmx` parses the CSV once and writes:
+
+    MAGIC | padding | float64 matrix (row-major) | names (JSON) | footer (JSON) | footer length | MAGIC
+
+The matrix starts at a 64-byte aligned offset and is stored C-contiguous, so
+open_matrix() can hand it to the engine as an np.memmap: nothing is parsed or
+copied, and concurrent runs share the same page cache.
+"""
+
+import json
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from .engine import InputError, OutputError
+from .stream import DEFAULT_CHUNKSIZE, iter_chunks, read_header
+
+MAGIC = b"TOPSISMX"
+VERSION = 1
+DATA_OFFSET = 64
+_TRAILER = struct.Struct("<Q8s")
+
+BinaryMatrix = namedtuple("BinaryMatrix", ["columns", "names", "data"])
+
+
+def is_binary(path):
+    """True if path is a file in the binary matrix format."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _finish(f, names, columns, n_rows):
+    names_offset = f.tell()
+    f.write(json.dumps(names).encode("utf-8"))
+
+    footer = {
+        "version": VERSION,
+        "columns": columns,
+        "n_rows": n_rows,
+        "n_criteria": len(columns) - 1,
+        "dtype": "<f8",
+        "order": "C",
+        "data_offset": DATA_OFFSET,
+        "names_offset": names_offset,
+    }
+    footer = json.dumps(footer).encode("utf-8")
+    f.write(footer)
+    f.write(_TRAILER.pack(len(footer), MAGIC))
+
+
+def write_matrix(path, names, columns, matrix):
+    """Write an in-memory (alternatives x criteria) matrix with its names."""
+    matrix = np.ascontiguousarray(matrix, dtype="<f8")
+    if matrix.ndim != 2 or matrix.shape[1] != len(columns) - 1 or matrix.shape[0] != len(names):
+        raise InputError("Matrix shape does not match the names and columns.")
+
+    try:
+        with open(path, "wb") as f:
+            f.write(MAGIC.ljust(DATA_OFFSET, b"\0"))
+            f.write(matrix.tobytes())
+            _finish(f, [str(name) for name in names], list(columns), matrix.shape[0])
+    except OSError:
+        raise OutputError("Unable to write output file.")
+
+
+def convert(input_file, output_file, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Convert a CSV file to the binary format, streaming it chunk by chunk.
+    Returns the number of rows written.
+    """
+    columns = [str(col) for col in read_header(input_file)]
+
+    names = []
+    n_rows = 0
+    try:
+        with open(output_file, "wb") as f:
+            f.write(MAGIC.ljust(DATA_OFFSET, b"\0"))
+            for _, df, data in iter_chunks(input_file, chunksize):
+                f.write(np.ascontiguousarray(data, dtype="<f8").tobytes())
+                names.extend(df.iloc[:, 0].astype(str).tolist())
+                n_rows += data.shape[0]
+            _finish(f, names, columns, n_rows)
+    except OSError:
+        raise OutputError("Unable to write output file.")
+
+    return n_rows
+
+
+def open_matrix(path):
+    """
+    Open a binary matrix file. Returns BinaryMatrix(columns, names, data)
+    where data is a read-only np.memmap of shape (n_rows, n_criteria).
+    """
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise InputError("Not a TOPSIS binary matrix file.")
+            f.seek(size - _TRAILER.size)
+            footer_len, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if magic != MAGIC:
+                raise InputError("Truncated TOPSIS binary matrix file.")
+            f.seek(size - _TRAILER.size - footer_len)
+            footer = json.loads(f.read(footer_len).decode("utf-8"))
+            f.seek(footer["names_offset"])
+            names = json.loads(f.read(size - _TRAILER.size - footer_len - footer["names_offset"]).decode("utf-8"))
+    except InputError:
+        raise
+    except (OSError, ValueError, KeyError, struct.error):
+        raise InputError("Unable to read input file. Ensure it is a valid TOPSIS binary matrix file.")
+
+    if footer.get("version") != VERSION:
+        raise InputError(f"Unsupported TOPSIS binary matrix version {footer.get('version')}.")
+
+    shape = (footer["n_rows"], footer["n_criteria"])
+    if shape[0] == 0:
+        data = np.empty(shape, dtype=footer["dtype"])
+    else:
+        data = np.memmap(path, dtype=footer["dtype"], mode="r", offset=footer["data_offset"],
+                         shape=shape, order=footer["order"])
+
+    return BinaryMatrix(footer["columns"], names, data)
@@ -0,0 +1,236 @@
+"""
+Per-dataset normalization cache.
+
+The column norms (and the normalized matrix) depend only on the data, not
+on weights or impacts. NormCache stores them keyed by a hash of the numeric
+matrix and the normalization (see engine.NORMALIZATIONS), so repeated runs
+with new weights only pay for the weighting and distance steps. Entries live
+in an in-memory LRU bounded by max_bytes and, optionally, in a directory on
+disk that survives restarts. The directory may be shared between processes:
+entries are written to a temporary file and renamed into place, and an entry
+that cannot be read counts as a miss and is removed. It is unbounded unless
+max_disk_bytes is given, in which case the least recently used files are
+deleted after each write.
+
+Hashing the matrix reads all of it, which costs more than the norms of a
+large matrix. A caller that already identifies its data (e.g. by a hash of
+the uploaded file) passes that key instead, or uses cache.keyed(key).
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .engine import normalization_kernel
+
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+
+
+def matrix_key(matrix, normalization="vector"):
+    """Content hash of a numeric matrix (shape, dtype and values) and normalization name."""
+    matrix = np.ascontiguousarray(matrix)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((matrix.shape, matrix.dtype.str)).encode())
+    digest.update(memoryview(matrix).cast("B"))
+    if normalization != "vector":
+        # vector keys predate the other normalizations
+        digest.update(normalization.encode())
+    return digest.hexdigest()
+
+
+def caller_key(key, normalization="vector"):
+    """Cache key of a caller-supplied matrix key; kept apart from content hashes."""
+    return hashlib.blake2b(repr(("key", str(key), normalization)).encode(), digest_size=16).hexdigest()
+
+
+class NormCache:
+    """
+    LRU cache of column norms and, with store_normalized=True, of the
+    normalized matrix.
+
+    cache = NormCache(max_bytes=64 * 2 ** 20, directory='.topsis-cache')
+    scores, ranks = rank(matrix, weights, impacts, cache=cache)
+    cache.stats()  # {'hits': ..., 'disk_hits': ..., 'misses': ..., ...}
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, directory=None, store_normalized=False, max_disk_bytes=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.store_normalized = store_normalized
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _store(self, key, entry):
+        if key in self._entries:
+            return
+        # entries are shared between callers
+        for arr in entry.values():
+            arr.flags.writeable = False
+
+        size = sum(arr.nbytes for arr in entry.values())
+        if size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= sum(arr.nbytes for arr in old.values())
+            self.evictions += 1
+
+    def _load(self, key):
+        if self.directory is None or not os.path.exists(self._path(key)):
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path) as f:
+                entry = {name: f[name] for name in f.files}
+        except Exception:
+            # truncated or otherwise unreadable: a miss, rewritten by get()
+            self._remove(path)
+            return None
+        try:
+            # the access time is not reliable; mtime orders the disk LRU
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def _save(self, key, entry):
+        # write then rename, so other processes never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **entry)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            self._remove(tmp)
+            return
+        if self.max_disk_bytes is not None:
+            self._trim_disk()
+
+    def _trim_disk(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            self._remove(os.path.join(self.directory, name))
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, matrix, pmap=map, normalization="vector", key=None):
+        """
+        Return the cache entry for matrix: a dict with 'norms' (the
+        denominators of the named normalization) and, when store_normalized
+        is set, 'normalized'. Computes it on a miss.
+
+        key identifies the matrix contents instead of hashing them; the
+        caller must not reuse it for different data.
+        """
+        key = matrix_key(matrix, normalization) if key is None else caller_key(key, normalization)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._load(key)
+        if entry is not None and (not self.store_normalized or "normalized" in entry):
+            with self._lock:
+                self.disk_hits += 1
+                self._store(key, entry)
+            return entry
+
+        entry = {"norms": normalization_kernel(normalization)(matrix, pmap)}
+        if self.store_normalized:
+            entry["normalized"] = matrix / entry["norms"]
+
+        with self._lock:
+            self.misses += 1
+            self._store(key, entry)
+        if self.directory is not None:
+            self._save(key, entry)
+        return entry
+
+    def norms(self, matrix, pmap=map, normalization="vector", key=None):
+        """Column norms (or other normalization denominators) of matrix, from the cache when possible."""
+        return self.get(matrix, pmap, normalization, key)["norms"]
+
+    def normalized(self, matrix, normalization="vector", key=None):
+        """matrix / denominators (see engine.NORMALIZATIONS); only cached with store_normalized=True."""
+        entry = self.get(matrix, normalization=normalization, key=key)
+        if "normalized" not in entry:
+            return matrix / entry["norms"]
+        return entry["normalized"]
+
+    def keyed(self, key):
+        """
+        A view of this cache that looks every matrix up by key, for passing
+        as cache= to score(), rank() and top_k() without hashing the matrix.
+        """
+        return KeyedCache(self, key)
+
+
+class KeyedCache:
+    """NormCache view with a fixed caller-supplied key; see NormCache.keyed()."""
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+
+    def get(self, matrix, pmap=map, normalization="vector"):
+        return self.cache.get(matrix, pmap, normalization, self.key)
+
+    def norms(self, matrix, pmap=map, normalization="vector"):
+        return self.cache.norms(matrix, pmap, normalization, self.key)
+
+    def normalized(self, matrix, normalization="vector"):
+        return self.cache.normalized(matrix, normalization, self.key)
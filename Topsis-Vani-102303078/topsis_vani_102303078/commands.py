@@ -0,0 +1,253 @@
+"""
+Implementation of the CLI commands.
+
+topsis.py parses the command line and only imports this module (and with it
+NumPy, pandas and the engine) once the arguments are known to be valid, so
+`topsis --help` and usage errors return straight away.
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .engine import TopsisError, parse_weights, parse_impacts, rank, top_k as select_best
+from .stream import read_header, topsis_stream
+from .ranking import DEFAULT_MEMORY_BUDGET
+from .binary import convert, is_binary
+from .formats import CSV, detect_format
+from .fileio import input_labels, load_input, save_result
+from .topsis import error_exit
+from . import batch, group, jobs, sensitivity, server
+
+
+def parse_weights_impacts(weights_str, impacts_str, n_cols):
+    # check comma separated
+    if "," not in weights_str or "," not in impacts_str:
+        error_exit("Impacts and weights must be separated by ',' (comma).")
+
+    try:
+        weights = parse_weights(weights_str, n_cols)
+        impacts = parse_impacts(impacts_str, n_cols)
+    except TopsisError as e:
+        error_exit(str(e))
+
+    return weights, impacts
+
+
+def read_input(input_file, criteria=None, dtype=None):
+    try:
+        return load_input(input_file, criteria, dtype)
+    except TopsisError as e:
+        error_exit(str(e))
+
+
+def write_result(df, scores, ranks, output_file, rows=None):
+    try:
+        save_result(df, scores, ranks, output_file, rows)
+    except TopsisError as e:
+        error_exit(str(e))
+
+
+def topsis(input_file, weights_str, impacts_str, output_file, top_k=None, workers=None, criteria=None,
+           dtype=None, normalization="vector", distance="euclidean"):
+    df, data = read_input(input_file, criteria, dtype)
+
+    # validate weights & impacts
+    weights, impacts = parse_weights_impacts(weights_str, impacts_str, data.shape[1])
+
+    # data is not used after scoring (df holds the values for output), so it
+    # is weighted in place; a read-only binary matrix is left alone
+    rows = None
+    kernels = {"normalization": normalization, "distance": distance}
+    try:
+        if top_k is None:
+            scores, ranks = rank(data, weights, impacts, workers, dtype=dtype, overwrite=True, **kernels)
+        else:
+            rows, scores, ranks = select_best(data, weights, impacts, top_k, workers, dtype=dtype, overwrite=True,
+                                              **kernels)
+    except TopsisError as e:
+        error_exit(str(e))
+
+    write_result(df, scores, ranks, output_file, rows)
+
+    print(f"Success: TOPSIS result saved to '{output_file}'")
+
+
+def topsis_chunked(input_file, weights_str, impacts_str, output_file, chunksize,
+                   memory_budget=DEFAULT_MEMORY_BUDGET, top_k=None):
+    try:
+        n_criteria = len(read_header(input_file)) - 1
+    except TopsisError as e:
+        error_exit(str(e))
+
+    weights, impacts = parse_weights_impacts(weights_str, impacts_str, n_criteria)
+
+    try:
+        n_rows = topsis_stream(input_file, weights, impacts, output_file, chunksize=chunksize,
+                               memory_budget=memory_budget, top_k=top_k)
+    except TopsisError as e:
+        error_exit(str(e))
+
+    print(f"Success: TOPSIS result for {n_rows} rows saved to '{output_file}'")
+
+
+def topsis_convert(input_file, output_file, chunksize):
+    try:
+        n_rows = convert(input_file, output_file, chunksize=chunksize)
+    except TopsisError as e:
+        error_exit(str(e))
+
+    print(f"Success: {n_rows} rows converted to '{output_file}'")
+
+
+def topsis_serve(args):
+    if args.workers is not None and args.workers < 1:
+        error_exit("--workers must be a positive integer.")
+    if args.max_queue < 0:
+        error_exit("--max-queue must not be negative.")
+    if args.max_body < 1:
+        error_exit("--max-body must be a positive integer.")
+    if args.job_ttl < 1:
+        error_exit("--job-ttl must be a positive integer.")
+
+    try:
+        server.serve(args.host, args.port, workers=args.workers, max_queue=args.max_queue,
+                     max_body=args.max_body * 2 ** 20, keepalive=args.keepalive, verbose=args.verbose,
+                     job_store=jobs.JobStore(args.jobs_dir, ttl=args.job_ttl))
+    except OSError as e:
+        error_exit(f"Unable to start server: {e.strerror or e}.")
+
+
+def topsis_sensitivity(args):
+    if args.samples < 1:
+        error_exit("--samples must be a positive integer.")
+    if args.memory_budget < 1:
+        error_exit("--memory-budget must be a positive integer.")
+
+    df, data = read_input(args.input_file)
+    weights, impacts = parse_weights_impacts(args.weights, args.impacts, data.shape[1])
+    names, columns = input_labels(df)
+
+    try:
+        stability = sensitivity.monte_carlo(data, impacts, args.samples, seed=args.seed,
+                                            center=weights if args.concentration else None,
+                                            concentration=args.concentration,
+                                            memory_budget=args.memory_budget * 2 ** 20)
+        thresholds = sensitivity.critical_weights(data, weights, impacts, factor=args.factor)
+    except TopsisError as e:
+        error_exit(str(e))
+
+    around = f"around the weights (concentration {args.concentration:g})" if args.concentration else "uniformly"
+    print(f"Rank-1 probability over {args.samples} weight vectors sampled {around}:")
+    order = np.argsort(-stability.rank1_probability, kind="stable")[:args.top]
+    for i in order:
+        if stability.rank1_probability[i] > 0:
+            print(f"  {names[i]}: {stability.rank1_probability[i]:.2%}")
+
+    print(f"\nCritical weights (rank 1 is {names[thresholds[0].best]} at the given weights):")
+    for t in thresholds:
+        changes = []
+        if t.lower is not None:
+            changes.append(f"{names[t.lower_best]} below {t.lower:.6g}")
+        if t.upper is not None:
+            changes.append(f"{names[t.upper_best]} above {t.upper:.6g}")
+        if not changes:
+            changes.append(f"no change between {t.weight / args.factor:.6g} and {t.weight * args.factor:.6g}")
+        print(f"  {columns[t.criterion + 1]} (weight {t.weight:g}): {', '.join(changes)}")
+
+
+def topsis_batch(args):
+    try:
+        if args.glob is not None:
+            batch_jobs = batch.glob_jobs(args.glob, args.weights, args.impacts, args.output_dir, top_k=args.top_k,
+                                         normalization=args.normalization, distance=args.distance)
+            os.makedirs(args.output_dir, exist_ok=True)
+        else:
+            batch_jobs = batch.read_manifest(args.manifest, weights=args.weights, impacts=args.impacts, top_k=args.top_k,
+                                             normalization=args.normalization, distance=args.distance)
+    except TopsisError as e:
+        error_exit(str(e))
+    except OSError as e:
+        error_exit(f"Unable to create output directory: {e.strerror or e}.")
+
+    def report(result):
+        if result.ok and not args.quiet:
+            print(f"OK    {result.job.input} -> {result.job.output} ({result.rows} rows, "
+                  f"{result.seconds * 1000:.1f} ms)")
+        elif not result.ok:
+            print(f"FAIL  {result.job.input}: {result.error}")
+
+    summary = batch.run_batch(batch_jobs, workers=args.workers, dtype=args.dtype, report=report)
+
+    rates = ""
+    if summary["jobs_per_s"] is not None:
+        rates = (f" ({summary['jobs_per_s']:.1f} jobs/s, {summary['rows_per_s']:,.0f} rows/s, "
+                 f"{summary['mb_per_s']:.1f} MB/s read)")
+    print(f"\nBatch: {summary['succeeded']} of {summary['jobs']} jobs succeeded, {summary['failed']} failed, "
+          f"{summary['rows']:,} rows in {summary['seconds']:.2f} s with {summary['workers']} worker(s){rates}")
+
+    if args.summary is not None:
+        try:
+            with open(args.summary, "w") as f:
+                json.dump(summary, f, indent=2)
+        except OSError:
+            error_exit("Unable to write summary file.")
+    if summary["failed"]:
+        sys.exit(1)
+
+
+def topsis_group(args):
+    # check comma separated; values are validated once the criteria are known
+    if "," not in args.weights or "," not in args.impacts:
+        error_exit("Impacts and weights must be separated by ',' (comma).")
+    weights = [w.strip() for w in args.weights.split(",")]
+    impacts = [i.strip() for i in args.impacts.split(",")]
+
+    try:
+        ranker = group.GroupRanker(weights, impacts, args.aggregate, args.level, args.normalization, args.distance,
+                                   memory_budget=args.memory_budget * 2 ** 20)
+        if args.evaluator_column is not None:
+            names, columns = group.feed(ranker, group.iter_long(args.input_files[0], args.evaluator_column,
+                                                                args.chunksize))
+        elif args.input_files[0].endswith(".npy"):
+            ranker.add(group.load_stack(args.input_files[0]))
+            names = np.arange(1, ranker.shape[0] + 1)
+            columns = ["Alternative"] + [f"C{j + 1}" for j in range(ranker.shape[1])]
+        else:
+            criteria = None
+            if args.criteria is not None:
+                criteria = [c.strip() for c in args.criteria.split(",") if c.strip()]
+            names, columns = group.feed(ranker, group.iter_files(args.input_files, criteria))
+        scores, ranks = ranker.result()
+    except TopsisError as e:
+        error_exit(str(e))
+
+    # the aggregated matrix is what was ranked at the matrix level, so it is written too
+    df = pd.DataFrame({columns[0]: names})
+    if args.level == "matrix":
+        df[columns[1:]] = ranker.matrix()
+    write_result(df, scores, ranks, args.output_file)
+
+    print(f"Success: group TOPSIS result of {ranker.n_evaluators} evaluator(s) saved to '{args.output_file}'")
+
+
+def dispatch(args, criteria):
+    if args.chunksize is not None:
+        if is_binary(args.input_file) or detect_format(args.input_file) != CSV or \
+                detect_format(args.output_file) != CSV or criteria is not None:
+            error_exit("--chunksize only applies to CSV input and output without --criteria.")
+        if args.chunksize < 1:
+            error_exit("--chunksize must be a positive integer.")
+        if args.memory_budget < 1:
+            error_exit("--memory-budget must be a positive integer.")
+        if args.normalization != "vector" or args.distance != "euclidean":
+            error_exit("--chunksize only supports vector normalization and euclidean distance.")
+        topsis_chunked(args.input_file, args.weights, args.impacts, args.output_file, args.chunksize,
+                       memory_budget=args.memory_budget * 2 ** 20, top_k=args.top_k)
+    else:
+        topsis(args.input_file, args.weights, args.impacts, args.output_file, top_k=args.top_k, workers=args.jobs,
+               criteria=criteria, dtype=args.dtype, normalization=args.normalization, distance=args.distance)
+
@@ -0,0 +1,179 @@
+"""
+Warm process for repeated CLI calls.
+
+Every `topsis` call starts a fresh interpreter and loads NumPy and pandas
+before it reads a byte. `topsis --daemon` loads them once and listens on a
+Unix socket; with TOPSIS_SOCKET pointing at it, later calls send their
+arguments and working directory there instead. The daemon forks a child per
+call, which runs the command and streams its output back, so a call costs a
+fork plus the computation. When nothing answers on the socket the call runs
+locally as usual.
+
+    topsis --daemon --socket /tmp/topsis.sock &
+    export TOPSIS_SOCKET=/tmp/topsis.sock
+    topsis data.csv "1,1,1,2" "+,+,-,+" result.csv   # served by the daemon
+
+Calls run with the daemon's environment. The socket is created with mode
+0600, so only the user who started the daemon can connect. POSIX only.
+
+This module only imports the standard library, so the client side adds
+nothing to CLI startup.
+"""
+
+import errno
+import importlib
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+
+SOCKET_ENV = "TOPSIS_SOCKET"
+
+# optional modules the commands import on first use; loaded up front so that
+# forked children do not pay for them on every call
+PRELOAD = ("pyarrow", "pyarrow.csv", "pyarrow.parquet", "pyarrow.feather")
+
+
+def default_path():
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), f"topsis-{os.getuid()}.sock")
+
+
+def _send(f, message):
+    f.write(json.dumps(message).encode() + b"\n")
+    f.flush()
+
+
+class _Relay(io.TextIOBase):
+    """Text stream that sends every write to the client as one message."""
+
+    def __init__(self, f, key):
+        self._f = f
+        self._key = key
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if text:
+            _send(self._f, {self._key: text})
+        return len(text)
+
+
+def _handle(conn, run):
+    """Run one call (in the forked child) and report its exit code."""
+    f = conn.makefile("rwb")
+    line = f.readline()
+    if not line:
+        # a probe from listen(), or a client that went away
+        return
+    code = 1
+    try:
+        request = json.loads(line)
+        sys.stdout, sys.stderr = _Relay(f, "out"), _Relay(f, "err")
+        os.chdir(request["cwd"])
+        run(request["argv"])
+        code = 0
+    except SystemExit as e:
+        code = e.code
+        if code is None:
+            code = 0
+        elif not isinstance(code, int):
+            print(code, file=sys.stderr)
+            code = 1
+    except Exception:
+        traceback.print_exc()
+    try:
+        _send(f, {"exit": code})
+    except OSError:
+        pass
+
+
+def _listening(path):
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def listen(path):
+    """Bind the daemon socket at path (mode 0600) and return it."""
+    if os.path.exists(path):
+        if _listening(path):
+            raise OSError(errno.EADDRINUSE, f"a daemon is already listening on {path}")
+        # left behind by a daemon that did not shut down cleanly
+        os.remove(path)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(umask)
+    listener.listen(128)
+    return listener
+
+
+def serve(listener, run):
+    """Run each call on listener as run(argv) in a forked child, until interrupted or terminated."""
+    path = listener.getsockname()
+    for name in PRELOAD:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+    # let the kernel reap finished children; stop cleanly on SIGTERM
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        while True:
+            conn, _ = listener.accept()
+            if os.fork() == 0:
+                listener.close()
+                for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGCHLD):
+                    signal.signal(signum, signal.SIG_DFL)
+                try:
+                    _handle(conn, run)
+                finally:
+                    os._exit(0)
+            conn.close()
+    finally:
+        listener.close()
+        os.remove(path)
+
+
+def forward(path, argv):
+    """
+    Run a CLI call on the daemon listening on path, relaying its output.
+    Returns the exit code, or None when no daemon answers there.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+
+    with sock, sock.makefile("rwb") as f:
+        _send(f, {"argv": argv, "cwd": os.getcwd()})
+        for line in f:
+            message = json.loads(line)
+            if "exit" in message:
+                return message["exit"]
+            if "out" in message:
+                sys.stdout.write(message["out"])
+            else:
+                sys.stderr.write(message["err"])
+
+    print("Error: The daemon closed the connection before the command finished.")
+    return 1
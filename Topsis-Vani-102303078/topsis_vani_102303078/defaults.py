@@ -0,0 +1,39 @@
+"""
+Defaults shown by the command line interface.
+
+This module imports nothing, so `topsis --help`, argument errors and the
+daemon client can build their parsers without loading NumPy or pandas. The
+modules that use these values import them from here.
+"""
+
+# rows parsed at a time when streaming or converting a CSV file (stream.py)
+DEFAULT_CHUNKSIZE = 100_000
+
+# memory for the external ranking stage in streaming mode (ranking.py)
+RANKING_MEMORY_BUDGET = 256 * 2 ** 20
+
+# per-chunk memory of sensitivity.py; larger chunks gain nothing once the
+# products are out of cache
+SENSITIVITY_MEMORY_BUDGET = 32 * 2 ** 20
+
+# working precisions for score()/rank()/top_k(); float64 is the default
+DTYPES = ("float32", "float64")
+
+# built-in normalization and distance kernels (engine.NORMALIZATIONS and
+# engine.DISTANCES); the first of each is classic TOPSIS and the default
+NORMALIZATIONS = ("vector", "sum", "minmax")
+DISTANCES = ("euclidean", "manhattan", "chebyshev", "lp:<p>")
+
+# evaluator chunks of group TOPSIS (group.py)
+GROUP_MEMORY_BUDGET = 64 * 2 ** 20
+GROUP_AGGREGATES = ("mean", "geometric", "borda")
+GROUP_LEVELS = ("scores", "matrix")
+
+# HTTP service (server.py)
+DEFAULT_PORT = 8080
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_MAX_BODY = 16 * 2 ** 20
+DEFAULT_KEEPALIVE = 15
+
+# how long finished job results are kept, in seconds (jobs.py)
+JOB_TTL = 3600
@@ -0,0 +1,580 @@
+"""
+In-memory TOPSIS engine.
+
+Works directly on NumPy arrays, never touches the filesystem and raises
+TopsisError subclasses instead of exiting, so it can be called repeatedly
+from inside a long-running process. The CLI and the web service are thin
+wrappers around rank().
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from .defaults import DTYPES
+from .profiling import stage
+
+# Row block size for the blockwise reductions. Fixed, so that results do not
+# depend on the number of workers.
+BLOCK_ROWS = 65536
+
+# bound on |float32 score - float64 score|; closeness is in 0..1, so this is a
+# few float32 ulps near 1 (1.1e-7 was the worst seen on 2e6 random rows)
+SCORE_TOLERANCE_FLOAT32 = 5e-7
+
+
+class TopsisError(ValueError):
+    """Base class for all TOPSIS input and computation errors."""
+
+
+class InputError(TopsisError):
+    """The decision matrix is malformed."""
+
+
+class ParameterError(TopsisError):
+    """Weights or impacts are malformed."""
+
+
+class NormalizationError(TopsisError):
+    """A criteria column cannot be normalized."""
+
+
+class OutputError(TopsisError):
+    """A result could not be written."""
+
+
+def parse_weights(weights_str, n_cols):
+    """Parse a comma separated weights string into a float64 vector."""
+    if "," not in weights_str:
+        raise ParameterError("Impacts and weights must be separated by ',' (comma).")
+
+    try:
+        weights = [float(x.strip()) for x in weights_str.split(",")]
+    except ValueError:
+        raise ParameterError("Weights must be numeric and comma separated.")
+
+    return as_weights(weights, n_cols)
+
+
+def parse_impacts(impacts_str, n_cols):
+    """Parse a comma separated impacts string into a +1/-1 sign vector."""
+    if "," not in impacts_str:
+        raise ParameterError("Impacts and weights must be separated by ',' (comma).")
+
+    return as_impacts([x.strip() for x in impacts_str.split(",")], n_cols)
+
+
+def as_dtype(dtype):
+    """Validate a working precision (None means float64) and return it as a NumPy dtype."""
+    if dtype is None:
+        return np.dtype(np.float64)
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        dtype = None
+    if dtype is None or dtype.name not in DTYPES:
+        raise ParameterError(f"dtype must be one of: {', '.join(DTYPES)}.")
+    return dtype
+
+
+def as_matrix(matrix, dtype=None):
+    """Return the decision matrix as a contiguous 2-D array (float64 unless dtype says otherwise)."""
+    dtype = as_dtype(dtype)
+    try:
+        matrix = np.ascontiguousarray(matrix, dtype=dtype)
+    except (TypeError, ValueError):
+        raise InputError("From 2nd to last columns must contain numeric values only.")
+
+    if matrix.ndim != 2:
+        raise InputError("Decision matrix must be two dimensional (alternatives x criteria).")
+    if matrix.shape[1] < 2:
+        raise InputError("Input file must contain three or more columns.")
+    if matrix.shape[0] < 1:
+        raise InputError("Input file contains no alternatives.")
+    if not np.isfinite(matrix).all():
+        raise InputError("From 2nd to last columns must contain numeric values only.")
+
+    return matrix
+
+
+def as_weights(weights, n_cols):
+    """Validate a weights sequence and return it as a float64 vector."""
+    try:
+        weights = np.asarray(weights, dtype=np.float64).reshape(-1)
+    except (TypeError, ValueError):
+        raise ParameterError("Weights must be numeric and comma separated.")
+
+    if weights.shape[0] != n_cols:
+        raise ParameterError("Number of weights must be equal to number of columns (from 2nd to last).")
+    if not np.isfinite(weights).all() or (weights <= 0).any():
+        raise ParameterError("Weights must be positive numbers.")
+
+    return weights
+
+
+def as_impacts(impacts, n_cols):
+    """
+    Validate impacts and return them as a float64 vector of +1 (benefit)
+    and -1 (cost). Accepts '+'/'-' strings or numeric signs.
+    """
+    signs = []
+    for imp in impacts:
+        if imp in ("+", 1):
+            signs.append(1.0)
+        elif imp in ("-", -1):
+            signs.append(-1.0)
+        else:
+            raise ParameterError("Impacts must be either '+' or '-' only.")
+
+    if len(signs) != n_cols:
+        raise ParameterError("Number of impacts must be equal to number of columns (from 2nd to last).")
+
+    return np.array(signs, dtype=np.float64)
+
+
+def row_blocks(n_rows, block_rows=BLOCK_ROWS):
+    """Consecutive row slices covering n_rows rows."""
+    return [slice(start, min(start + block_rows, n_rows)) for start in range(0, n_rows, block_rows)]
+
+
+@contextmanager
+def worker_pool(workers):
+    """
+    Yield a map function running over a thread pool of the given size, or the
+    builtin map when workers is None or 1. NumPy releases the GIL inside the
+    kernels used here, so threads share the matrix without copying it.
+    """
+    if workers is None or workers == 1:
+        yield map
+        return
+    if workers < 1:
+        raise ParameterError("workers must be a positive integer.")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield pool.map
+
+
+def column_norms(matrix, pmap=map):
+    """
+    Euclidean norm of every criteria column (vector normalization denominators).
+
+    Sums of squares are reduced per BLOCK_ROWS block and the partial sums are
+    added in block order, so the result is bit-for-bit the same for any pmap.
+    The sums are always accumulated in float64: a float32 matrix is squared
+    block by block with a float64 accumulator, which keeps its norms as
+    accurate as the data rather than losing digits to a long float32 sum.
+    """
+    def block_sumsq(rows):
+        block = matrix[rows]
+        if block.dtype == np.float64:
+            return np.einsum("ij,ij->j", block, block)
+        return np.einsum("ij,ij->j", block, block, dtype=np.float64)
+
+    sumsq = np.zeros(matrix.shape[1])
+    for partial in pmap(block_sumsq, row_blocks(matrix.shape[0])):
+        sumsq += partial
+
+    norms = np.sqrt(sumsq)
+    if (norms == 0).any():
+        raise NormalizationError("Normalization error: one or more criteria columns have all zeros.")
+    return norms
+
+
+def column_sums(matrix, pmap=map):
+    """Sum of every criteria column (sum normalization denominators), reduced like column_norms()."""
+    def block_sum(rows):
+        return matrix[rows].sum(axis=0, dtype=np.float64)
+
+    sums = np.zeros(matrix.shape[1])
+    for partial in pmap(block_sum, row_blocks(matrix.shape[0])):
+        sums += partial
+
+    if (sums <= 0).any():
+        raise NormalizationError("Normalization error: sum normalization needs criteria columns with a positive sum.")
+    return sums
+
+
+def column_ranges(matrix, pmap=map):
+    """Max - min of every criteria column (min-max normalization denominators)."""
+    def block_extremes(rows):
+        block = matrix[rows]
+        return block.max(axis=0), block.min(axis=0)
+
+    extremes = list(pmap(block_extremes, row_blocks(matrix.shape[0])))
+    col_max = np.max([hi for hi, _ in extremes], axis=0).astype(np.float64)
+    col_min = np.min([lo for _, lo in extremes], axis=0).astype(np.float64)
+
+    ranges = col_max - col_min
+    if (ranges == 0).any():
+        raise NormalizationError("Normalization error: one or more criteria columns have a single value.")
+    return ranges
+
+
+def euclidean(diff):
+    return np.sqrt(np.einsum("ij,ij->i", diff, diff))
+
+
+def manhattan(diff):
+    # einsum row sums are several times faster than sum(axis=1) over a few columns
+    return np.einsum("ij->i", np.abs(diff, out=diff))
+
+
+def chebyshev(diff):
+    return np.abs(diff, out=diff).max(axis=1)
+
+
+def lp_distance(p):
+    """
+    Distance kernel for the L^p (Minkowski) metric, p >= 1. It is taken over
+    weighted values, so criterion j counts with weight w_j ** p.
+    """
+    if not np.isfinite(p) or p < 1:
+        raise ParameterError("The lp distance needs a finite p >= 1, e.g. 'lp:3'.")
+
+    def lp(diff):
+        np.abs(diff, out=diff)
+        np.power(diff, p, out=diff)
+        return np.power(np.einsum("ij->i", diff), 1 / p)
+    return lp
+
+
+# Normalization kernels map the matrix (and a pmap, see worker_pool) to one
+# positive float64 denominator per criterion; the matrix is normalized as
+# matrix / denominators. Min-max normalization also subtracts the column
+# minimum, but every TOPSIS distance is a difference between a row and an
+# ideal point, in which that offset cancels, so only the range is needed.
+NORMALIZATIONS = {
+    "vector": column_norms,
+    "sum": column_sums,
+    "minmax": column_ranges,
+}
+
+# Distance kernels map an (alternatives x criteria) block of differences from
+# an ideal point to one new array of distances per row. They may overwrite
+# the block.
+DISTANCES = {
+    "euclidean": euclidean,
+    "manhattan": manhattan,
+    "chebyshev": chebyshev,
+}
+
+
+def register_normalization(name, kernel):
+    """Make kernel(matrix, pmap) -> denominators selectable as normalization=name."""
+    if not isinstance(name, str) or not callable(kernel):
+        raise ParameterError("A normalization needs a name and a callable kernel.")
+    NORMALIZATIONS[name] = kernel
+
+
+def register_distance(name, kernel):
+    """Make kernel(diff) -> row distances selectable as distance=name."""
+    if not isinstance(name, str) or not callable(kernel):
+        raise ParameterError("A distance needs a name and a callable kernel.")
+    DISTANCES[name] = kernel
+
+
+def normalization_kernel(normalization):
+    """The kernel for a registered normalization name, or normalization itself if it is callable."""
+    if callable(normalization):
+        return normalization
+    try:
+        return NORMALIZATIONS[normalization]
+    except (KeyError, TypeError):
+        raise ParameterError(f"normalization must be one of: {', '.join(NORMALIZATIONS)}.")
+
+
+def distance_kernel(distance):
+    """
+    The kernel for a registered distance name, 'lp:<p>' for lp_distance(p), or
+    distance itself if it is callable.
+    """
+    if callable(distance):
+        return distance
+    if isinstance(distance, str) and distance.startswith("lp:"):
+        try:
+            p = float(distance[3:])
+        except ValueError:
+            raise ParameterError("The lp distance needs a finite p >= 1, e.g. 'lp:3'.")
+        return lp_distance(p)
+    try:
+        return DISTANCES[distance]
+    except (KeyError, TypeError):
+        raise ParameterError(f"distance must be one of: {', '.join(DISTANCES)}, lp:<p>.")
+
+
+def denominators(matrix, normalization="vector", pmap=map, cache=None):
+    """
+    Normalization denominators of matrix (see NORMALIZATIONS), from cache when
+    one is given and normalization is a registered name.
+    """
+    kernel = normalization_kernel(normalization)
+    if cache is not None and not callable(normalization):
+        denoms = cache.norms(matrix, pmap, normalization)
+    else:
+        denoms = np.asarray(kernel(matrix, pmap), dtype=np.float64)
+    if denoms.shape != (matrix.shape[1],) or not (denoms > 0).all():
+        raise NormalizationError("Normalization error: the kernel must return one positive value per criterion.")
+    return denoms
+
+
+def ideal_points(weighted, signs):
+    """Return (ideal_best, ideal_worst) of a weighted normalized matrix."""
+    col_max = weighted.max(axis=0)
+    col_min = weighted.min(axis=0)
+    ideal_best = np.where(signs > 0, col_max, col_min)
+    ideal_worst = np.where(signs > 0, col_min, col_max)
+    return ideal_best, ideal_worst
+
+
+def closeness(weighted, ideal_best, ideal_worst, out=None, distance=euclidean):
+    """
+    Relative closeness of every row to the ideal solution (written to out if
+    given), measured with a distance kernel.
+    """
+    diff = weighted - ideal_best
+    dist_best = distance(diff)
+    np.subtract(weighted, ideal_worst, out=diff)
+    dist_worst = distance(diff)
+
+    total = dist_best + dist_worst
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = np.divide(dist_worst, total, out=out)
+    # every alternative identical: all are equally close to both ideals
+    scores[total == 0] = 0.5
+    return scores
+
+
+def dense_rank(scores):
+    """
+    Dense ranks (1 = highest score) along the last axis, matching pandas
+    rank(ascending=False, method='dense').
+    """
+    scores = np.asarray(scores)
+    order = np.argsort(-scores, axis=-1, kind="stable")
+    ordered = np.take_along_axis(scores, order, axis=-1)
+
+    # a new rank starts wherever the sorted score changes
+    step = np.ones(ordered.shape, dtype=np.int64)
+    step[..., 1:] = ordered[..., 1:] != ordered[..., :-1]
+
+    ranks = np.empty(scores.shape, dtype=np.int64)
+    np.put_along_axis(ranks, order, np.cumsum(step, axis=-1), axis=-1)
+    return ranks
+
+
+def as_out(out, n_rows, dtype):
+    """Validate a caller-provided scores buffer."""
+    if not isinstance(out, np.ndarray) or out.shape != (n_rows,) or out.dtype != dtype:
+        raise ParameterError(f"out must be a {dtype.name} array of shape ({n_rows},).")
+    return out
+
+
+def score(matrix, weights, impacts, workers=None, cache=None, dtype=None, out=None, overwrite=False,
+          normalization="vector", distance="euclidean"):
+    """
+    Return the TOPSIS closeness score (0..1) of every alternative.
+
+    With workers > 1, row blocks are scored on a thread pool. The result is
+    bit-for-bit identical to the serial path. With a cache.NormCache, the
+    column norms of a matrix seen before are reused.
+
+    dtype='float32' halves the memory and bandwidth of the matrix, the
+    weighted copy and the scores (which come back as float32). Column norms
+    are still summed in float64. Scores then agree with float64 to within
+    SCORE_TOLERANCE_FLOAT32, so two alternatives only swap places when their
+    float64 scores are closer than that. Nearly equal scores can also round
+    to a tie, which lowers the dense rank numbers after it, so keep float64
+    where exact rank numbers over many alternatives matter.
+
+    The only full-size temporary is the weighted matrix; distances are
+    accumulated per row block. overwrite=True weights the matrix in place
+    instead (when it is writeable and already has the working dtype), so scoring
+    allocates nothing but the scores, and out= takes a preallocated scores
+    buffer. Only pass overwrite=True for a matrix that is not needed
+    afterwards: it holds the weighted normalized values on return.
+
+    normalization ('vector', 'sum', 'minmax') and distance ('euclidean',
+    'manhattan', 'chebyshev', 'lp:<p>') pick kernels from NORMALIZATIONS and
+    DISTANCES, or may be kernels themselves. The defaults are classic TOPSIS.
+    """
+    with stage("validate"):
+        matrix = as_matrix(matrix, dtype)
+        n_criteria = matrix.shape[1]
+        weights = as_weights(weights, n_criteria)
+        signs = as_impacts(impacts, n_criteria)
+        measure = distance_kernel(distance)
+    n_rows = matrix.shape[0]
+    blocks = row_blocks(n_rows)
+
+    with worker_pool(workers) as pmap:
+        # Step 1 & 2: normalization and weighting in one scaling
+        with stage("normalize", rows=n_rows):
+            norms = denominators(matrix, normalization, pmap, cache)
+            scale = (weights / norms).astype(matrix.dtype)
+        weighted = matrix if overwrite and matrix.flags.writeable else np.empty_like(matrix)
+
+        def block_extremes(rows):
+            np.multiply(matrix[rows], scale, out=weighted[rows])
+            return weighted[rows].max(axis=0), weighted[rows].min(axis=0)
+
+        # Step 3: ideal best and ideal worst (column extremes come with the weighting)
+        with stage("weight", rows=n_rows):
+            extremes = list(pmap(block_extremes, blocks))
+        with stage("ideal", rows=n_rows):
+            col_max = np.max([hi for hi, _ in extremes], axis=0)
+            col_min = np.min([lo for _, lo in extremes], axis=0)
+            ideal_best = np.where(signs > 0, col_max, col_min)
+            ideal_worst = np.where(signs > 0, col_min, col_max)
+
+        # Step 4 & 5: distances and closeness
+        scores = np.empty(n_rows, dtype=matrix.dtype) if out is None else as_out(out, n_rows, matrix.dtype)
+
+        def block_scores(rows):
+            closeness(weighted[rows], ideal_best, ideal_worst, out=scores[rows], distance=measure)
+
+        with stage("distance", rows=n_rows):
+            for _ in pmap(block_scores, blocks):
+                pass
+
+    return scores
+
+
+def rank(matrix, weights, impacts, workers=None, cache=None, dtype=None, out=None, overwrite=False,
+         normalization="vector", distance="euclidean"):
+    """
+    Run TOPSIS on an (alternatives x criteria) matrix.
+
+    Returns (scores, ranks): closeness scores in 0..1 and dense integer
+    ranks where 1 is the best alternative. See score() for workers, cache,
+    dtype, out, overwrite, normalization and distance.
+    """
+    scores = score(matrix, weights, impacts, workers, cache, dtype, out, overwrite, normalization, distance)
+    with stage("rank", rows=scores.shape[0]):
+        ranks = dense_rank(scores)
+    return scores, ranks
+
+
+def best_first(scores, rows):
+    """Indices ordering (scores, rows) best first; ties go to the earlier row."""
+    return np.lexsort((rows, -scores))
+
+
+def select_top_k(scores, k):
+    """
+    Indices of the k highest scores, best first, in O(n) time plus
+    O(k log k) for ordering the selection. Ties go to the earlier row.
+    """
+    n = scores.shape[0]
+    if k < 1:
+        raise ParameterError("top_k must be a positive integer.")
+
+    if k < n:
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - above.shape[0]]
+        idx = np.concatenate([above, ties])
+    else:
+        idx = np.arange(n)
+
+    return idx[best_first(scores[idx], idx)]
+
+
+def top_k(matrix, weights, impacts, k, workers=None, cache=None, dtype=None, overwrite=False,
+          normalization="vector", distance="euclidean"):
+    """
+    Return (rows, scores, ranks) for the k best alternatives only, best first.
+
+    Uses partial selection instead of a full sort. The dense ranks are the
+    same as rank() gives those rows, since a row's dense rank only depends on
+    the scores above it.
+    """
+    scores = score(matrix, weights, impacts, workers, cache, dtype, overwrite=overwrite,
+                   normalization=normalization, distance=distance)
+    with stage("rank", rows=scores.shape[0]):
+        rows = select_top_k(scores, k)
+        top = scores[rows]
+        ranks = dense_rank(top)
+    return rows, top, ranks
+
+
+def as_weight_stack(weights, n_cols):
+    """Validate a (K x criteria) stack of weight vectors."""
+    try:
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    except (TypeError, ValueError):
+        raise ParameterError("Weights must be numeric and comma separated.")
+
+    if weights.ndim != 2 or weights.shape[1] != n_cols:
+        raise ParameterError("Number of weights must be equal to number of columns (from 2nd to last).")
+    if not np.isfinite(weights).all() or (weights <= 0).any():
+        raise ParameterError("Weights must be positive numbers.")
+
+    return weights
+
+
+def as_impact_stack(impacts, n_scenarios, n_cols):
+    """
+    Validate impacts for a batch: either one impacts vector shared by every
+    scenario or a (K x criteria) stack. Returns a (K x criteria) sign array.
+    """
+    impacts = np.asarray(impacts)
+    if impacts.ndim == 1:
+        signs = as_impacts(impacts.tolist(), n_cols)
+        return np.broadcast_to(signs, (n_scenarios, n_cols))
+
+    if impacts.ndim != 2 or impacts.shape[0] != n_scenarios:
+        raise ParameterError("Number of impact vectors must be equal to number of weight vectors.")
+
+    return np.stack([as_impacts(row.tolist(), n_cols) for row in impacts])
+
+
+def rank_batch(matrix, weights, impacts, chunk_size=64, cache=None):
+    """
+    Score K weight/impact scenarios against one decision matrix.
+
+    weights is a (K x criteria) stack and impacts is either one shared
+    impacts vector or a (K x criteria) stack. Column norms are computed once;
+    scenarios are then evaluated chunk_size at a time with broadcasting, so
+    peak memory is about chunk_size * matrix.nbytes.
+
+    Returns (scores, ranks), both of shape (K x alternatives). Each row is
+    identical to what rank() returns for that scenario.
+    """
+    matrix = as_matrix(matrix)
+    n_criteria = matrix.shape[1]
+    weights = as_weight_stack(weights, n_criteria)
+    n_scenarios = weights.shape[0]
+    signs = as_impact_stack(impacts, n_scenarios, n_criteria)
+
+    if chunk_size < 1:
+        raise ParameterError("chunk_size must be a positive integer.")
+
+    norms = column_norms(matrix) if cache is None else cache.norms(matrix)
+    scale = weights / norms
+
+    scores = np.empty((n_scenarios, matrix.shape[0]), dtype=np.float64)
+    for start in range(0, n_scenarios, chunk_size):
+        stop = min(start + chunk_size, n_scenarios)
+
+        # (k x n x m) weighted normalized matrices for this chunk
+        weighted = matrix[np.newaxis, :, :] * scale[start:stop, np.newaxis, :]
+
+        col_max = weighted.max(axis=1)
+        col_min = weighted.min(axis=1)
+        positive = signs[start:stop] > 0
+        ideal_best = np.where(positive, col_max, col_min)[:, np.newaxis, :]
+        ideal_worst = np.where(positive, col_min, col_max)[:, np.newaxis, :]
+
+        diff = weighted - ideal_best
+        dist_best = np.sqrt(np.einsum("kij,kij->ki", diff, diff))
+        np.subtract(weighted, ideal_worst, out=diff)
+        dist_worst = np.sqrt(np.einsum("kij,kij->ki", diff, diff))
+
+        total = dist_best + dist_worst
+        with np.errstate(invalid="ignore", divide="ignore"):
+            chunk = dist_worst / total
+        chunk[total == 0] = 0.5
+        scores[start:stop] = chunk
+
+    return scores, dense_rank(scores)
@@ -0,0 +1,122 @@
+"""
+Reading input files and writing results, for the CLI and the library alike.
+
+load_input() returns (df, data): data is the C-contiguous criteria matrix the
+engine scores, and df is whatever the file was read into (a DataFrame, a
+pyarrow.Table or, for a binary matrix, the BinaryMatrix itself), used only
+for the names and for output by save_result().
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .binary import BinaryMatrix, is_binary, open_matrix
+from .defaults import DEFAULT_CHUNKSIZE
+from .engine import InputError, OutputError
+from .formats import CSV, detect_format, read_table, write_table
+from .loader import load_csv
+from .profiling import stage
+
+
+def read_binary(input_file, criteria=None):
+    # scoring runs on the memmap and save_result writes straight from it, so
+    # the matrix is never copied into a frame
+    matrix = open_matrix(input_file)
+    if criteria is None:
+        return matrix, matrix.data
+
+    # the same rules as load_csv(usecols=...); only the chosen columns are copied
+    missing = [c for c in criteria if c not in matrix.columns]
+    if missing:
+        raise InputError(f"Criteria columns not found: {', '.join(missing)}.")
+    criteria = [c for c in criteria if c != matrix.columns[0]]
+    if len(criteria) < 2:
+        raise InputError("Input file must contain three or more columns.")
+    if criteria != matrix.columns[1:]:
+        index = [matrix.columns.index(c) - 1 for c in criteria]
+        data = np.ascontiguousarray(matrix.data[:, index])
+        # written out by save_result, so not to be weighted in place
+        data.flags.writeable = False
+        matrix = BinaryMatrix([matrix.columns[0]] + criteria, matrix.names, data)
+    return matrix, matrix.data
+
+
+def load_input(input_file, criteria=None, dtype=None):
+    """(df, data) of a CSV, Parquet, Feather or binary matrix file; raises TopsisError."""
+    # File check
+    if not os.path.exists(input_file):
+        raise InputError("File not found.")
+
+    if is_binary(input_file):
+        return read_binary(input_file, criteria)
+
+    if detect_format(input_file) != CSV:
+        return read_table(input_file, criteria=criteria, dtype=dtype)
+
+    with stage("parse"):
+        return load_csv(input_file, usecols=criteria, dtype=dtype)
+
+
+def input_labels(df):
+    """(names, columns) of the df returned by load_input."""
+    if isinstance(df, BinaryMatrix):
+        return np.asarray(df.names, dtype=str), list(df.columns)
+    if isinstance(df, pd.DataFrame):
+        return df.iloc[:, 0].astype(str).to_numpy(), list(df.columns)
+    # a pyarrow.Table when the input was Parquet or Feather
+    return df.column(0).to_pandas().astype(str).to_numpy(), list(df.column_names)
+
+
+def binary_frame(matrix, index=slice(None)):
+    """Frame of the rows of a BinaryMatrix selected by index (a slice or row numbers)."""
+    df = pd.DataFrame(matrix.data[index], columns=matrix.columns[1:])
+    df.insert(0, matrix.columns[0], np.asarray(matrix.names, dtype=object)[index])
+    return df
+
+
+def save_result(df, scores, ranks, output_file, rows=None):
+    """Write the input columns plus score and rank; raises TopsisError."""
+    with stage("write", rows=len(scores)):
+        if isinstance(df, BinaryMatrix):
+            save_binary_result(df, scores, ranks, output_file, rows)
+            return
+
+        # df may be a pyarrow.Table when the input was Parquet or Feather
+        if detect_format(output_file) != CSV:
+            write_table(df, scores, ranks, output_file, rows=rows)
+            return
+
+        if not isinstance(df, pd.DataFrame):
+            df = df.to_pandas()
+
+        # rows: only write these rows, in this order (top-k mode); the frame is
+        # not used after writing, so the result columns are added to it directly
+        result = df if rows is None else df.iloc[rows].reset_index(drop=True)
+        result["Topsis Score"] = np.round(scores * 100, 2)  # like sample output
+        result["Rank"] = ranks
+
+        try:
+            result.to_csv(output_file, index=False)
+        except Exception:
+            raise OutputError("Unable to write output file.")
+
+
+def save_binary_result(matrix, scores, ranks, output_file, rows=None, chunksize=DEFAULT_CHUNKSIZE):
+    # only the rows being written are copied out of the memmap: all of them
+    # for Parquet and Feather, chunksize at a time for CSV
+    if detect_format(output_file) != CSV:
+        write_table(binary_frame(matrix, slice(None) if rows is None else rows), scores, ranks, output_file)
+        return
+
+    try:
+        with open(output_file, "w", newline="") as out:
+            for start in range(0, max(len(scores), 1), chunksize):
+                stop = start + chunksize
+                df = binary_frame(matrix, slice(start, stop) if rows is None else rows[start:stop])
+                df["Topsis Score"] = np.round(scores[start:stop] * 100, 2)
+                df["Rank"] = ranks[start:stop]
+                df.to_csv(out, index=False, header=start == 0)
+    except OSError:
+        raise OutputError("Unable to write output file.")
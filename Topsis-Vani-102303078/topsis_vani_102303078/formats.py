@@ -0,0 +1,138 @@
+"""
+Apache Parquet and Arrow IPC (Feather) input and output.
+
+These formats are read with pyarrow, which is an optional dependency
+(pip install pyarrow). Only the name column and the criteria columns are
+loaded, and Feather files are memory-mapped. Results are appended to the
+Arrow table as new columns, so the original columns are written back without
+a round-trip through pandas.
+"""
+
+import os
+
+import numpy as np
+
+from .engine import InputError, OutputError, as_dtype
+
+CSV = "csv"
+PARQUET = "parquet"
+FEATHER = "feather"
+
+_EXTENSIONS = {
+    ".csv": CSV,
+    ".parquet": PARQUET,
+    ".pq": PARQUET,
+    ".feather": FEATHER,
+    ".arrow": FEATHER,
+    ".ipc": FEATHER,
+}
+
+
+def detect_format(path):
+    """File format from the extension; anything unknown is treated as CSV."""
+    return _EXTENSIONS.get(os.path.splitext(str(path))[1].lower(), CSV)
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise InputError("Parquet and Feather support requires pyarrow (pip install pyarrow).")
+    return pyarrow
+
+
+def read_schema(path, fmt=None):
+    """Column names of a Parquet or Feather file, without reading any data."""
+    fmt = fmt or detect_format(path)
+    pa = _require_pyarrow()
+    try:
+        if fmt == PARQUET:
+            import pyarrow.parquet as pq
+            return list(pq.read_schema(path).names)
+        with pa.memory_map(path) as source:
+            return list(pa.ipc.open_file(source).schema.names)
+    except (OSError, pa.ArrowException):
+        raise InputError(f"Unable to read input file. Ensure it is a valid {fmt.capitalize()} file.")
+
+
+def read_table(path, fmt=None, criteria=None, dtype=None):
+    """
+    Read a Parquet or Feather file as (table, data): a pyarrow.Table with
+    the name column and the criteria columns, and the criteria matrix
+    (float64 unless dtype is 'float32').
+
+    criteria is an optional list of criteria column names to load; by default
+    every column after the first one is a criterion.
+    """
+    fmt = fmt or detect_format(path)
+    pa = _require_pyarrow()
+    if not os.path.exists(path):
+        raise InputError("File not found.")
+
+    names = read_schema(path, fmt)
+    if criteria is None:
+        columns = names
+    else:
+        missing = [c for c in criteria if c not in names]
+        if missing:
+            raise InputError(f"Criteria columns not found: {', '.join(missing)}.")
+        columns = [names[0]] + [c for c in criteria if c != names[0]]
+
+    if len(columns) < 3:
+        raise InputError("Input file must contain three or more columns.")
+
+    try:
+        if fmt == PARQUET:
+            import pyarrow.parquet as pq
+            table = pq.read_table(path, columns=columns)
+        else:
+            import pyarrow.feather as feather
+            table = feather.read_table(path, columns=columns, memory_map=True)
+    except (OSError, pa.ArrowException):
+        raise InputError(f"Unable to read input file. Ensure it is a valid {fmt.capitalize()} file.")
+
+    return table, table_matrix(table, dtype)
+
+
+def table_matrix(table, dtype=None):
+    """Float64 (or dtype) criteria matrix of a pyarrow.Table (every column after the first)."""
+    pa = _require_pyarrow()
+    if table.num_columns < 3:
+        raise InputError("Input file must contain three or more columns.")
+
+    data = np.empty((table.num_rows, table.num_columns - 1), dtype=as_dtype(dtype))
+    for j, column in enumerate(table.columns[1:]):
+        if not (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)) or column.null_count:
+            raise InputError("From 2nd to last columns must contain numeric values only "
+                             f"(column '{table.column_names[j + 1]}').")
+        data[:, j] = column.to_numpy()
+
+    return data
+
+
+def write_table(table, scores, ranks, path, fmt=None, rows=None):
+    """
+    Append 'Topsis Score' and 'Rank' columns to a pyarrow.Table (or a pandas
+    DataFrame) and write it as Parquet or Feather. rows selects and orders a
+    subset of rows (top-k mode).
+    """
+    fmt = fmt or detect_format(path)
+    pa = _require_pyarrow()
+
+    if not isinstance(table, pa.Table):
+        table = pa.Table.from_pandas(table, preserve_index=False)
+    if rows is not None:
+        table = table.take(pa.array(rows))
+
+    table = table.append_column("Topsis Score", pa.array(np.round(scores * 100, 2)))
+    table = table.append_column("Rank", pa.array(ranks))
+
+    try:
+        if fmt == PARQUET:
+            import pyarrow.parquet as pq
+            pq.write_table(table, path)
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, path)
+    except (OSError, pa.ArrowException):
+        raise OutputError("Unable to write output file.")
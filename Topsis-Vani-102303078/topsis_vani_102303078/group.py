@@ -0,0 +1,334 @@
+"""
+Group TOPSIS: one ranking from many decision makers.
+
+Every evaluator scores the same alternatives on the same criteria, which
+gives an (evaluators x alternatives x criteria) stack. GroupRanker combines
+the evaluators at one of two levels:
+
+    level='scores'   TOPSIS for every evaluator, then the closeness scores
+                     are averaged (mean, geometric) or the rankings are
+                     (borda: the share of other alternatives ranked below)
+    level='matrix'   the matrices are averaged cell by cell (mean,
+                     geometric), then TOPSIS runs once on the result
+
+Only running sums are kept, so evaluators can be added a few at a time: from
+a memory-mapped .npy stack, one input file per evaluator, or a long-format
+file with an evaluator column. A chunk of k evaluators is laid side by side
+as one (alternatives x k*criteria) matrix, so normalization, ideal points and
+distances for all of them are one pass of the engine's kernels.
+
+    scores, ranks = group_rank(stack, [1, 1, 2], ['+', '-', '+'], aggregate='borda')
+
+    ranker = GroupRanker([1, 1, 2], ['+', '-', '+'], aggregate='geometric')
+    names, columns = feed(ranker, iter_long('ratings.csv', 'Evaluator'))
+    scores, ranks = ranker.result()
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .defaults import DEFAULT_CHUNKSIZE, GROUP_MEMORY_BUDGET as DEFAULT_MEMORY_BUDGET
+from .engine import (InputError, ParameterError, TopsisError, as_impacts, as_weights, denominators, dense_rank,
+                     distance_kernel, normalization_kernel, rank)
+from .fileio import input_labels, load_input
+from .loader import frame_matrix
+from .stream import iter_frames, read_header
+
+AGGREGATES = {"scores": ("mean", "geometric", "borda"), "matrix": ("mean", "geometric")}
+
+# float64 copies of a chunk alive at once while scoring it (wide matrix, differences)
+_ARRAYS_PER_CHUNK = 2
+
+
+def as_stack(stack):
+    """Validate an (evaluators x alternatives x criteria) stack; a single matrix is one evaluator."""
+    stack = np.asarray(stack)
+    if not (np.issubdtype(stack.dtype, np.number) and not np.issubdtype(stack.dtype, np.complexfloating)):
+        raise InputError("From 2nd to last columns must contain numeric values only.")
+    if stack.ndim == 2:
+        stack = stack[np.newaxis]
+    if stack.ndim != 3:
+        raise InputError("A group stack must be three dimensional (evaluators x alternatives x criteria).")
+    if stack.shape[0] < 1 or stack.shape[1] < 1 or stack.shape[2] < 2:
+        raise InputError("Every evaluator needs at least one alternative and two criteria.")
+    return stack
+
+
+def borda_points(scores):
+    """
+    Borda points of (evaluators x alternatives) scores: the share of the
+    other alternatives each one beats. Tied alternatives get the same points.
+    """
+    k, n = scores.shape
+    order = np.argsort(scores, axis=1, kind="stable")
+    ordered = np.take_along_axis(scores, order, axis=1)
+
+    # the first position of every run of equal scores is the number of lower scores
+    starts = np.ones((k, n), dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    below = np.maximum.accumulate(np.where(starts, np.arange(n), 0), axis=1)
+
+    points = np.empty((k, n))
+    np.put_along_axis(points, order, below / max(n - 1, 1), axis=1)
+    return points
+
+
+def evaluator_scores(stack, weights, signs, normalization="vector", distance="euclidean"):
+    """
+    (evaluators x alternatives) closeness scores of a stack, each evaluator
+    scored on its own like rank() would (to rounding error). signs are the
+    +1/-1 impacts.
+    """
+    k, n, m = stack.shape
+    measure = distance_kernel(distance)
+
+    # alternatives x (evaluator, criterion): every column normalizes on its own
+    wide = np.array(stack.transpose(1, 0, 2), dtype=np.float64, order="C").reshape(n, k * m)
+    if not np.isfinite(wide).all():
+        raise InputError("From 2nd to last columns must contain numeric values only.")
+    np.multiply(wide, np.tile(weights, k) / denominators(wide, normalization), out=wide)
+
+    weighted = wide.reshape(n, k, m)
+    col_max = weighted.max(axis=0)
+    col_min = weighted.min(axis=0)
+    ideal_best = np.where(signs > 0, col_max, col_min)
+    ideal_worst = np.where(signs > 0, col_min, col_max)
+
+    diff = weighted - ideal_best
+    dist_best = measure(diff.reshape(n * k, m))
+    np.subtract(weighted, ideal_worst, out=diff)
+    dist_worst = measure(diff.reshape(n * k, m))
+
+    total = dist_best + dist_worst
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = dist_worst / total
+    scores[total == 0] = 0.5
+    return scores.reshape(n, k).T
+
+
+class GroupRanker:
+    """
+    Accumulates evaluators and ranks the alternatives for the whole group.
+
+    ranker = GroupRanker(weights, impacts, aggregate='mean', level='scores')
+    ranker.add(stack)       # (k x alternatives x criteria), or one matrix
+    scores, ranks = ranker.result()
+
+    Evaluators are scored memory_budget bytes at a time; smaller additions
+    are held back until a full chunk is ready. Scores are in 0..1 for every
+    aggregate (Borda points are averaged over evaluators).
+    """
+
+    def __init__(self, weights, impacts, aggregate="mean", level="scores", normalization="vector",
+                 distance="euclidean", memory_budget=DEFAULT_MEMORY_BUDGET):
+        if level not in AGGREGATES:
+            raise ParameterError(f"level must be one of: {', '.join(AGGREGATES)}.")
+        if aggregate not in AGGREGATES[level]:
+            raise ParameterError(f"aggregate must be one of: {', '.join(AGGREGATES[level])} (level '{level}').")
+        self.aggregate = aggregate
+        self.level = level
+        self.weights = weights
+        self.impacts = impacts
+        self.normalization = normalization
+        self.distance = distance
+        self.memory_budget = memory_budget
+        normalization_kernel(normalization)
+        self._measure = distance_kernel(distance)
+
+        self.shape = None
+        self.n_evaluators = 0
+        self._total = None
+        self._pending = []
+
+    def chunk_size(self):
+        """Evaluators scored at once."""
+        n, m = self.shape
+        return max(1, int(self.memory_budget // (_ARRAYS_PER_CHUNK * n * m * 8)))
+
+    def add(self, stack):
+        """Add one evaluator matrix or a stack of them (a memmap is read a chunk at a time)."""
+        stack = as_stack(stack)
+        if self.shape is None:
+            self.shape = stack.shape[1:]
+            self._weights = as_weights(self.weights, self.shape[1])
+            self._signs = as_impacts(self.impacts, self.shape[1])
+        elif stack.shape[1:] != self.shape:
+            raise InputError("Every evaluator must score the same alternatives on the same criteria "
+                             f"(expected {self.shape[0]} x {self.shape[1]}, got {stack.shape[1]} x {stack.shape[2]}).")
+
+        chunk = self.chunk_size()
+        for start in range(0, stack.shape[0], chunk):
+            part = stack[start:start + chunk]
+            if part.shape[0] == chunk:
+                self._accumulate(part)
+                continue
+            self._pending.append(np.array(part, dtype=np.float64))
+            if sum(p.shape[0] for p in self._pending) >= chunk:
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            pending, self._pending = self._pending, []
+            self._accumulate(np.concatenate(pending))
+
+    def _accumulate(self, stack):
+        if self.level == "matrix":
+            if self.aggregate == "geometric":
+                if not (stack > 0).all():
+                    raise InputError("The geometric mean needs positive criteria values.")
+                part = np.log(stack).sum(axis=0)
+            else:
+                part = stack.sum(axis=0, dtype=np.float64)
+            if not np.isfinite(part).all():
+                raise InputError("From 2nd to last columns must contain numeric values only.")
+        else:
+            scores = evaluator_scores(stack, self._weights, self._signs, self.normalization, self._measure)
+            if self.aggregate == "borda":
+                part = borda_points(scores).sum(axis=0)
+            elif self.aggregate == "geometric":
+                # a score of 0 (worst on every criterion) makes the product 0
+                with np.errstate(divide="ignore"):
+                    part = np.log(scores).sum(axis=0)
+            else:
+                part = scores.sum(axis=0)
+
+        self._total = part if self._total is None else self._total + part
+        self.n_evaluators += stack.shape[0]
+
+    def matrix(self):
+        """The aggregated (alternatives x criteria) matrix (level='matrix' only)."""
+        if self.level != "matrix":
+            raise ParameterError("Only level 'matrix' aggregates the matrices.")
+        mean = self._mean()
+        return np.exp(mean) if self.aggregate == "geometric" else mean
+
+    def _mean(self):
+        self._flush()
+        if self.n_evaluators == 0:
+            raise InputError("No evaluators were added.")
+        return self._total / self.n_evaluators
+
+    def result(self):
+        """(scores, ranks) of the alternatives for the group, like rank() returns."""
+        if self.level == "matrix":
+            return rank(self.matrix(), self._weights, self._signs, normalization=self.normalization,
+                        distance=self._measure)
+        mean = self._mean()
+        scores = np.exp(mean) if self.aggregate == "geometric" else mean
+        return scores, dense_rank(scores)
+
+
+def group_rank(stack, weights, impacts, aggregate="mean", level="scores", normalization="vector",
+               distance="euclidean", memory_budget=DEFAULT_MEMORY_BUDGET):
+    """(scores, ranks) of an (evaluators x alternatives x criteria) stack; see GroupRanker."""
+    ranker = GroupRanker(weights, impacts, aggregate, level, normalization, distance, memory_budget)
+    ranker.add(stack)
+    return ranker.result()
+
+
+def iter_files(paths, criteria=None):
+    """Yield (evaluator, names, columns, matrix) for input files holding one evaluator each."""
+    for path in paths:
+        try:
+            df, data = load_input(path, criteria)
+        except TopsisError as e:
+            raise type(e)(f"{path}: {e}")
+        names, columns = input_labels(df)
+        yield path, names, columns, data
+
+
+def _runs(keys):
+    """(start, stop) of every run of equal values in keys."""
+    bounds = [0, *(np.flatnonzero(keys[1:] != keys[:-1]) + 1).tolist(), len(keys)]
+    return zip(bounds[:-1], bounds[1:])
+
+
+def _check_grouped(path, evaluator_column, chunksize):
+    """Raise InputError unless every evaluator's rows are contiguous (reads only that column)."""
+    try:
+        reader = pd.read_csv(path, usecols=[evaluator_column], chunksize=chunksize)
+        seen, current = set(), None
+        with reader:
+            for df in reader:
+                keys = df[evaluator_column].astype(str).to_numpy()
+                for start, _ in _runs(keys):
+                    if keys[start] == current:
+                        continue
+                    if keys[start] in seen:
+                        raise InputError(f"Rows of evaluator '{keys[start]}' are not contiguous; sort the file "
+                                         f"by '{evaluator_column}'.")
+                    current = keys[start]
+                    seen.add(current)
+    except TopsisError:
+        raise
+    except Exception:
+        raise InputError("Unable to read input file. Ensure it is a valid CSV.")
+
+
+def iter_long(path, evaluator_column, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Yield (evaluator, names, columns, matrix) from a long-format CSV file: an
+    evaluator column plus the usual layout (name, then criteria). Every
+    evaluator's rows must be contiguous, which is checked up front. The file
+    is read chunksize rows at a time, so only one evaluator is held in memory.
+    """
+    if evaluator_column not in read_header(path):
+        raise InputError(f"Evaluator column '{evaluator_column}' not found.")
+    _check_grouped(path, evaluator_column, chunksize)
+
+    def finish(key, parts):
+        df = pd.concat(parts).drop(columns=evaluator_column).reset_index(drop=True)
+        return key, df.iloc[:, 0].astype(str).to_numpy(), list(df.columns), frame_matrix(df)
+
+    current, parts = None, []
+    for _, df in iter_frames(path, chunksize):
+        keys = df[evaluator_column].astype(str).to_numpy()
+        for start, stop in _runs(keys):
+            if keys[start] != current:
+                if parts:
+                    yield finish(current, parts)
+                current, parts = keys[start], []
+            parts.append(df.iloc[start:stop])
+    if parts:
+        yield finish(current, parts)
+
+
+def _aligned(evaluator, names, matrix, reference):
+    """Rows of matrix in the order of the reference names."""
+    if len(names) == len(reference) and (names == reference).all():
+        return matrix
+    index = pd.Index(names)
+    positions = index.get_indexer(reference) if index.is_unique else None
+    if positions is None or len(names) != len(reference) or (positions < 0).any():
+        raise InputError(f"Evaluator '{evaluator}' does not score the same alternatives as the first one.")
+    return matrix[positions]
+
+
+def feed(ranker, evaluators):
+    """
+    Add (evaluator, names, columns, matrix) tuples to ranker, matching rows by
+    name to the first evaluator. Returns that evaluator's (names, columns).
+    """
+    reference = None
+    for evaluator, names, columns, matrix in evaluators:
+        if reference is None:
+            reference = (names, columns)
+        elif columns[1:] != reference[1][1:]:
+            raise InputError(f"Evaluator '{evaluator}' does not have the same criteria as the first one.")
+        ranker.add(_aligned(evaluator, names, matrix, reference[0]))
+    if reference is None:
+        raise InputError("No evaluators were added.")
+    return reference
+
+
+def load_stack(path):
+    """Memory-mapped (evaluators x alternatives x criteria) stack of a .npy file."""
+    if not os.path.exists(path):
+        raise InputError("File not found.")
+    try:
+        stack = np.load(path, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        raise InputError(f"Unable to read stack file: {e}")
+    return as_stack(stack)
@@ -0,0 +1,347 @@
+"""
+Incremental TOPSIS index.
+
+TopsisIndex keeps the alternatives of a changing table together with the
+state TOPSIS needs: exact running sums of squares per column (for the
+normalization denominators) and per-column max/min heaps with lazy deletion
+(for the ideal points). A change costs O(criteria) plus a heap push; scores
+are recomputed lazily on the next query: only the changed rows when neither
+a norm nor an ideal point moved, every row otherwise. A norm moves with
+almost every change, so that rescoring pass is what a query after a change
+usually pays; the index saves the parse, copy and column reduction, not the
+per-row distances.
+
+Because the sums of squares are kept exactly and rounded once, an index
+built by any sequence of add/update/remove calls gives bit-for-bit the same
+scores as an index built from scratch on the final table. engine.score()
+sums in floating point, so its scores agree with the index's to within a
+few ulps.
+"""
+
+import heapq
+
+import numpy as np
+
+from .engine import (InputError, NormalizationError, as_impacts, as_weights,
+                     closeness, dense_rank, select_top_k)
+
+# float64 values are integer multiples of 2**-1074
+_SCALE_BITS = 1074
+_LOW_BITS = 26
+
+
+class ExactColumnSums:
+    """
+    Exact per-column sums of float64 values, supporting subtraction.
+
+    Each value is split into a 53-bit integer mantissa and an exponent; the
+    mantissas are accumulated per (column, exponent) in int64 halves and
+    folded into one Python integer per column, so no rounding ever happens
+    until value() is called.
+    """
+
+    def __init__(self, n_cols):
+        self.totals = [0] * n_cols
+
+    def add(self, values, sign=1):
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        mantissa, exponent = np.frexp(values)
+        ints = (mantissa * 2.0 ** 53).astype(np.int64)
+        hi = ints >> _LOW_BITS
+        lo = ints - (hi << _LOW_BITS)
+
+        for j in range(values.shape[1]):
+            exps, where = np.unique(exponent[:, j], return_inverse=True)
+            sum_hi = np.zeros(len(exps), dtype=np.int64)
+            sum_lo = np.zeros(len(exps), dtype=np.int64)
+            np.add.at(sum_hi, where, hi[:, j])
+            np.add.at(sum_lo, where, lo[:, j])
+
+            total = 0
+            for e, h, l in zip(exps.tolist(), sum_hi.tolist(), sum_lo.tolist()):
+                shift = e - 53 + _SCALE_BITS
+                ints_sum = (h << _LOW_BITS) + l
+                # subnormal mantissas carry enough trailing zeros for a right shift
+                total += ints_sum << shift if shift >= 0 else ints_sum >> -shift
+            self.totals[j] += sign * total
+
+    def subtract(self, values):
+        self.add(values, sign=-1)
+
+    def value(self):
+        """Correctly rounded float64 sums."""
+        return np.array([t / 2 ** _SCALE_BITS for t in self.totals], dtype=np.float64)
+
+
+class _ExtremeHeap:
+    """Max (or min) of one column under updates, via a heap with lazy deletion."""
+
+    def __init__(self, data, col, largest):
+        self.data = data
+        self.col = col
+        self.sign = -1.0 if largest else 1.0
+        self.heap = []
+
+    def push(self, slot, value):
+        heapq.heappush(self.heap, (self.sign * value, slot))
+
+    def rebuild(self, slots):
+        values = self.data[slots, self.col] * self.sign
+        self.heap = list(zip(values.tolist(), slots.tolist()))
+        heapq.heapify(self.heap)
+
+    def top(self, live):
+        heap = self.heap
+        # drop entries whose slot was removed or changed since they were pushed
+        while heap:
+            key, slot = heap[0]
+            if live[slot] and self.data[slot, self.col] * self.sign == key:
+                return key * self.sign
+            heapq.heappop(heap)
+        raise InputError("Index contains no alternatives.")
+
+
+class TopsisIndex:
+    """
+    Stateful TOPSIS ranking of a set of keyed alternatives.
+
+    index = TopsisIndex([1, 1, 2], ['+', '-', '+'])
+    index.add_many(names, matrix)
+    index.update('M3', [0.8, 0.6, 47.0])
+    keys, scores, ranks = index.ranking()
+    """
+
+    def __init__(self, weights, impacts, capacity=1024):
+        self.n_criteria = len(weights)
+        self.weights = as_weights(weights, self.n_criteria)
+        self.signs = as_impacts(impacts, self.n_criteria)
+
+        self._data = np.zeros((max(1, capacity), self.n_criteria))
+        self._live = np.zeros(max(1, capacity), dtype=bool)
+        self._scores = np.zeros(max(1, capacity))
+        self._keys = [None] * max(1, capacity)
+        self._slot = {}
+        self._free = []
+        self._next = 0
+
+        self._sums = ExactColumnSums(self.n_criteria)
+        self._max = [_ExtremeHeap(self._data, j, True) for j in range(self.n_criteria)]
+        self._min = [_ExtremeHeap(self._data, j, False) for j in range(self.n_criteria)]
+
+        # state the current scores were computed with
+        self._norms = None
+        self._col_max = None
+        self._col_min = None
+        self._dirty = set()
+        self._changed = True
+        self._ranking = None
+
+    @classmethod
+    def from_matrix(cls, keys, matrix, weights, impacts):
+        """Build an index from an (alternatives x criteria) matrix in one go."""
+        matrix = np.asarray(matrix, dtype=np.float64)
+        index = cls(weights, impacts, capacity=matrix.shape[0])
+        index.add_many(keys, matrix)
+        return index
+
+    def __len__(self):
+        return len(self._slot)
+
+    def __contains__(self, key):
+        return key in self._slot
+
+    def _as_rows(self, values):
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        if values.ndim != 2 or values.shape[1] != self.n_criteria:
+            raise InputError("Number of values must be equal to number of criteria.")
+        if not np.isfinite(values).all():
+            raise InputError("Criteria values must be numeric.")
+        return values
+
+    def _grow(self, needed):
+        capacity = len(self._live)
+        if self._next + needed <= capacity:
+            return
+        new_capacity = max(2 * capacity, self._next + needed)
+
+        data = np.zeros((new_capacity, self.n_criteria))
+        data[:capacity] = self._data
+        self._data = data
+        for heap in self._max + self._min:
+            heap.data = data
+
+        self._live = np.concatenate([self._live, np.zeros(new_capacity - capacity, dtype=bool)])
+        self._scores = np.concatenate([self._scores, np.zeros(new_capacity - capacity)])
+        self._keys.extend([None] * (new_capacity - capacity))
+
+    def _take_slots(self, count):
+        slots = [self._free.pop() for _ in range(min(count, len(self._free)))]
+        rest = count - len(slots)
+        if rest:
+            self._grow(rest)
+            slots.extend(range(self._next, self._next + rest))
+            self._next += rest
+        return np.array(slots, dtype=np.int64)
+
+    def add_many(self, keys, values):
+        """Add several new alternatives at once."""
+        keys = list(keys)
+        values = self._as_rows(values)
+        if len(keys) != values.shape[0]:
+            raise InputError("Number of keys must be equal to number of rows.")
+        if len(set(keys)) != len(keys) or any(key in self._slot for key in keys):
+            raise InputError("Alternative keys must be unique.")
+
+        slots = self._take_slots(len(keys))
+        self._data[slots] = values
+        self._live[slots] = True
+        for key, slot in zip(keys, slots.tolist()):
+            self._keys[slot] = key
+            self._slot[key] = slot
+
+        self._sums.add(values * values)
+        if len(keys) > len(self._slot) // 2:
+            live = np.flatnonzero(self._live)
+            for heap in self._max + self._min:
+                heap.rebuild(live)
+        else:
+            for slot in slots.tolist():
+                self._push(slot)
+
+        self._dirty.update(slots.tolist())
+        self._changed = True
+        self._ranking = None
+
+    def add(self, key, values):
+        """Add one new alternative."""
+        self.add_many([key], values)
+
+    def update(self, key, values):
+        """Replace the criteria values of an existing alternative."""
+        slot = self._lookup(key)
+        values = self._as_rows(values)[0]
+
+        old = self._data[slot]
+        self._sums.subtract(old * old)
+        self._data[slot] = values
+        self._sums.add(values * values)
+        self._push(slot)
+
+        self._dirty.add(slot)
+        self._changed = True
+        self._ranking = None
+
+    def remove(self, key):
+        """Remove an alternative."""
+        slot = self._lookup(key)
+        old = self._data[slot]
+        self._sums.subtract(old * old)
+
+        self._live[slot] = False
+        self._keys[slot] = None
+        del self._slot[key]
+        self._free.append(slot)
+
+        self._dirty.discard(slot)
+        self._changed = True
+        self._ranking = None
+        self._compact()
+
+    def _lookup(self, key):
+        try:
+            return self._slot[key]
+        except KeyError:
+            raise InputError(f"Unknown alternative '{key}'.")
+
+    def _push(self, slot):
+        for heap in self._max + self._min:
+            heap.push(slot, self._data[slot, heap.col])
+
+    def _compact(self):
+        # stale heap entries are dropped lazily; rebuild if they pile up
+        if len(self._max[0].heap) > 2 * len(self._slot) + 64:
+            live = np.flatnonzero(self._live)
+            for heap in self._max + self._min:
+                heap.rebuild(live)
+
+    def set_weights(self, weights, impacts):
+        """Change the weights and impacts; every score is recomputed lazily."""
+        self.weights = as_weights(weights, self.n_criteria)
+        self.signs = as_impacts(impacts, self.n_criteria)
+        self._norms = None
+        self._changed = True
+        self._ranking = None
+
+    def table(self):
+        """(keys, matrix) of the live alternatives, in the order the index holds them."""
+        slots = np.flatnonzero(self._live)
+        return [self._keys[s] for s in slots.tolist()], self._data[slots]
+
+    def _refresh(self):
+        """Bring the cached scores up to date."""
+        if not self._slot:
+            raise InputError("Index contains no alternatives.")
+        if not self._changed:
+            return
+
+        norms = np.sqrt(self._sums.value())
+        if (norms == 0).any():
+            raise NormalizationError("Normalization error: one or more criteria columns have all zeros.")
+        col_max = np.array([heap.top(self._live) for heap in self._max])
+        col_min = np.array([heap.top(self._live) for heap in self._min])
+
+        moved = (self._norms is None
+                 or not np.array_equal(norms, self._norms)
+                 or not np.array_equal(col_max, self._col_max)
+                 or not np.array_equal(col_min, self._col_min))
+        if moved:
+            # every row; a slice when no slot is free avoids copying the table
+            slots = slice(0, self._next) if not self._free else np.flatnonzero(self._live)
+        elif self._dirty:
+            slots = np.array(sorted(self._dirty), dtype=np.int64)
+        else:
+            self._changed = False
+            return
+
+        # the weighted matrix is data * scale with scale > 0, so its column
+        # extremes are the raw extremes times scale
+        scale = self.weights / norms
+        w_max = col_max * scale
+        w_min = col_min * scale
+        ideal_best = np.where(self.signs > 0, w_max, w_min)
+        ideal_worst = np.where(self.signs > 0, w_min, w_max)
+
+        self._scores[slots] = closeness(self._data[slots] * scale, ideal_best, ideal_worst)
+        self._norms, self._col_max, self._col_min = norms, col_max, col_min
+        self._dirty.clear()
+        self._changed = False
+
+    def score(self, key):
+        """Current closeness score (0..1) of one alternative."""
+        slot = self._lookup(key)
+        self._refresh()
+        return float(self._scores[slot])
+
+    def ranking(self):
+        """Return (keys, scores, ranks) for every alternative, best first."""
+        if self._ranking is None:
+            self._refresh()
+            slots = np.flatnonzero(self._live)
+            scores = self._scores[slots]
+            order = np.lexsort((slots, -scores))
+            slots, scores = slots[order], scores[order]
+            self._ranking = ([self._keys[s] for s in slots.tolist()], scores, dense_rank(scores))
+        return self._ranking
+
+    def top(self, k):
+        """Return (keys, scores, ranks) for the k best alternatives, best first."""
+        if self._ranking is not None:
+            keys, scores, ranks = self._ranking
+            return keys[:k], scores[:k], ranks[:k]
+
+        self._refresh()
+        slots = np.flatnonzero(self._live)
+        scores = self._scores[slots]
+        best = select_top_k(scores, k)
+        top = scores[best]
+        return [self._keys[s] for s in slots[best].tolist()], top, dense_rank(top)
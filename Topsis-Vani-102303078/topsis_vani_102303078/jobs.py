@@ -0,0 +1,247 @@
+"""
+Background jobs with results kept on local disk.
+
+JobQueue runs scoring functions on a pool of worker threads and hands back a
+job ID straight away. Job state and results are written to a JobStore
+directory and removed once they are older than the TTL. Notification (the web
+service's email) is a separate stage on its own threads, retried with
+exponential backoff, so a slow mail server never holds up a scoring worker:
+
+    queue = JobQueue(JobStore('/tmp/topsis-jobs', ttl=3600), workers=2, notify=send_results)
+    job_id = queue.submit(run_topsis, df, weights, impacts, notify_to='me@example.com')
+    queue.status(job_id)   # {'id': ..., 'status': 'running', ...}
+    queue.result(job_id)   # (media_type, bytes) once status is 'done'
+
+The job function returns the result as bytes, or (media_type, bytes).
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .defaults import JOB_TTL as DEFAULT_TTL
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 2.0
+DEFAULT_MAX_PENDING = 256
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# notification states
+PENDING = "pending"
+SENT = "sent"
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_pending jobs are already waiting."""
+
+
+def default_directory():
+    return os.path.join(tempfile.gettempdir(), "topsis-jobs")
+
+
+class JobStore:
+    """
+    Job metadata (<id>.json) and results (<id>.bin) in a directory. Jobs that
+    finished more than ttl seconds ago are treated as gone and deleted.
+    """
+
+    def __init__(self, directory=None, ttl=DEFAULT_TTL):
+        self.directory = directory or default_directory()
+        self.ttl = ttl
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, job_id, ext):
+        if not _JOB_ID.match(job_id):
+            raise KeyError(job_id)
+        return os.path.join(self.directory, f"{job_id}.{ext}")
+
+    def _write(self, path, data):
+        # write then rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def save(self, meta):
+        self._write(self._path(meta["id"], "json"), json.dumps(meta).encode())
+
+    def put_result(self, job_id, data):
+        self._write(self._path(job_id, "bin"), data)
+
+    def expired(self, meta, now=None):
+        finished = meta.get("finished")
+        return finished is not None and (now or time.time()) - finished > self.ttl
+
+    def load(self, job_id):
+        """Metadata of a job, or None if it is unknown or expired."""
+        try:
+            with open(self._path(job_id, "json"), "rb") as f:
+                meta = json.loads(f.read())
+        except (KeyError, OSError, ValueError):
+            return None
+        if self.expired(meta):
+            self.delete(job_id)
+            return None
+        return meta
+
+    def result(self, job_id):
+        try:
+            with open(self._path(job_id, "bin"), "rb") as f:
+                return f.read()
+        except (KeyError, OSError):
+            return None
+
+    def delete(self, job_id):
+        for ext in ("json", "bin"):
+            try:
+                os.remove(self._path(job_id, ext))
+            except (KeyError, OSError):
+                pass
+
+    def purge(self):
+        """Delete every expired job; returns how many were removed."""
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.directory):
+            job_id, ext = os.path.splitext(name)
+            if ext != ".json":
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "rb") as f:
+                    meta = json.loads(f.read())
+            except (OSError, ValueError):
+                continue
+            if self.expired(meta, now):
+                self.delete(job_id)
+                removed += 1
+        return removed
+
+
+class JobQueue:
+    """
+    Runs jobs on `workers` threads and notifications on `notify_workers`
+    threads. notify(recipient, job_id, media_type, data) is called after a
+    job succeeds when it was submitted with notify_to; it is retried up to
+    `retries` times, waiting backoff, 2 * backoff, ... seconds in between.
+    """
+
+    def __init__(self, store=None, workers=2, notify=None, notify_workers=1, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, max_pending=DEFAULT_MAX_PENDING):
+        self.store = store or JobStore()
+        self.notify = notify
+        self.retries = retries
+        self.backoff = backoff
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="topsis-job")
+        self._notify_pool = ThreadPoolExecutor(notify_workers, thread_name_prefix="topsis-notify")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            meta = self.store.load(job_id)
+            if meta is None:
+                return None
+            for key, value in changes.items():
+                if isinstance(value, dict) and isinstance(meta.get(key), dict):
+                    meta[key].update(value)
+                else:
+                    meta[key] = value
+            self.store.save(meta)
+            return meta
+
+    def submit(self, func, *args, notify_to=None, **kwargs):
+        """Queue func(*args, **kwargs) and return the job ID."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs are already waiting.")
+            self._pending += 1
+
+        self.store.purge()
+        job_id = uuid.uuid4().hex
+        meta = {"id": job_id, "status": QUEUED, "created": time.time(), "started": None, "finished": None,
+                "error": None, "media_type": None}
+        if notify_to is not None:
+            meta["notify"] = {"to": notify_to, "status": PENDING, "attempts": 0, "error": None}
+        self.store.save(meta)
+
+        try:
+            self._pool.submit(self._run, job_id, func, args, kwargs, notify_to)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            self.store.delete(job_id)
+            raise
+        return job_id
+
+    def _run(self, job_id, func, args, kwargs, notify_to):
+        with self._lock:
+            self._pending -= 1
+        self._update(job_id, status=RUNNING, started=time.time())
+        try:
+            result = func(*args, **kwargs)
+            media_type, data = result if isinstance(result, tuple) else ("application/octet-stream", result)
+            self.store.put_result(job_id, data)
+        except Exception as e:
+            self._update(job_id, status=FAILED, finished=time.time(), error=str(e) or type(e).__name__)
+            return
+        self._update(job_id, status=DONE, finished=time.time(), media_type=media_type)
+
+        if notify_to is not None and self.notify is not None:
+            self._notify_pool.submit(self._deliver, job_id, notify_to, media_type, data)
+
+    def _deliver(self, job_id, recipient, media_type, data):
+        for attempt in range(1, self.retries + 1):
+            try:
+                self.notify(recipient, job_id, media_type, data)
+            except Exception as e:
+                status = FAILED if attempt == self.retries else PENDING
+                self._update(job_id, notify={"status": status, "attempts": attempt, "error": str(e)})
+                if attempt < self.retries:
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+            else:
+                self._update(job_id, notify={"status": SENT, "attempts": attempt, "error": None})
+                return
+
+    def status(self, job_id):
+        """Job metadata, or None if the ID is unknown or the job expired."""
+        return self.store.load(job_id)
+
+    def result(self, job_id):
+        """(media_type, bytes) of a finished job, or None."""
+        meta = self.store.load(job_id)
+        if meta is None or meta["status"] != DONE:
+            return None
+        data = self.store.result(job_id)
+        return None if data is None else (meta["media_type"], data)
+
+    def wait(self, job_id, timeout=None, interval=0.05):
+        """Poll until the job is done or failed (or timeout); returns its metadata."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            meta = self.store.load(job_id)
+            if meta is None or meta["status"] in (DONE, FAILED):
+                return meta
+            if deadline is not None and time.monotonic() >= deadline:
+                return meta
+            time.sleep(interval)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+        self._notify_pool.shutdown(wait=wait)
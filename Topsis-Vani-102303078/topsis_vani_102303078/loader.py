@@ -0,0 +1,114 @@
+"""
+Fast CSV loader for the numeric criteria block.
+
+The file is parsed once, with the multithreaded pyarrow engine when it is
+installed and the pandas C engine otherwise. The name column is kept as
+strings and the criteria columns are type-inferred by the parser itself, so
+there is no per-column to_numeric pass: the criteria are copied straight into
+one preallocated float64 block. The per-cell checks only run on columns the
+parser could not read as numbers, to convert them or report the first
+offending cell.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .engine import InputError, as_dtype
+from .stream import read_header
+
+
+def _read_pyarrow(input_file, columns, usecols):
+    """Parse with pyarrow.csv (multithreaded); None if pyarrow is not installed."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return None
+
+    options = pacsv.ConvertOptions(column_types={columns[0]: pa.string()},
+                                   include_columns=columns if usecols is not None else None)
+    return pacsv.read_csv(input_file, convert_options=options).to_pandas()
+
+
+def _coerce(df, col):
+    """
+    A column the parser did not read as numbers, converted with to_numeric;
+    raises InputError naming its first non-numeric cell. Missing cells stay
+    NaN for the caller to report.
+    """
+    values = df[col]
+    coerced = pd.to_numeric(values, errors="coerce")
+    bad = np.flatnonzero(coerced.isnull().to_numpy() & values.notnull().to_numpy())
+    if len(bad):
+        row = int(bad[0])
+        raise InputError("From 2nd to last columns must contain numeric values only "
+                         f"(row {row + 1}, column '{col}': {values.iloc[row]!r}).")
+    return coerced
+
+
+def load_csv(input_file, usecols=None, engine="auto", dtype=None):
+    """
+    Read a CSV file as (df, data): the frame as parsed (for output) and a
+    C-contiguous (alternatives x criteria) matrix, float64 unless dtype is
+    'float32'.
+
+    engine is 'pyarrow', 'c' or 'auto' (pyarrow when installed). Raises
+    InputError naming the row and column of the first non-numeric or
+    missing criteria value.
+    """
+    columns = read_header(input_file)
+    if usecols is not None:
+        missing = [c for c in usecols if c not in columns]
+        if missing:
+            raise InputError(f"Criteria columns not found: {', '.join(missing)}.")
+        columns = [columns[0]] + [c for c in usecols if c != columns[0]]
+        if len(columns) < 3:
+            raise InputError("Input file must contain three or more columns.")
+
+    try:
+        df = None
+        if engine in ("auto", "pyarrow"):
+            df = _read_pyarrow(input_file, columns, usecols)
+            if df is None and engine == "pyarrow":
+                raise InputError("The pyarrow CSV engine requires pyarrow (pip install pyarrow).")
+        if df is None:
+            df = pd.read_csv(input_file, usecols=columns if usecols is not None else None,
+                             dtype={columns[0]: str})
+    except InputError:
+        raise
+    except Exception:
+        raise InputError("Unable to read input file. Ensure it is a valid CSV.")
+    if usecols is not None:
+        df = df[columns]
+
+    return df, frame_matrix(df, dtype)
+
+
+def frame_matrix(df, dtype=None):
+    """
+    Copy the criteria columns of a parsed frame (every column after the
+    first) into a float64 (or dtype) matrix, raising InputError on the first
+    non-numeric or missing value.
+    """
+    if df.shape[1] < 3:
+        raise InputError("Input file must contain three or more columns.")
+
+    if len(df) == 0:
+        raise InputError("Input file contains no alternatives.")
+
+    criteria = df.columns[1:]
+    data = np.empty((len(df), len(criteria)), dtype=as_dtype(dtype))
+    for j, col in enumerate(criteria):
+        values = df[col]
+        # bool columns count as 0/1, as with to_numeric
+        if not pd.api.types.is_numeric_dtype(values.dtype):
+            values = _coerce(df, col)
+        data[:, j] = values.to_numpy(dtype=data.dtype, na_value=np.nan)
+
+    missing = np.isnan(data)
+    if missing.any():
+        row, j = np.argwhere(missing)[0]
+        raise InputError("From 2nd to last columns must contain numeric values only "
+                         f"(row {row + 1}, column '{criteria[j]}': missing value).")
+
+    return data
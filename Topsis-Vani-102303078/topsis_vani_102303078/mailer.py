@@ -0,0 +1,216 @@
+"""
+Pooled SMTP delivery for result emails.
+
+Mailer keeps a few authenticated SMTP connections open and sends queued
+messages over them, so a burst of results costs one TLS handshake and login
+per connection instead of one per message. Each connection is owned by a
+sender thread that drains up to batch_size queued messages at a time and
+closes its connection after idle_timeout seconds without work. Transient
+failures (dropped connections, 4xx replies) are retried on a fresh
+connection with exponential backoff; permanent ones (5xx) fail at once.
+
+    mailer = Mailer('smtp.gmail.com', 587, username=sender, password=password)
+    mailer.send(message)        # blocks until delivered, returns seconds
+    future = mailer.submit(message)
+    mailer.stats()              # counters and delivery latency percentiles
+    mailer.close()
+
+For local testing, point it at a stand-in server without TLS, e.g.
+`python -m aiosmtpd -n -l localhost:8025` and Mailer('localhost', 8025,
+starttls=False).
+"""
+
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from .engine import ParameterError
+
+DEFAULT_CONNECTIONS = 2
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_IDLE_TIMEOUT = 30.0
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+
+# latencies kept for the percentiles in stats()
+LATENCY_WINDOW = 1024
+
+
+def is_transient(error):
+    """True for failures worth retrying: network errors and 4xx replies."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
+
+
+class Mailer:
+    """
+    Sends email.message.Message objects over a pool of `connections` SMTP
+    connections. smtp_factory(host, port, timeout=...) creates a connection
+    (smtplib.SMTP by default; smtplib.SMTP_SSL for implicit TLS).
+    """
+
+    def __init__(self, host, port=587, username=None, password=None, starttls=True,
+                 connections=DEFAULT_CONNECTIONS, batch_size=DEFAULT_BATCH_SIZE, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 smtp_factory=smtplib.SMTP):
+        if connections < 1:
+            raise ParameterError("connections must be a positive integer.")
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.smtp_factory = smtp_factory
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counts = {"sent": 0, "failed": 0, "retries": 0, "connects": 0, "open": 0, "batches": 0}
+        self._closed = False
+        self._threads = [threading.Thread(target=self._worker, name=f"topsis-smtp-{i}", daemon=True)
+                         for i in range(connections)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, message):
+        """Queue a message; the Future resolves to the delivery latency in seconds."""
+        if self._closed:
+            raise RuntimeError("Mailer is closed.")
+        future = Future()
+        self._queue.put((message, future, time.perf_counter()))
+        return future
+
+    def send(self, message, timeout=None):
+        """Deliver a message and wait for it; raises the SMTP error on failure."""
+        return self.submit(message).result(timeout)
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self._counts[name] += delta
+
+    def _connect(self):
+        smtp = self.smtp_factory(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        self._count("connects")
+        self._count("open")
+        return smtp
+
+    def _disconnect(self, smtp, polite=True):
+        if smtp is None:
+            return None
+        try:
+            if polite:
+                smtp.quit()
+            else:
+                smtp.close()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+        self._count("open", -1)
+        return None
+
+    def _worker(self):
+        smtp = None
+        while True:
+            try:
+                # only wait idle_timeout while holding a connection
+                item = self._queue.get(timeout=self.idle_timeout if smtp is not None else None)
+            except queue.Empty:
+                smtp = self._disconnect(smtp)
+                continue
+            if item is None:
+                break
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # put the stop marker back for after this batch
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            self._count("batches")
+            for item in batch:
+                smtp = self._deliver(smtp, *item)
+        self._disconnect(smtp)
+
+    def _deliver(self, smtp, message, future, queued):
+        if not future.set_running_or_notify_cancel():
+            return smtp
+        for attempt in range(1, self.retries + 1):
+            try:
+                if smtp is None:
+                    smtp = self._connect()
+                smtp.send_message(message)
+            except Exception as e:
+                # the connection state is unknown after a failure
+                smtp = self._disconnect(smtp, polite=False)
+                if not is_transient(e) or attempt == self.retries:
+                    self._count("failed")
+                    future.set_exception(e)
+                    return smtp
+                self._count("retries")
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            else:
+                latency = time.perf_counter() - queued
+                with self._lock:
+                    self._counts["sent"] += 1
+                    self._latencies.append(latency)
+                future.set_result(latency)
+                return smtp
+        return smtp
+
+    def stats(self):
+        """Counters plus latency (queued to delivered) over the last LATENCY_WINDOW messages."""
+        with self._lock:
+            stats = dict(self._counts, queued=self._queue.qsize())
+            latencies = np.array(self._latencies)
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            stats["latency_s"] = {"mean": float(latencies.mean()), "p50": float(p50), "p95": float(p95),
+                                  "p99": float(p99), "max": float(latencies.max())}
+        else:
+            stats["latency_s"] = None
+        return stats
+
+    def close(self, timeout=None):
+        """Deliver what is queued, then close every connection."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
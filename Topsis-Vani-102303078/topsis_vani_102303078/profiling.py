@@ -0,0 +1,121 @@
+"""
+Opt-in per-stage instrumentation of the TOPSIS pipeline.
+
+Pipeline code wraps its stages in `stage(name, rows=...)`. Unless a Profiler
+is active this is a shared no-op context, so the hooks cost next to nothing.
+Inside `with Profiler(...)` every stage records wall time, CPU time, rows
+processed and (with trace_memory=True) peak bytes allocated, and each record
+is handed to the sink:
+
+    with Profiler(sink=print) as prof:
+        topsis('data.csv', '1,1,1,2', '+,+,-,+', 'out.csv')
+    prof.to_json()
+
+Before Python 3.9 tracemalloc cannot reset its peak, so 'bytes' is then the
+growth of traced memory over the stage instead.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+_current = ContextVar("topsis_profiler", default=None)
+_NULL = nullcontext()
+# Python 3.9+
+_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+
+
+def stage(name, rows=None):
+    """Context manager timing one pipeline stage under the active profiler."""
+    profiler = _current.get()
+    if profiler is None:
+        return _NULL
+    return profiler.stage(name, rows)
+
+
+def active():
+    """The active Profiler, or None."""
+    return _current.get()
+
+
+class JsonLinesSink:
+    """Metrics sink writing one JSON object per stage to a text stream."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+
+    def __call__(self, record):
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+
+class Profiler:
+    """
+    Collects per-stage records while active. sink is any callable taking a
+    record dict (a metrics client, a logger, JsonLinesSink, ...).
+    """
+
+    def __init__(self, sink=None, trace_memory=False):
+        self.sink = sink
+        self.trace_memory = trace_memory
+        self.records = []
+        self._token = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        if self.trace_memory:
+            if _RESET_PEAK:
+                tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                "stage": name,
+                "wall_s": time.perf_counter() - wall,
+                "cpu_s": time.process_time() - cpu,
+                "rows": rows,
+                "bytes": self._bytes(base) if self.trace_memory else None,
+            }
+            self.records.append(record)
+            if self.sink is not None:
+                self.sink(record)
+
+    @staticmethod
+    def _bytes(base):
+        current, peak = tracemalloc.get_traced_memory()
+        return (peak if _RESET_PEAK else current) - base
+
+    def summary(self):
+        """Totals per stage name, in first-seen order."""
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows": 0})
+            total["calls"] += 1
+            total["wall_s"] += record["wall_s"]
+            total["cpu_s"] += record["cpu_s"]
+            total["rows"] += record["rows"] or 0
+        return totals
+
+    def to_json(self, **kwargs):
+        return json.dumps({"stages": self.records, "summary": self.summary()}, **kwargs)
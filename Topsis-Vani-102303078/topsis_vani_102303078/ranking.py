@@ -0,0 +1,153 @@
+"""
+Disk-backed ranking for the streaming path.
+
+Scores are spilled as sorted runs of (key, row) to temporary .npy files,
+where key = -score so that ascending order is best first. The runs are then
+k-way merged block by block and dense ranks are written back in row order
+into a memory-mapped array, so memory stays within the configured budget no
+matter how many rows there are.
+"""
+
+import os
+
+import numpy as np
+
+from .defaults import RANKING_MEMORY_BUDGET as DEFAULT_MEMORY_BUDGET
+from .engine import best_first
+
+RUN_DTYPE = np.dtype([("key", np.float64), ("row", np.int64)])
+
+
+class RunWriter:
+    """Buffer scores and spill them to disk as sorted runs of run_rows rows."""
+
+    def __init__(self, workdir, run_rows):
+        self.workdir = workdir
+        self.run_rows = max(1, int(run_rows))
+        self.paths = []
+        self._pieces = []
+        self._buffered = 0
+
+    def add(self, scores, first_row):
+        piece = np.empty(len(scores), dtype=RUN_DTYPE)
+        piece["key"] = -scores
+        piece["row"] = np.arange(first_row, first_row + len(scores))
+        self._pieces.append(piece)
+        self._buffered += len(piece)
+        if self._buffered >= self.run_rows:
+            self._spill()
+
+    def _spill(self):
+        if not self._buffered:
+            return
+        run = np.concatenate(self._pieces)
+        self._pieces = []
+        self._buffered = 0
+
+        run = run[np.lexsort((run["row"], run["key"]))]
+        path = os.path.join(self.workdir, f"run-{len(self.paths):06d}.npy")
+        np.save(path, run)
+        self.paths.append(path)
+
+    def finish(self):
+        self._spill()
+        return self.paths
+
+
+def _count_upto(run, start, key, row):
+    """Number of entries of the sorted run[start:] that are <= (key, row)."""
+    keys = run["key"]
+    lo = np.searchsorted(keys[start:], key, side="left") + start
+    hi = np.searchsorted(keys[start:], key, side="right") + start
+    if hi > lo:
+        lo += np.searchsorted(run["row"][lo:hi], row, side="right")
+    return lo - start
+
+
+def merge_runs(paths, block_rows):
+    """
+    K-way merge of sorted run files. Yields sorted RUN_DTYPE blocks.
+
+    Each step loads at most block_rows entries per run, takes the smallest
+    buffered tail as a threshold and emits everything up to it, which is
+    guaranteed to be globally in order.
+    """
+    block_rows = max(1, int(block_rows))
+    runs = [np.load(path, mmap_mode="r") for path in paths]
+    pos = [0] * len(runs)
+
+    while True:
+        active = [i for i in range(len(runs)) if pos[i] < len(runs[i])]
+        if not active:
+            return
+
+        tails = []
+        for i in active:
+            last = runs[i][min(pos[i] + block_rows, len(runs[i])) - 1]
+            tails.append((last["key"], last["row"]))
+        key, row = min(tails)
+
+        pieces = []
+        for i in active:
+            stop = min(pos[i] + block_rows, len(runs[i]))
+            take = _count_upto(runs[i][:stop], pos[i], key, row)
+            if take:
+                pieces.append(np.asarray(runs[i][pos[i]:pos[i] + take]))
+                pos[i] += take
+
+        block = np.concatenate(pieces)
+        yield block[np.lexsort((block["row"], block["key"]))]
+
+
+def external_dense_rank(paths, ranks, block_rows):
+    """
+    Merge sorted runs and write dense ranks (1 = best) into ranks, an array
+    (typically a memmap) indexed by row. Returns the number of distinct ranks.
+    """
+    current = 0
+    prev_key = None
+    for block in merge_runs(paths, block_rows):
+        keys = block["key"]
+        step = np.ones(len(keys), dtype=np.int64)
+        step[1:] = keys[1:] != keys[:-1]
+        if prev_key is not None and keys[0] == prev_key:
+            step[0] = 0
+
+        dense = np.cumsum(step) + current
+        ranks[block["row"]] = dense
+        current = int(dense[-1])
+        prev_key = keys[-1]
+
+    return current
+
+
+class TopKSelector:
+    """
+    Keep the k best (score, row) pairs seen so far in O(k) memory, together
+    with any per-row payload (e.g. the original frame rows). The kept
+    entries are always ordered best first.
+    """
+
+    def __init__(self, k):
+        self.k = int(k)
+        self.scores = np.empty(0, dtype=np.float64)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.payload = None
+
+    def add(self, scores, first_row, payload=None, concat=None):
+        rows = np.arange(first_row, first_row + len(scores))
+        scores = np.concatenate([self.scores, scores])
+        rows = np.concatenate([self.rows, rows])
+
+        keep = best_first(scores, rows)[:self.k]
+        self.scores = scores[keep]
+        self.rows = rows[keep]
+        if payload is not None:
+            merged = payload if self.payload is None else concat(self.payload, payload)
+            self.payload = merged.take(keep)
+
+    def result(self):
+        """Return (scores, rows, ranks, payload), best first."""
+        step = np.ones(len(self.scores), dtype=np.int64)
+        step[1:] = self.scores[1:] != self.scores[:-1]
+        return self.scores, self.rows, np.cumsum(step), self.payload
@@ -0,0 +1,347 @@
+"""
+Weight sensitivity of a TOPSIS ranking.
+
+With positive weights the ideal points of the weighted matrix are the
+weighted ideal points of the normalized matrix, so both squared distances
+are linear in the squared weights:
+
+    d_best(w)^2 = sum_j w_j^2 * (r_ij - best_j)^2
+
+The per-cell terms are computed once, after which scoring K weight vectors
+is one (K x criteria) @ (criteria x alternatives) product. Sweeps and Monte
+Carlo sampling of the weight simplex evaluate weights this way, chunk by
+chunk, so memory stays within memory_budget however many samples are drawn.
+
+The same terms give score gradients in closed form, and with one weight
+varying two alternatives score the same where a quadratic in that weight
+squared is zero, so rank reversal thresholds are solved for directly (then
+polished by a short bisection) rather than searched for by rescoring:
+
+    result = monte_carlo(matrix, ['+', '+', '-', '+'], n_samples=100_000)
+    result.rank1_probability   # per alternative
+    critical_weights(matrix, [1, 1, 1, 2], ['+', '+', '-', '+'])
+    crossovers(matrix, [1, 1, 1, 2], ['+', '+', '-', '+'], top=5)
+
+Scores agree with rank() to rounding error (the sums run in a different
+order), not bit for bit.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .defaults import SENSITIVITY_MEMORY_BUDGET as DEFAULT_MEMORY_BUDGET
+from .engine import ParameterError, as_impacts, as_matrix, as_weight_stack, as_weights, column_norms, dense_rank
+
+# float64 (samples x alternatives) arrays alive at once while scoring a chunk
+_ARRAYS_PER_CHUNK = 4
+
+StabilityResult = namedtuple("StabilityResult", "n_samples rank1_probability mean_score std_score mean_rank")
+Threshold = namedtuple("Threshold", "criterion weight best lower lower_best upper upper_best")
+Crossover = namedtuple("Crossover", "first second criterion weight lower upper")
+
+
+class WeightScorer:
+    """
+    TOPSIS scores of one decision matrix for many weight vectors.
+
+    scorer = WeightScorer(matrix, impacts)
+    scores = scorer.scores(weight_stack)   # (K x alternatives)
+    """
+
+    def __init__(self, matrix, impacts, cache=None):
+        matrix = as_matrix(matrix)
+        self.n_rows, self.n_criteria = matrix.shape
+        signs = as_impacts(impacts, self.n_criteria)
+
+        norms = column_norms(matrix) if cache is None else cache.norms(matrix)
+        normalized = matrix / norms
+        col_max = normalized.max(axis=0)
+        col_min = normalized.min(axis=0)
+        best = np.where(signs > 0, col_max, col_min)
+        worst = np.where(signs > 0, col_min, col_max)
+
+        # squared per-cell distances to each ideal, before weighting, stored
+        # (criteria x alternatives) so products come out (K x alternatives)
+        self.best_terms = np.ascontiguousarray(np.square(normalized - best).T)
+        self.worst_terms = np.ascontiguousarray(np.square(normalized - worst).T)
+
+    def chunk_size(self, memory_budget=DEFAULT_MEMORY_BUDGET):
+        """Weight vectors per chunk so one chunk fits in memory_budget bytes."""
+        return max(1, int(memory_budget // (self.n_rows * 8 * _ARRAYS_PER_CHUNK)))
+
+    def scores(self, weights):
+        """(K x alternatives) closeness for a (K x criteria) weight stack."""
+        squared = np.square(as_weight_stack(weights, self.n_criteria))
+        total = np.sqrt(squared @ self.best_terms)
+        scores = np.sqrt(squared @ self.worst_terms)
+
+        # in place: total = d_best + d_worst, scores = d_worst / total
+        total += scores
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores /= total
+        scores[total == 0] = 0.5
+        return scores
+
+    def gradients(self, weights):
+        """
+        (alternatives x criteria) partial derivatives of every score with
+        respect to every weight, at one weight vector. The ideal points do
+        not move with positive weights, so the scores are smooth in them.
+        """
+        weights = as_weights(weights, self.n_criteria)
+        squared = weights ** 2
+        dist_best = np.sqrt(squared @ self.best_terms)[:, np.newaxis]
+        dist_worst = np.sqrt(squared @ self.worst_terms)[:, np.newaxis]
+        total = dist_best + dist_worst
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # d dist / d w_j = w_j * term_ij / dist (0 at the ideal point itself)
+            d_best = np.where(dist_best > 0, weights * self.best_terms.T / dist_best, 0.0)
+            d_worst = np.where(dist_worst > 0, weights * self.worst_terms.T / dist_worst, 0.0)
+            gradients = (dist_best * d_worst - dist_worst * d_best) / (total * total)
+        gradients[total[:, 0] == 0] = 0.0
+        return gradients
+
+    def best(self, weights):
+        """Index of the rank-1 alternative (earliest row on ties) per weight vector."""
+        return np.argmax(self.scores(weights), axis=1)
+
+
+def sweep(matrix, weights, impacts, criterion, values, cache=None):
+    """
+    Vary the weight of one criterion (by column position) over values with
+    the other weights fixed. Returns (scores, ranks), both (len(values) x
+    alternatives).
+    """
+    scorer = WeightScorer(matrix, impacts, cache)
+    weights = as_weights(weights, scorer.n_criteria)
+    if not 0 <= criterion < scorer.n_criteria:
+        raise ParameterError(f"criterion must be between 0 and {scorer.n_criteria - 1}.")
+
+    stack = np.repeat(weights[np.newaxis, :], len(values), axis=0)
+    stack[:, criterion] = values
+    scores = scorer.scores(stack)
+    return scores, dense_rank(scores)
+
+
+def sample_weights(n_samples, n_criteria, rng=None, center=None, concentration=None):
+    """
+    Weight vectors drawn from the simplex: uniformly, or from a Dirichlet
+    distribution centred on `center` (larger concentration = closer to it).
+    Scaling all weights does not change TOPSIS scores, so the simplex covers
+    every weighting.
+    """
+    rng = np.random.default_rng(rng)
+    if center is None:
+        alpha = np.ones(n_criteria)
+    else:
+        center = as_weights(center, n_criteria)
+        alpha = (concentration or n_criteria) * center / center.sum()
+    # zero draws are possible in float64 for tiny alpha; weights must be positive
+    return np.maximum(rng.dirichlet(alpha, size=n_samples), np.finfo(np.float64).tiny)
+
+
+def monte_carlo(matrix, impacts, n_samples=10_000, center=None, concentration=None, seed=None,
+                memory_budget=DEFAULT_MEMORY_BUDGET, ranks=False, cache=None):
+    """
+    Rank stability under random weights. Samples are drawn and scored one
+    chunk at a time and only per-alternative statistics are kept, so memory
+    depends on memory_budget and the number of alternatives, not on
+    n_samples.
+
+    Returns a StabilityResult: rank1_probability (share of samples in which
+    each alternative is ranked 1, ties included), mean_score, std_score and,
+    with ranks=True (a sort per sample), mean_rank.
+    """
+    if n_samples < 1:
+        raise ParameterError("n_samples must be a positive integer.")
+
+    scorer = WeightScorer(matrix, impacts, cache)
+    rng = np.random.default_rng(seed)
+    chunk = scorer.chunk_size(memory_budget)
+
+    rank1 = np.zeros(scorer.n_rows, dtype=np.int64)
+    total = np.zeros(scorer.n_rows)
+    total_sq = np.zeros(scorer.n_rows)
+    rank_total = np.zeros(scorer.n_rows) if ranks else None
+
+    for start in range(0, n_samples, chunk):
+        k = min(chunk, n_samples - start)
+        scores = scorer.scores(sample_weights(k, scorer.n_criteria, rng, center, concentration))
+
+        rank1 += (scores == scores.max(axis=1, keepdims=True)).sum(axis=0)
+        total += scores.sum(axis=0)
+        total_sq += np.einsum("ki,ki->i", scores, scores)
+        if ranks:
+            rank_total += dense_rank(scores).sum(axis=0)
+
+    mean = total / n_samples
+    std = np.sqrt(np.maximum(total_sq / n_samples - mean ** 2, 0.0))
+    return StabilityResult(n_samples, rank1 / n_samples, mean, std,
+                           rank_total / n_samples if ranks else None)
+
+
+def score_gradients(matrix, weights, impacts, cache=None):
+    """(scores, gradients): closeness of every alternative and its (alternatives x criteria) weight derivatives."""
+    scorer = WeightScorer(matrix, impacts, cache)
+    return scorer.scores(weights)[0], scorer.gradients(weights)
+
+
+def _split_terms(terms, squared):
+    """
+    (alpha, beta) of a (rows x criteria) block of squared per-cell distances:
+    with only w_j varying, a squared distance is alpha_j + w_j^2 * beta_j.
+    """
+    weighted = terms * squared
+    # alpha from prefix and suffix sums; total minus own term would cancel
+    alpha = np.zeros_like(weighted)
+    np.cumsum(weighted[:, :-1], axis=1, out=alpha[:, 1:])
+    alpha[:, :-1] += np.cumsum(weighted[:, :0:-1], axis=1)[:, ::-1]
+    return alpha, terms
+
+
+def _pair_terms(scorer, weights, first, rows):
+    """
+    Distance terms of alternative `first` (each criteria-shaped) and of
+    `rows` (each rows x criteria): (alpha_best, beta_best, alpha_worst,
+    beta_worst) for both.
+    """
+    squared = weights ** 2
+    cols = np.append(first, rows)
+    alpha_best, beta_best = _split_terms(scorer.best_terms[:, cols].T, squared)
+    alpha_worst, beta_worst = _split_terms(scorer.worst_terms[:, cols].T, squared)
+    terms = (alpha_best, beta_best, alpha_worst, beta_worst)
+    return tuple(t[0] for t in terms), tuple(t[1:] for t in terms)
+
+
+def _difference(first, other, t):
+    """Score of `first` minus score of `other` with the criterion weight set to t."""
+    def closeness(alpha_best, beta_best, alpha_worst, beta_worst):
+        dist_best = np.sqrt(alpha_best + t * t * beta_best)
+        dist_worst = np.sqrt(alpha_worst + t * t * beta_worst)
+        total = dist_best + dist_worst
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(total == 0, 0.5, dist_worst / total)
+
+    return closeness(*first) - closeness(*other)
+
+
+def _crossing_roots(first, other, rtol=1e-6):
+    """
+    Weights t (per row, criterion and root: rows x criteria x 2) at which
+    `first` and a row score the same, NaN where there is none. Equal scores
+    mean worst_a * best_b == worst_b * best_a; squared, that is a quadratic
+    in t^2. Only roots where the difference changes sign within rtol are
+    kept, which drops touching points and rounding artefacts.
+    """
+    fa_best, fb_best, fa_worst, fb_worst = (x[np.newaxis, :] for x in first)
+    oa_best, ob_best, oa_worst, ob_worst = other
+
+    qa = fb_worst * ob_best - ob_worst * fb_best
+    qb = fa_worst * ob_best + fb_worst * oa_best - oa_worst * fb_best - ob_worst * fa_best
+    qc = fa_worst * oa_best - oa_worst * fa_best
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # numerically stable quadratic roots; qa == 0 leaves the linear root
+        q = -0.5 * (qb + np.copysign(np.sqrt(qb * qb - 4 * qa * qc), qb))
+        s = np.stack([q / qa, qc / q], axis=-1)
+        t = np.sqrt(np.where(np.isfinite(s) & (s > 0), s, np.nan))
+
+        first = tuple(x[np.newaxis, :, np.newaxis] for x in first)
+        other = tuple(x[:, :, np.newaxis] for x in other)
+        crosses = np.sign(_difference(first, other, t * (1 - rtol))) * \
+            np.sign(_difference(first, other, t * (1 + rtol))) < 0
+    return np.where(crosses, t, np.nan)
+
+
+def _refine(first, other, lo, hi, iterations=60):
+    """Bisect [lo, hi] (a sign change of the score difference) to a crossing weight."""
+    f_lo = np.sign(_difference(first, other, lo))
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        same = np.sign(_difference(first, other, mid)) == f_lo
+        lo = np.where(same, mid, lo)
+        hi = np.where(same, hi, mid)
+    return 0.5 * (lo + hi)
+
+
+def _nearest(first, other, roots, weight, below, rtol=1e-6):
+    """
+    Refined crossing nearest to weight on one side, for one criterion:
+    (t, row index) or (None, None). first/other/roots are for that criterion.
+    """
+    with np.errstate(invalid="ignore"):
+        candidates = np.where(roots < weight if below else roots > weight, roots, np.nan)
+    if np.isnan(candidates).all():
+        return None, None
+    row, k = np.unravel_index(np.nanargmax(candidates) if below else np.nanargmin(candidates), roots.shape)
+    t = roots[row, k]
+    pair_other = tuple(x[row] for x in other)
+    return float(_refine(first, pair_other, t * (1 - rtol), t * (1 + rtol))), int(row)
+
+
+def critical_weights(matrix, weights, impacts, factor=100.0, cache=None):
+    """
+    For every criterion, the nearest weights below and above the current one
+    (others fixed) at which the rank-1 alternative changes, within
+    [weight / factor, weight * factor]. The leader changes exactly where
+    another alternative first crosses it, so these are the nearest crossing
+    roots against every other alternative, refined by bisection. Returns
+    one Threshold per criterion; lower/upper are None when the leader does
+    not change in that direction.
+    """
+    if factor <= 1:
+        raise ParameterError("factor must be greater than 1.")
+
+    scorer = WeightScorer(matrix, impacts, cache)
+    weights = as_weights(weights, scorer.n_criteria)
+    base = int(scorer.best(weights)[0])
+    others = np.delete(np.arange(scorer.n_rows), base)
+    if not len(others):
+        return [Threshold(j, float(weights[j]), base, None, None, None, None) for j in range(scorer.n_criteria)]
+
+    first, other = _pair_terms(scorer, weights, base, others)
+    roots = _crossing_roots(first, other)
+
+    thresholds = []
+    for j in range(scorer.n_criteria):
+        first_j = tuple(x[j] for x in first)
+        other_j = tuple(x[:, j] for x in other)
+        found = []
+        for below, limit in ((True, weights[j] / factor), (False, weights[j] * factor)):
+            t, row = _nearest(first_j, other_j, roots[:, j], weights[j], below)
+            inside = t is not None and (t >= limit if below else t <= limit)
+            found += [t, int(others[row])] if inside else [None, None]
+        thresholds.append(Threshold(j, float(weights[j]), base, *found))
+    return thresholds
+
+
+def crossovers(matrix, weights, impacts, top=5, cache=None):
+    """
+    Crossover weights for every pair among the `top` best alternatives: for
+    each pair and criterion, the nearest weights below and above the current
+    one (others fixed) at which the two swap places. Returns a list of
+    Crossover(first, second, criterion, weight, lower, upper), first being
+    the better of the two now; lower/upper are None when there is no swap.
+    """
+    if top < 2:
+        raise ParameterError("top must be at least 2.")
+
+    scorer = WeightScorer(matrix, impacts, cache)
+    weights = as_weights(weights, scorer.n_criteria)
+    order = np.argsort(-scorer.scores(weights)[0], kind="stable")[:top]
+
+    result = []
+    for i, first_row in enumerate(order[:-1]):
+        rows = order[i + 1:]
+        first, other = _pair_terms(scorer, weights, first_row, rows)
+        roots = _crossing_roots(first, other)
+        for r, second_row in enumerate(rows):
+            for j in range(scorer.n_criteria):
+                first_j = tuple(x[j] for x in first)
+                other_j = tuple(x[r:r + 1, j] for x in other)
+                lower, _ = _nearest(first_j, other_j, roots[r:r + 1, j], weights[j], True)
+                upper, _ = _nearest(first_j, other_j, roots[r:r + 1, j], weights[j], False)
+                result.append(Crossover(int(first_row), int(second_row), j, float(weights[j]), lower, upper))
+    return result
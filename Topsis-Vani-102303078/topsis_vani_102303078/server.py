@@ -0,0 +1,453 @@
+"""
+Headless HTTP service for TOPSIS scoring.
+
+A small standard-library server (no framework) that keeps the package loaded
+between requests and scores with the same engine as the CLI:
+
+    topsis serve --port 8080 --workers 4
+
+    curl localhost:8080/rank -H 'Content-Type: application/json' \\
+         -d '{"matrix": [[250, 16, 12], [200, 16, 8]], "weights": [1, 1, 2], "impacts": "+,+,-"}'
+
+    curl 'localhost:8080/rank?weights=1,1,1,2,1&impacts=+,+,-,+,+' \\
+         -H 'Content-Type: text/csv' --data-binary @data.csv
+
+POST /rank takes a JSON, CSV (text/csv) or Arrow IPC stream
+(application/vnd.apache.arrow.stream) body. CSV and Arrow bodies have the
+same layout as input files; their weights, impacts and top_k come from the
+query string. The response is JSON unless the Accept header asks for CSV or
+Arrow, in which case the input table is returned with 'Topsis Score' and
+'Rank' appended, like the CLI output file.
+
+Connections are HTTP/1.1 keep-alive and are handled on their own threads,
+but parsing and scoring run on a fixed worker pool. When every worker is
+busy and max_queue requests are already waiting, new requests are answered
+with 429 straight away instead of piling up.
+
+POST /jobs takes the same bodies for large inputs and answers 202 with a job
+ID at once; GET /jobs/<id> reports its status and GET /jobs/<id>/result
+returns the same payload /rank would have, until the job expires.
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .defaults import DEFAULT_KEEPALIVE, DEFAULT_MAX_BODY, DEFAULT_MAX_QUEUE, DEFAULT_PORT
+from .engine import (InputError, ParameterError, TopsisError, as_impacts, as_matrix, as_weights, parse_impacts,
+                     parse_weights, rank, top_k as select_best)
+from .formats import _require_pyarrow, table_matrix
+from .jobs import DONE, FAILED, QUEUED, JobQueue, QueueFull
+from .loader import frame_matrix
+
+JSON = "application/json"
+CSV = "text/csv"
+ARROW = "application/vnd.apache.arrow.stream"
+CONTENT_TYPES = (JSON, CSV, "application/csv", ARROW)
+
+
+class Saturated(Exception):
+    """Raised when the worker pool and its queue are full."""
+
+
+def parse_query(url):
+    """Query parameters of url as a dict. '+' is kept literally (impacts)."""
+    params = {}
+    for pair in urlsplit(url).query.split("&"):
+        if pair:
+            key, _, value = pair.partition("=")
+            params[unquote(key)] = unquote(value)
+    return params
+
+
+def _separated(value, name):
+    """True for a comma separated string, False for a JSON list; else ParameterError."""
+    if isinstance(value, str):
+        # the same rule as the CLI's weights and impacts arguments
+        if "," not in value:
+            raise ParameterError("Impacts and weights must be separated by ',' (comma).")
+        return True
+    if not isinstance(value, list):
+        raise ParameterError(f"{name} must be a comma separated string or a list.")
+    return False
+
+
+def _weights(value, n_cols):
+    if value is None:
+        raise ParameterError("Missing weights.")
+    if _separated(value, "weights"):
+        return parse_weights(value, n_cols)
+    return as_weights(value, n_cols)
+
+
+def _impacts(value, n_cols):
+    if value is None:
+        raise ParameterError("Missing impacts.")
+    if _separated(value, "impacts"):
+        return parse_impacts(value, n_cols)
+    return as_impacts(value, n_cols)
+
+
+def _top_k(value):
+    if value is None or value == "":
+        return None
+    # an integer or a string of digits; int() would also take 1.7 and true
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ParameterError("top_k must be a positive integer.")
+
+
+def read_json(body, params):
+    """
+    (None, names, matrix) of a JSON body; weights, impacts, top_k, columns,
+    normalization and distance go into params. The table is only built for CSV/Arrow replies.
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise InputError("Request body is not valid JSON.")
+    if not isinstance(payload, dict) or "matrix" not in payload:
+        raise InputError("Request body must be a JSON object with a 'matrix' field.")
+
+    for key in ("weights", "impacts", "top_k", "columns", "normalization", "distance"):
+        if key in payload:
+            params[key] = payload[key]
+
+    for key in ("names", "columns"):
+        if payload.get(key) is not None and not isinstance(payload[key], list):
+            raise InputError(f"'{key}' must be a list.")
+
+    matrix = as_matrix(payload["matrix"])
+    names = payload.get("names")
+    if names is not None and len(names) != matrix.shape[0]:
+        raise InputError("Number of names must be equal to number of rows.")
+    return None, names, matrix
+
+
+def json_table(names, matrix, columns=None):
+    """DataFrame of a JSON request: a 'Name' column followed by the criteria."""
+    columns = columns or [f"C{j + 1}" for j in range(matrix.shape[1])]
+    if len(columns) != matrix.shape[1]:
+        raise InputError("Number of columns must be equal to number of criteria.")
+    table = pd.DataFrame(matrix, columns=columns)
+    table.insert(0, "Name", names if names is not None else range(1, matrix.shape[0] + 1))
+    return table
+
+
+def read_csv(body):
+    try:
+        df = pd.read_csv(io.BytesIO(body))
+    except Exception:
+        raise InputError("Unable to read request body. Ensure it is a valid CSV.")
+    data = frame_matrix(df)
+    df[df.columns[0]] = df[df.columns[0]].astype(str)
+    return df, df[df.columns[0]].tolist(), data
+
+
+def read_arrow(body):
+    pa = _require_pyarrow()
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowException:
+        raise InputError("Unable to read request body. Ensure it is a valid Arrow IPC stream.")
+    data = table_matrix(table)
+    return table, table.column(0).to_pylist(), data
+
+
+def write_csv(table, scores, ranks, rows):
+    if not isinstance(table, pd.DataFrame):
+        table = table.to_pandas()
+    result = table.copy() if rows is None else table.iloc[rows].reset_index(drop=True)
+    result["Topsis Score"] = np.round(scores * 100, 2)
+    result["Rank"] = ranks
+    return result.to_csv(index=False).encode()
+
+
+def write_arrow(table, scores, ranks, rows):
+    pa = _require_pyarrow()
+    if not isinstance(table, pa.Table):
+        table = pa.Table.from_pandas(table, preserve_index=False)
+    if rows is not None:
+        table = table.take(pa.array(rows))
+    table = table.append_column("Topsis Score", pa.array(np.round(scores * 100, 2)))
+    table = table.append_column("Rank", pa.array(ranks))
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def handle_rank(content_type, body, params, accept=JSON):
+    """
+    Score one /rank request body. Returns (content_type, payload bytes);
+    raises TopsisError on bad input.
+    """
+    if content_type == JSON:
+        table, names, matrix = read_json(body, params)
+    elif content_type in CONTENT_TYPES[1:3]:
+        table, names, matrix = read_csv(body)
+    elif content_type == ARROW:
+        table, names, matrix = read_arrow(body)
+    else:
+        raise InputError(f"Unsupported content type '{content_type}'. Use {JSON}, {CSV} or {ARROW}.")
+
+    weights = _weights(params.get("weights"), matrix.shape[1])
+    impacts = _impacts(params.get("impacts"), matrix.shape[1])
+    k = _top_k(params.get("top_k"))
+    kernels = {"normalization": params.get("normalization") or "vector",
+               "distance": params.get("distance") or "euclidean"}
+
+    # the parsed matrix can be weighted in place unless json_table needs it below
+    overwrite = table is not None or accept == JSON
+    rows = None
+    if k is None:
+        scores, ranks = rank(matrix, weights, impacts, overwrite=overwrite, **kernels)
+    else:
+        rows, scores, ranks = select_best(matrix, weights, impacts, k, overwrite=overwrite, **kernels)
+
+    if table is None and accept != JSON:
+        table = json_table(names, matrix, params.get("columns"))
+    if accept == CSV:
+        return CSV, write_csv(table, scores, ranks, rows)
+    if accept == ARROW:
+        return ARROW, write_arrow(table, scores, ranks, rows)
+
+    result = {"scores": scores.tolist(), "ranks": ranks.tolist()}
+    if rows is not None:
+        result["rows"] = rows.tolist()
+    if names is not None:
+        result["names"] = list(names) if rows is None else [names[i] for i in rows]
+    return JSON, json.dumps(result).encode()
+
+
+def _media_type(header, default=None):
+    if not header:
+        return default
+    return header.split(";")[0].strip().lower()
+
+
+def _accept(header):
+    for media in (header or "").split(","):
+        media = _media_type(media)
+        if media in (JSON, CSV, ARROW):
+            return media
+    return JSON
+
+
+class TopsisHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "topsis"
+    # headers and body are separate writes; with Nagle on, keep-alive
+    # clients wait out the delayed ACK on every response
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # idle keep-alive connections are closed after this many seconds
+        self.timeout = self.server.keepalive
+        super().setup()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def log_exception(self):
+        """Print the current exception to stderr, even when not verbose."""
+        sys.stderr.write(f"Unexpected error handling {self.command} {self.path}:\n")
+        traceback.print_exc()
+
+    def send_body(self, status, content_type, body, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, obj, headers=()):
+        self.send_body(status, JSON, json.dumps(obj).encode(), headers)
+
+    def send_error_json(self, status, message, headers=()):
+        self.server.count("errors")
+        self.send_json(status, {"error": message}, headers)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        parts = path.strip("/").split("/")
+        if path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif path == "/stats":
+            self.send_json(200, self.server.stats())
+        elif parts[0] == "jobs" and len(parts) in (2, 3) and parts[2:] in ([], ["result"]):
+            self.get_job(parts[1], result=len(parts) == 3)
+        else:
+            self.send_error_json(404, f"Unknown path '{path}'.")
+
+    def get_job(self, job_id, result=False):
+        meta = self.server.jobs.status(job_id)
+        if meta is None:
+            self.send_error_json(404, f"Unknown or expired job '{job_id}'.")
+        elif not result:
+            self.send_json(200, meta)
+        elif meta["status"] == FAILED:
+            self.send_error_json(409, f"Job failed: {meta['error']}")
+        elif meta["status"] != DONE:
+            self.send_error_json(409, f"Job is {meta['status']}.", [("Retry-After", "1")])
+        else:
+            found = self.server.jobs.result(job_id)
+            if found is None:
+                self.send_error_json(404, f"Unknown or expired job '{job_id}'.")
+            else:
+                self.send_body(200, *found)
+
+    def read_body(self):
+        """The request body, or None after answering 411/413/415."""
+        length = self.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            self.close_connection = True
+            self.send_error_json(411, "Content-Length is required.")
+            return None
+        if int(length) > self.server.max_body:
+            # the body is not read, so the connection cannot be reused
+            self.close_connection = True
+            self.send_error_json(413, f"Request body larger than {self.server.max_body} bytes.")
+            return None
+        body = self.rfile.read(int(length))
+
+        content_type = _media_type(self.headers.get("Content-Type"), JSON)
+        if content_type not in CONTENT_TYPES:
+            self.send_error_json(415, f"Unsupported content type '{content_type}'. Use {JSON}, {CSV} or {ARROW}.")
+            return None
+        return content_type, body
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path not in ("/rank", "/jobs"):
+            self.close_connection = True
+            self.send_error_json(404, f"Unknown path '{path}'.")
+            return
+
+        request = self.read_body()
+        if request is None:
+            return
+        content_type, body = request
+        self.server.count("requests")
+        args = (content_type, body, parse_query(self.path), _accept(self.headers.get("Accept")))
+
+        if path == "/jobs":
+            try:
+                job_id = self.server.jobs.submit(handle_rank, *args)
+            except QueueFull:
+                self.server.count("rejected")
+                self.send_error_json(429, "Too many queued jobs, retry later.", [("Retry-After", "5")])
+            else:
+                self.send_json(202, {"id": job_id, "status": QUEUED}, [("Location", f"/jobs/{job_id}")])
+            return
+
+        try:
+            result_type, payload = self.server.run(handle_rank, *args)
+        except Saturated:
+            self.server.count("rejected")
+            self.send_error_json(429, "Server is busy, retry later.", [("Retry-After", "1")])
+        except TopsisError as e:
+            self.send_error_json(400, str(e))
+        except Exception:
+            # not the client's fault: leave a traceback for the operator
+            self.log_exception()
+            self.send_error_json(500, "Internal server error.")
+        else:
+            self.send_body(200, result_type, payload)
+
+
+class TopsisServer(ThreadingHTTPServer):
+    """
+    HTTP server scoring on a pool of worker threads. At most
+    workers + max_queue requests are admitted at a time; the rest get 429.
+    POST /jobs runs on a separate JobQueue whose results are kept in
+    job_store (a JobStore; a temporary directory by default).
+
+    server = TopsisServer(('127.0.0.1', 0), workers=4)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ...
+    server.shutdown(); server.server_close()
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, workers=None, max_queue=DEFAULT_MAX_QUEUE, max_body=DEFAULT_MAX_BODY,
+                 keepalive=DEFAULT_KEEPALIVE, verbose=False, job_store=None):
+        if workers is not None and workers < 1:
+            raise ParameterError("workers must be a positive integer.")
+        if max_queue < 0:
+            raise ParameterError("max_queue must not be negative.")
+
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.max_body = max_body
+        self.keepalive = keepalive
+        self.verbose = verbose
+        self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="topsis-worker")
+        self._slots = threading.BoundedSemaphore(self.workers + max_queue)
+        self.jobs = JobQueue(job_store, workers=self.workers)
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "rejected": 0, "errors": 0}
+        super().__init__(address, TopsisHandler)
+
+    def count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts, workers=self.workers, max_queue=self.max_queue)
+
+    def run(self, func, *args):
+        """Run func on the worker pool and wait for it; Saturated when full."""
+        if not self._slots.acquire(blocking=False):
+            raise Saturated()
+        try:
+            future = self.pool.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def handle_error(self, request, client_address):
+        # clients hanging up mid-response are routine for a service
+        if isinstance(sys.exc_info()[1], ConnectionError) and not self.verbose:
+            return
+        super().handle_error(request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+        self.jobs.shutdown(wait=True)
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, **kwargs):
+    """Run a TopsisServer until interrupted."""
+    server = TopsisServer((host, port), **kwargs)
+    print(f"Serving TOPSIS on http://{host}:{server.server_address[1]} "
+          f"({server.workers} workers, queue {server.max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,219 @@
+"""
+Streaming (out-of-core) TOPSIS for CSV files larger than memory.
+
+Pass 1 reads the file once, chunk by chunk, to accumulate the column sums of
+squares and the per-column extremes. Pass 2 reads it again to compute scores
+chunk by chunk, spilling them to disk for the external ranking stage (see
+ranking.py). Pass 3 writes the original rows with their score and rank to the
+output file. Peak memory depends on chunksize and memory_budget, not on the
+number of rows.
+"""
+
+import os
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .defaults import DEFAULT_CHUNKSIZE
+from .engine import (InputError, NormalizationError, OutputError, ParameterError,
+                     as_impacts, as_weights, closeness)
+from .profiling import stage
+from .ranking import (DEFAULT_MEMORY_BUDGET, RUN_DTYPE, RunWriter, TopKSelector,
+                      external_dense_rank)
+
+ColumnStats = namedtuple("ColumnStats", ["n_rows", "columns", "sumsq", "col_max", "col_min"])
+
+
+def read_header(input_file):
+    """Return the column names of a CSV file, validating the basic layout."""
+    if not os.path.exists(input_file):
+        raise InputError("File not found.")
+
+    try:
+        columns = list(pd.read_csv(input_file, nrows=0).columns)
+    except Exception:
+        raise InputError("Unable to read input file. Ensure it is a valid CSV.")
+
+    if len(columns) < 3:
+        raise InputError("Input file must contain three or more columns.")
+
+    return columns
+
+
+def iter_frames(input_file, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield (offset, frame) for consecutive row chunks of a CSV file."""
+    try:
+        reader = pd.read_csv(input_file, chunksize=chunksize)
+    except Exception:
+        raise InputError("Unable to read input file. Ensure it is a valid CSV.")
+
+    offset = 0
+    with reader:
+        while True:
+            try:
+                df = next(reader)
+            except StopIteration:
+                return
+            except Exception:
+                raise InputError(f"Unable to read input file near row {offset + 1}. Ensure it is a valid CSV.")
+
+            yield offset, df
+            offset += len(df)
+
+
+def iter_chunks(input_file, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Yield (offset, frame, data) for consecutive row chunks of a CSV file,
+    where data is the float64 criteria block of frame.
+    """
+    for offset, df in iter_frames(input_file, chunksize):
+        data = df.iloc[:, 1:].apply(pd.to_numeric, errors="coerce")
+        bad = data.isnull().to_numpy()
+        if bad.any():
+            row, col = np.argwhere(bad)[0]
+            raise InputError(
+                "From 2nd to last columns must contain numeric values only "
+                f"(row {offset + row + 1}, column '{data.columns[col]}')."
+            )
+
+        yield offset, df, data.to_numpy(dtype=np.float64)
+
+
+def column_stats(input_file, chunksize=DEFAULT_CHUNKSIZE):
+    """Pass 1: accumulate sums of squares and column extremes over the file."""
+    columns = read_header(input_file)
+    n_criteria = len(columns) - 1
+
+    n_rows = 0
+    sumsq = np.zeros(n_criteria)
+    col_max = np.full(n_criteria, -np.inf)
+    col_min = np.full(n_criteria, np.inf)
+
+    for _, _, data in iter_chunks(input_file, chunksize):
+        if data.shape[0] == 0:
+            # a header-only file yields one empty chunk
+            continue
+        n_rows += data.shape[0]
+        sumsq += np.einsum("ij,ij->j", data, data)
+        np.maximum(col_max, data.max(axis=0), out=col_max)
+        np.minimum(col_min, data.min(axis=0), out=col_min)
+
+    if n_rows == 0:
+        raise InputError("Input file contains no alternatives.")
+
+    return ColumnStats(n_rows, columns, sumsq, col_max, col_min)
+
+
+def stream_ideals(stats, weights, signs):
+    """
+    Scale factors and ideal points from pass 1 statistics.
+
+    The weighted matrix is data * scale with scale > 0, so its column extremes
+    are exactly the raw column extremes times scale.
+    """
+    norms = np.sqrt(stats.sumsq)
+    if (norms == 0).any():
+        raise NormalizationError("Normalization error: one or more criteria columns have all zeros.")
+
+    scale = weights / norms
+    w_max = stats.col_max * scale
+    w_min = stats.col_min * scale
+    ideal_best = np.where(signs > 0, w_max, w_min)
+    ideal_worst = np.where(signs > 0, w_min, w_max)
+    return scale, ideal_best, ideal_worst
+
+
+def iter_scores(input_file, weights, impacts, chunksize=DEFAULT_CHUNKSIZE, stats=None):
+    """
+    Run both passes and yield (offset, frame, scores) chunk by chunk.
+
+    Scores are closeness values in 0..1, identical to engine.score() on the
+    whole matrix up to rounding of the sums of squares.
+    """
+    if stats is None:
+        stats = column_stats(input_file, chunksize)
+
+    n_criteria = len(stats.columns) - 1
+    weights = as_weights(weights, n_criteria)
+    signs = as_impacts(impacts, n_criteria)
+    scale, ideal_best, ideal_worst = stream_ideals(stats, weights, signs)
+
+    for offset, df, data in iter_chunks(input_file, chunksize):
+        yield offset, df, closeness(data * scale, ideal_best, ideal_worst)
+
+
+def topsis_stream(input_file, weights, impacts, output_file, chunksize=DEFAULT_CHUNKSIZE,
+                  memory_budget=DEFAULT_MEMORY_BUDGET, top_k=None, tmpdir=None):
+    """
+    Score and rank a CSV file in bounded memory and write the original rows
+    plus 'Topsis Score' and 'Rank' columns to output_file.
+
+    Ranks are exact dense ranks, computed by an external merge sort whose
+    in-memory buffers stay within memory_budget bytes; temporary files go to
+    tmpdir. With top_k, only the k best rows are kept (in O(k) memory) and
+    written best first. Returns the number of rows written.
+    """
+    with stage("stats"):
+        stats = column_stats(input_file, chunksize)
+
+    if top_k is not None:
+        return _write_top_k(input_file, weights, impacts, output_file, chunksize, stats, top_k)
+
+    # half the budget for building runs, half for the merge buffers
+    run_rows = memory_budget // (2 * RUN_DTYPE.itemsize)
+
+    with tempfile.TemporaryDirectory(prefix="topsis-", dir=tmpdir) as workdir:
+        scores = np.lib.format.open_memmap(os.path.join(workdir, "scores.npy"), mode="w+",
+                                           dtype=np.float64, shape=(stats.n_rows,))
+        ranks = np.lib.format.open_memmap(os.path.join(workdir, "ranks.npy"), mode="w+",
+                                          dtype=np.int64, shape=(stats.n_rows,))
+
+        runs = RunWriter(workdir, run_rows)
+        with stage("score", rows=stats.n_rows):
+            for offset, _, chunk in iter_scores(input_file, weights, impacts, chunksize, stats):
+                scores[offset:offset + len(chunk)] = chunk
+                runs.add(chunk, offset)
+
+        with stage("rank", rows=stats.n_rows):
+            paths = runs.finish()
+            external_dense_rank(paths, ranks, run_rows // max(1, len(paths)))
+
+        header = True
+        with stage("write", rows=stats.n_rows):
+            try:
+                with open(output_file, "w", newline="") as out:
+                    for offset, df in iter_frames(input_file, chunksize):
+                        stop = offset + len(df)
+                        df["Topsis Score"] = np.round(scores[offset:stop] * 100, 2)
+                        df["Rank"] = ranks[offset:stop]
+                        df.to_csv(out, index=False, header=header)
+                        header = False
+            except OSError:
+                raise OutputError("Unable to write output file.")
+
+        del scores, ranks
+
+    return stats.n_rows
+
+
+def _write_top_k(input_file, weights, impacts, output_file, chunksize, stats, top_k):
+    if top_k < 1:
+        raise ParameterError("top_k must be a positive integer.")
+
+    best = TopKSelector(top_k)
+    with stage("score", rows=stats.n_rows):
+        for offset, df, chunk in iter_scores(input_file, weights, impacts, chunksize, stats):
+            best.add(chunk, offset, df, concat=lambda a, b: pd.concat([a, b], ignore_index=True))
+
+    scores, _, ranks, result = best.result()
+    result["Topsis Score"] = np.round(scores * 100, 2)
+    result["Rank"] = ranks
+
+    try:
+        result.to_csv(output_file, index=False)
+    except OSError:
+        raise OutputError("Unable to write output file.")
+
+    return len(result)
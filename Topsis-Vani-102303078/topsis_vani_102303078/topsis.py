@@ -1,7 +1,17 @@
 import sys
 import os
-import pandas as pd
-import numpy as np
+import re
+import argparse
+
+from .defaults import (DEFAULT_CHUNKSIZE, DEFAULT_KEEPALIVE, DEFAULT_MAX_BODY, DEFAULT_MAX_QUEUE, DEFAULT_PORT,
+                       DISTANCES, DTYPES, GROUP_AGGREGATES, GROUP_LEVELS, GROUP_MEMORY_BUDGET, JOB_TTL,
+                       NORMALIZATIONS, RANKING_MEMORY_BUDGET, SENSITIVITY_MEMORY_BUDGET)
+from . import daemon
+
+
+# weights/impacts such as "-,+,+" or "-1,2": a single leading '-', a comma, and
+# nothing but numbers, signs and separators
+_LIST_ARG = re.compile(r"-(?!-)[\d.eE+\-, ]*,[\d.eE+\-, ]*")
 
 
 def error_exit(msg):
@@ -9,124 +19,294 @@ def error_exit(msg):
     sys.exit(1)
 
 
-def parse_weights_impacts(weights_str, impacts_str, n_cols):
-    # check comma separated
-    if "," not in weights_str or "," not in impacts_str:
-        error_exit("Impacts and weights must be separated by ',' (comma).")
-
+def protect_lists(argv):
+    """
+    Prefix weights/impacts that start with '-' with a space, so argparse does
+    not take them for options (the values are stripped when parsed). Options
+    such as --criteria=P1,P2 are left alone.
+    """
+    return [f" {arg}" if _LIST_ARG.fullmatch(arg) else arg for arg in argv]
+
+
+def topsis(input_file, weights_str, impacts_str, output_file, top_k=None, workers=None, criteria=None,
+           dtype=None, normalization="vector", distance="euclidean"):
+    """Rank the alternatives in input_file and write the result to output_file (see commands.topsis)."""
+    from . import commands
+    commands.topsis(input_file, weights_str, impacts_str, output_file, top_k=top_k, workers=workers,
+                    criteria=criteria, dtype=dtype, normalization=normalization, distance=distance)
+
+
+def add_kernel_arguments(parser):
+    parser.add_argument("--normalization", choices=NORMALIZATIONS, default=NORMALIZATIONS[0],
+                        help="normalization scheme (default: %(default)s)")
+    parser.add_argument("--distance", default=DISTANCES[0], metavar="METRIC",
+                        help=f"distance to the ideal points: {', '.join(DISTANCES)} (default: %(default)s)")
+
+
+class ArgumentParser(argparse.ArgumentParser):
+    def error(self, message):
+        error_exit(f"{message}\n{self.format_usage().strip()}")
+
+
+def build_parser():
+    parser = ArgumentParser(prog="topsis", description="Rank alternatives with TOPSIS. Input and output "
+                                                       "may be CSV, Parquet (.parquet) or Feather (.feather, .arrow).",
+                            epilog="Use 'topsis convert <InputDataFile> <OutputMatrixFile>' to create a binary "
+                                   "matrix file, which can then be passed as InputDataFile, 'topsis sensitivity' "
+                                   "to check how stable a ranking is, 'topsis serve' to run the HTTP scoring "
+                                   "service, 'topsis batch' to rank many files in one process, 'topsis group' to "
+                                   "combine several evaluators' ratings, and 'topsis --daemon' to serve repeated "
+                                   "calls from a warm process.")
+    parser.add_argument("input_file", metavar="InputDataFile")
+    parser.add_argument("weights", metavar="Weights")
+    parser.add_argument("impacts", metavar="Impacts")
+    parser.add_argument("output_file", metavar="OutputFileName")
+    parser.add_argument("--chunksize", type=int, default=None, metavar="N",
+                        help="stream the input N rows at a time for files larger than memory")
+    parser.add_argument("--memory-budget", type=int, default=RANKING_MEMORY_BUDGET // 2 ** 20, metavar="MB",
+                        help="memory for the external ranking stage in streaming mode (default: %(default)s)")
+    parser.add_argument("--top-k", type=int, default=None, metavar="K",
+                        help="write only the K best alternatives, best first")
+    parser.add_argument("--criteria", default=None, metavar="COLS",
+                        help="comma separated criteria columns to load (default: every column after the first)")
+    parser.add_argument("--profile", nargs="?", const="-", default=None, metavar="PATH",
+                        help="record per-stage wall time, CPU time and rows as JSON lines "
+                             "(to stderr, or appended to PATH)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="with --profile, also record bytes allocated per stage (tracemalloc; slow)")
+    parser.add_argument("--jobs", type=int, default=None, metavar="N",
+                        help="score row blocks on N threads (in-memory mode)")
+    parser.add_argument("--dtype", choices=DTYPES, default="float64",
+                        help="working precision (in-memory mode); float32 halves memory, "
+                             "scores agree to within 5e-7 (default: %(default)s)")
+    add_kernel_arguments(parser)
+    return parser
+
+
+def build_convert_parser():
+    parser = ArgumentParser(prog="topsis convert",
+                            description="Convert a CSV file to the binary matrix format for fast repeated runs.")
+    parser.add_argument("input_file", metavar="InputDataFile")
+    parser.add_argument("output_file", metavar="OutputMatrixFile")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, metavar="N",
+                        help="rows parsed at a time (default: %(default)s)")
+    return parser
+
+
+def build_serve_parser():
+    parser = ArgumentParser(prog="topsis serve", description="Run the TOPSIS HTTP scoring service.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="default: %(default)s")
+    parser.add_argument("--workers", type=int, default=None, metavar="N",
+                        help="scoring threads (default: number of CPUs)")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, metavar="N",
+                        help="requests allowed to wait for a worker before answering 429 (default: %(default)s)")
+    parser.add_argument("--max-body", type=int, default=DEFAULT_MAX_BODY // 2 ** 20, metavar="MB",
+                        help="largest accepted request body (default: %(default)s)")
+    parser.add_argument("--keepalive", type=float, default=DEFAULT_KEEPALIVE, metavar="SECONDS",
+                        help="close idle connections after this long (default: %(default)s)")
+    parser.add_argument("--jobs-dir", default=None, metavar="DIR",
+                        help="where POST /jobs results are kept (default: a temporary directory)")
+    parser.add_argument("--job-ttl", type=int, default=JOB_TTL, metavar="SECONDS",
+                        help="how long finished job results are kept (default: %(default)s)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    return parser
+
+
+def build_sensitivity_parser():
+    parser = ArgumentParser(prog="topsis sensitivity",
+                            description="How stable is the ranking under changes to the weights?")
+    parser.add_argument("input_file", metavar="InputDataFile")
+    parser.add_argument("weights", metavar="Weights")
+    parser.add_argument("impacts", metavar="Impacts")
+    parser.add_argument("--samples", type=int, default=10_000, metavar="N",
+                        help="random weight vectors to score (default: %(default)s)")
+    parser.add_argument("--concentration", type=float, default=None, metavar="C",
+                        help="sample around Weights (Dirichlet, larger = closer) instead of uniformly")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--factor", type=float, default=100.0, metavar="F",
+                        help="search each weight between weight/F and weight*F for rank-1 changes "
+                             "(default: %(default)s)")
+    parser.add_argument("--top", type=int, default=10, metavar="N",
+                        help="alternatives to list by rank-1 probability (default: %(default)s)")
+    parser.add_argument("--memory-budget", type=int, default=SENSITIVITY_MEMORY_BUDGET // 2 ** 20,
+                        metavar="MB", help="memory per batch of samples (default: %(default)s)")
+    return parser
+
+
+def build_batch_parser():
+    parser = ArgumentParser(prog="topsis batch",
+                            description="Rank many input files in one process, from a manifest (CSV, JSON or YAML "
+                                        "list of input, weights, impacts, output and optional top_k and criteria) "
+                                        "or a glob with shared weights and impacts.")
+    parser.add_argument("manifest", nargs="?", default=None, metavar="MANIFEST")
+    parser.add_argument("--glob", default=None, metavar="PATTERN",
+                        help="rank every file matching PATTERN instead of reading a manifest")
+    parser.add_argument("--weights", default=None, help="weights for jobs that do not set them")
+    parser.add_argument("--impacts", default=None, help="impacts for jobs that do not set them")
+    parser.add_argument("--output-dir", default=None, metavar="DIR",
+                        help="where --glob results are written, under the input file names")
+    parser.add_argument("--top-k", type=int, default=None, metavar="K",
+                        help="write only the K best alternatives for jobs that do not set top_k")
+    parser.add_argument("--workers", type=int, default=None, metavar="N",
+                        help="jobs run at once (default: up to 4)")
+    parser.add_argument("--dtype", choices=DTYPES, default="float64", help="working precision (default: %(default)s)")
+    add_kernel_arguments(parser)
+    parser.add_argument("--summary", default=None, metavar="PATH",
+                        help="also write the summary, with one record per job, as JSON")
+    parser.add_argument("--quiet", action="store_true", help="only print failed jobs and the summary")
+    return parser
+
+
+def build_group_parser():
+    parser = ArgumentParser(prog="topsis group",
+                            description="Rank alternatives rated by several evaluators. Give one input file per "
+                                        "evaluator, one long-format CSV file with --evaluator-column, or a .npy "
+                                        "stack (evaluators x alternatives x criteria).")
+    parser.add_argument("input_files", nargs="+", metavar="InputDataFile")
+    parser.add_argument("weights", metavar="Weights")
+    parser.add_argument("impacts", metavar="Impacts")
+    parser.add_argument("output_file", metavar="OutputFileName")
+    parser.add_argument("--level", choices=GROUP_LEVELS, default=GROUP_LEVELS[0],
+                        help="aggregate every evaluator's TOPSIS scores, or their matrices before one TOPSIS run "
+                             "(default: %(default)s)")
+    parser.add_argument("--aggregate", choices=GROUP_AGGREGATES, default=GROUP_AGGREGATES[0],
+                        help="arithmetic or geometric mean, or Borda count (scores level only) "
+                             "(default: %(default)s)")
+    parser.add_argument("--evaluator-column", default=None, metavar="COL",
+                        help="the input is one long-format file; COL names the evaluator of each row")
+    parser.add_argument("--criteria", default=None, metavar="COLS",
+                        help="comma separated criteria columns to load from per-evaluator files")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, metavar="N",
+                        help="rows of a long-format file parsed at a time (default: %(default)s)")
+    parser.add_argument("--memory-budget", type=int, default=GROUP_MEMORY_BUDGET // 2 ** 20, metavar="MB",
+                        help="memory for scoring a chunk of evaluators (default: %(default)s)")
+    add_kernel_arguments(parser)
+    return parser
+
+
+def build_daemon_parser():
+    parser = ArgumentParser(prog="topsis --daemon",
+                            description="Serve repeated topsis calls from one warm process over a Unix socket. "
+                                        f"Calls are sent to it when {daemon.SOCKET_ENV} is set to the socket path.")
+    parser.add_argument("--socket", default=None, metavar="PATH",
+                        help="socket to listen on (default: topsis-<uid>.sock in the temporary directory)")
+    return parser
+
+
+def topsis_daemon(args):
+    if not hasattr(os, "fork"):
+        error_exit("--daemon needs a POSIX system.")
+    path = args.socket or daemon.default_path()
+
+    # load NumPy, pandas and the engine once; forked children inherit them
+    from . import commands  # noqa: F401
     try:
-        weights = [float(x.strip()) for x in weights_str.split(",")]
-    except:
-        error_exit("Weights must be numeric and comma separated.")
-
-    impacts = [x.strip() for x in impacts_str.split(",")]
-
-    if len(weights) != n_cols:
-        error_exit("Number of weights must be equal to number of columns (from 2nd to last).")
-
-    if len(impacts) != n_cols:
-        error_exit("Number of impacts must be equal to number of columns (from 2nd to last).")
-
-    for imp in impacts:
-        if imp not in ["+", "-"]:
-            error_exit("Impacts must be either '+' or '-' only.")
-
-    if any(w <= 0 for w in weights):
-        error_exit("Weights must be positive numbers.")
+        listener = daemon.listen(path)
+    except OSError as e:
+        error_exit(f"Unable to start daemon: {e.strerror or e}.")
 
-    return np.array(weights, dtype=float), impacts
-
-
-def topsis(input_file, weights_str, impacts_str, output_file):
-    # File check
-    if not os.path.exists(input_file):
-        error_exit("File not found.")
-
-    # Read file
+    print(f"Listening on {path} (export {daemon.SOCKET_ENV}={path}); Ctrl+C or SIGTERM to stop", flush=True)
     try:
-        df = pd.read_csv(input_file)
-    except:
-        error_exit("Unable to read input file. Ensure it is a valid CSV.")
-
-    # Column check (>=3 columns)
-    if df.shape[1] < 3:
-        error_exit("Input file must contain three or more columns.")
-
-    # criteria matrix = from 2nd column to last
-    data = df.iloc[:, 1:].copy()
-
-    # numeric check
-    for col in data.columns:
-        data[col] = pd.to_numeric(data[col], errors="coerce")
-
-    if data.isnull().any().any():
-        error_exit("From 2nd to last columns must contain numeric values only.")
-
-    n_criteria = data.shape[1]
-
-    # validate weights & impacts
-    weights, impacts = parse_weights_impacts(weights_str, impacts_str, n_criteria)
-
-    # Step 1: Normalize
-    denom = np.sqrt((data ** 2).sum(axis=0))
-    if (denom == 0).any():
-        error_exit("Normalization error: one or more criteria columns have all zeros.")
-
-    norm_data = data / denom
-
-    # Step 2: Weighted normalized matrix
-    weighted = norm_data * weights
-
-    # Step 3: Ideal best and ideal worst
-    ideal_best = []
-    ideal_worst = []
-
-    for j in range(n_criteria):
-        col_vals = weighted.iloc[:, j].values
-        if impacts[j] == "+":
-            ideal_best.append(col_vals.max())
-            ideal_worst.append(col_vals.min())
-        else:
-            ideal_best.append(col_vals.min())
-            ideal_worst.append(col_vals.max())
-
-    ideal_best = np.array(ideal_best)
-    ideal_worst = np.array(ideal_worst)
-
-    # Step 4: Distances
-    dist_best = np.sqrt(((weighted - ideal_best) ** 2).sum(axis=1))
-    dist_worst = np.sqrt(((weighted - ideal_worst) ** 2).sum(axis=1))
-
-    # Step 5: TOPSIS score
-    score = dist_worst / (dist_best + dist_worst)
-
-    # Ranking (higher score -> better rank 1)
-    rank = score.rank(ascending=False, method="dense").astype(int)
-
-    # Output
-    result = df.copy()
-    result["Topsis Score"] = np.round(score * 100, 2)  # like sample output
-    result["Rank"] = rank
-
+        daemon.serve(listener, run)
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    # hand the call to a warm daemon when one is configured and answers
+    socket_path = os.environ.get(daemon.SOCKET_ENV)
+    if socket_path and argv[:1] != ["--daemon"]:
+        code = daemon.forward(socket_path, argv)
+        if code is not None:
+            if code:
+                sys.exit(code)
+            return
+
+    run(argv)
+
+
+def run(argv):
+    # the commands (and NumPy/pandas) are only imported once the arguments parse
+    if argv[:1] == ["--daemon"]:
+        topsis_daemon(build_daemon_parser().parse_args(argv[1:]))
+        return
+
+    if argv[:1] == ["convert"]:
+        args = build_convert_parser().parse_args(argv[1:])
+        if args.chunksize < 1:
+            error_exit("--chunksize must be a positive integer.")
+        from . import commands
+        commands.topsis_convert(args.input_file, args.output_file, args.chunksize)
+        return
+
+    if argv[:1] == ["sensitivity"]:
+        argv = protect_lists(argv)
+        args = build_sensitivity_parser().parse_args(argv[1:])
+        from . import commands
+        commands.topsis_sensitivity(args)
+        return
+
+    if argv[:1] == ["batch"]:
+        argv = protect_lists(argv)
+        args = build_batch_parser().parse_args(argv[1:])
+        if (args.manifest is None) == (args.glob is None):
+            error_exit("Give either a manifest or --glob.")
+        if args.glob is not None and None in (args.weights, args.impacts, args.output_dir):
+            error_exit("--glob needs --weights, --impacts and --output-dir.")
+        if args.workers is not None and args.workers < 1:
+            error_exit("--workers must be a positive integer.")
+        if args.top_k is not None and args.top_k < 1:
+            error_exit("--top-k must be a positive integer.")
+        from . import commands
+        commands.topsis_batch(args)
+        return
+
+    if argv[:1] == ["group"]:
+        argv = protect_lists(argv)
+        args = build_group_parser().parse_args(argv[1:])
+        if len(args.input_files) > 1 and (args.evaluator_column is not None or
+                                          any(path.endswith(".npy") for path in args.input_files)):
+            error_exit("A long-format file or a .npy stack must be the only input.")
+        if args.chunksize < 1:
+            error_exit("--chunksize must be a positive integer.")
+        if args.memory_budget < 1:
+            error_exit("--memory-budget must be a positive integer.")
+        from . import commands
+        commands.topsis_group(args)
+        return
+
+    if argv[:1] == ["serve"]:
+        args = build_serve_parser().parse_args(argv[1:])
+        from . import commands
+        commands.topsis_serve(args)
+        return
+
+    argv = protect_lists(argv)
+    args = build_parser().parse_args(argv)
+
+    if args.jobs is not None and args.jobs < 1:
+        error_exit("--jobs must be a positive integer.")
+
+    criteria = None
+    if args.criteria is not None:
+        criteria = [c.strip() for c in args.criteria.split(",") if c.strip()]
+
+    from . import commands
+    if args.profile is None and not args.profile_memory:
+        commands.dispatch(args, criteria)
+        return
+
+    from .profiling import JsonLinesSink, Profiler
+    stream = sys.stderr if args.profile in (None, "-") else open(args.profile, "a")
     try:
-        result.to_csv(output_file, index=False)
-    except:
-        error_exit("Unable to write output file.")
-
-    print(f"Success: TOPSIS result saved to '{output_file}'")
-
-
-def main():
-    # Argument check
-    if len(sys.argv) != 5:
-        error_exit("Incorrect number of parameters.\nUsage: topsis <InputDataFile> <Weights> <Impacts> <OutputFileName>")
-
-    input_file = sys.argv[1]
-    weights_str = sys.argv[2]
-    impacts_str = sys.argv[3]
-    output_file = sys.argv[4]
-
-    topsis(input_file, weights_str, impacts_str, output_file)
+        with Profiler(sink=JsonLinesSink(stream), trace_memory=args.profile_memory):
+            commands.dispatch(args, criteria)
+    finally:
+        if stream is not sys.stderr:
+            stream.close()
 
 
 if __name__ == "__main__":
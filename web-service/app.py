@@ -2,14 +2,32 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import re
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
+import hashlib
 import io
 import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from functools import partial
+import sys
+
+# Use the TOPSIS engine from the package in this repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Topsis-Vani-102303078'))
+from topsis_vani_102303078.engine import InputError, rank, top_k as select_best
+from topsis_vani_102303078.cache import NormCache
+from topsis_vani_102303078.jobs import DONE, FAILED, SENT, JobQueue, JobStore, QueueFull
+from topsis_vani_102303078.mailer import Mailer
+from topsis_vani_102303078.loader import frame_matrix
+
+# Rows per page in data and result tables
+PREVIEW_ROWS = 200
+
+# Remembered (dataset, weights, impacts, top K) -> job results
+RESULT_ENTRIES = 32
 
 # Page configuration
 st.set_page_config(
@@ -77,7 +95,18 @@ with st.sidebar:
     3. Enter impacts (+/- for each criterion)
     4. Provide your email
     5. Click Calculate & Send
+
+    Large files run as background jobs. Keep the job ID to check on
+    them later, until the results expire.
     """)
+
+    st.header("🔎 Find a Job")
+    st.text_input(
+        "Job ID",
+        key='lookup_id',
+        help="The ID shown after submitting a calculation",
+        on_change=lambda: st.session_state.update(job_id=st.session_state['lookup_id'].strip())
+    )
     
     st.header("📝 Input Format")
     st.write("""
@@ -149,79 +178,158 @@ def parse_inputs(weights_str, impacts_str, n_cols):
     return np.array(weights, dtype=float), impacts, []
 
 
-def topsis(df, weights, impacts):
-    """Perform TOPSIS analysis"""
-    # Extract data
-    names = df.iloc[:, 0].values
-    data = df.iloc[:, 1:].values.astype(float)
-    
-    # Step 1: Normalize
-    denom = np.sqrt((data ** 2).sum(axis=0))
-    if (denom == 0).any():
-        raise ValueError("One or more criteria columns have all zeros")
-    
-    normalized = data / denom
-    
-    # Step 2: Weighted normalized matrix
-    weighted = normalized * weights
-    
-    # Step 3: Ideal best and worst
-    ideal_best = []
-    ideal_worst = []
-    
-    for j, impact in enumerate(impacts):
-        if impact == "+":
-            ideal_best.append(weighted[:, j].max())
-            ideal_worst.append(weighted[:, j].min())
-        else:
-            ideal_best.append(weighted[:, j].min())
-            ideal_worst.append(weighted[:, j].max())
-    
-    ideal_best = np.array(ideal_best)
-    ideal_worst = np.array(ideal_worst)
-    
-    # Step 4: Distances
-    dist_best = np.sqrt(((weighted - ideal_best) ** 2).sum(axis=1))
-    dist_worst = np.sqrt(((weighted - ideal_worst) ** 2).sum(axis=1))
-    
-    # Step 5: TOPSIS Score
-    scores = dist_worst / (dist_best + dist_worst)
-    
-    # Step 6: Ranking
-    ranks = scores.argsort()[::-1].argsort() + 1
-    
+@st.cache_resource
+def get_norm_cache():
+    """Column norms shared across reruns and sessions, keyed by upload digest (see NormCache.keyed)"""
+    return NormCache(max_bytes=64 * 2 ** 20)
+
+
+def topsis(df, weights, impacts, top_k=None, cache=None, data=None):
+    """Perform TOPSIS analysis (optionally only for the top_k best alternatives)"""
+    if data is None:
+        data = df.iloc[:, 1:].to_numpy(dtype=float)
+    if cache is None:
+        cache = get_norm_cache()
+
+    if top_k:
+        rows, scores, ranks = select_best(data, weights, impacts, top_k, cache=cache)
+        result = df.iloc[rows].reset_index(drop=True)
+    else:
+        scores, ranks = rank(data, weights, impacts, cache=cache)
+        result = df.copy()
+
     # Create result dataframe
-    result = df.copy()
     result['Topsis Score'] = (scores * 100).round(2)
     result['Rank'] = ranks
-    
+
     return result
 
 
-def send_email(recipient_email, result_df, smtp_config=None):
-    """Send email with results"""
+def run_job(df, data, weights, impacts, top_k, cache):
+    """Background job: TOPSIS result as CSV bytes"""
+    result_df = topsis(df, weights, impacts, top_k=top_k, cache=cache, data=data)
+    return 'text/csv', result_df.to_csv(index=False).encode()
+
+
+def upload_digest(uploaded_file):
+    """Content hash of an upload, computed once per uploaded file"""
+    digests = st.session_state.setdefault('upload_digests', {})
+    if uploaded_file.file_id not in digests:
+        digests[uploaded_file.file_id] = hashlib.blake2b(uploaded_file.getvalue(), digest_size=16).hexdigest()
+    return digests[uploaded_file.file_id]
+
+
+@st.cache_resource(max_entries=8, show_spinner="📂 Reading file...")
+def parse_upload(digest, name, _uploaded_file):
+    """(df, criteria matrix, error) of an upload, cached by content hash; shared, so read-only"""
+    _uploaded_file.seek(0)
+    if name.endswith('.csv'):
+        df = pd.read_csv(_uploaded_file)
+    else:
+        df = pd.read_excel(_uploaded_file)
+
+    if df.shape[1] < 3:
+        return df, None, "File must contain at least 3 columns (1 for names + 2 criteria)"
     try:
-        # Convert dataframe to CSV
-        csv_buffer = io.StringIO()
-        result_df.to_csv(csv_buffer, index=False)
-        csv_content = csv_buffer.getvalue()
-        
-        # Email configuration (using environment variables for security)
-        sender_email = os.getenv('SMTP_EMAIL', 'topsis.service@gmail.com')
-        sender_password = os.getenv('SMTP_PASSWORD', '')
-        
-        # If no SMTP config provided, return CSV content for download
-        if not sender_password:
-            return csv_content, "No email configuration. Download results below."
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = recipient_email
-        msg['Subject'] = f'TOPSIS Analysis Results - {datetime.now().strftime("%Y-%m-%d %H:%M")}'
-        
-        # Email body
-        body = f"""
+        data = frame_matrix(df)
+    except InputError as e:
+        return df, None, str(e)
+    data.flags.writeable = False
+    return df, data, None
+
+
+class ResultIndex:
+    """Bounded LRU of (dataset, weights, impacts, top K) -> job ID"""
+
+    def __init__(self, max_entries=RESULT_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            job_id = self._entries.get(key)
+            if job_id is not None:
+                self._entries.move_to_end(key)
+            return job_id
+
+    def put(self, key, job_id):
+        with self._lock:
+            self._entries[key] = job_id
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+@st.cache_resource
+def get_result_index():
+    """Results shared across reruns and sessions"""
+    return ResultIndex()
+
+
+@st.cache_resource(max_entries=16)
+def load_result(job_id):
+    """(result frame sorted by rank, CSV bytes, media type) of a finished job"""
+    media_type, data = get_job_queue().result(job_id)
+    result_df = pd.read_csv(io.BytesIO(data)).sort_values('Rank', kind='stable')
+    return result_df, data, media_type
+
+
+def show_frame(df, key, **kwargs):
+    """st.dataframe of df, one page at a time for large frames"""
+    if len(df) <= PREVIEW_ROWS:
+        st.dataframe(df, use_container_width=True, **kwargs)
+        return
+
+    pages = (len(df) + PREVIEW_ROWS - 1) // PREVIEW_ROWS
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=key)
+    start = (page - 1) * PREVIEW_ROWS
+    st.caption(f"Rows {start + 1}-{min(start + PREVIEW_ROWS, len(df))} of {len(df)}")
+    st.dataframe(df.iloc[start:start + PREVIEW_ROWS], use_container_width=True, **kwargs)
+
+
+def smtp_credentials():
+    """(sender, password) from the environment; password is '' when email is not configured"""
+    return os.getenv('SMTP_EMAIL', 'topsis.service@gmail.com'), os.getenv('SMTP_PASSWORD', '')
+
+
+def email_configured():
+    """Email needs a password, or an explicit SMTP_HOST (e.g. a local test server)"""
+    return bool(smtp_credentials()[1] or os.getenv('SMTP_HOST'))
+
+
+@st.cache_resource
+def get_mailer():
+    """Pooled SMTP connections shared by all sessions"""
+    sender_email, sender_password = smtp_credentials()
+    return Mailer(
+        os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+        int(os.getenv('SMTP_PORT', '587')),
+        username=sender_email,
+        password=sender_password,
+        starttls=os.getenv('SMTP_STARTTLS', '1') != '0',
+        connections=int(os.getenv('SMTP_CONNECTIONS', '2'))
+    )
+
+
+def send_email(recipient_email, job_id, media_type, data, mailer):
+    """Email a finished job's results; raises when delivery fails after the mailer's retries"""
+    sender_email, _ = smtp_credentials()
+    csv_content = data.decode()
+    result_df = pd.read_csv(io.StringIO(csv_content))
+
+    # Create message
+    msg = MIMEMultipart()
+    msg['From'] = sender_email
+    msg['To'] = recipient_email
+    msg['Subject'] = f'TOPSIS Analysis Results - {datetime.now().strftime("%Y-%m-%d %H:%M")}'
+
+    # Email body
+    body = f"""
 Hello,
 
 Your TOPSIS analysis has been completed successfully!
@@ -229,6 +337,7 @@ Your TOPSIS analysis has been completed successfully!
 Please find the results attached as a CSV file.
 
 Summary:
+- Job ID: {job_id}
 - Total Alternatives: {len(result_df)}
 - Best Alternative: {result_df.loc[result_df['Rank'] == 1, result_df.columns[0]].values[0]}
 - Best Score: {result_df.loc[result_df['Rank'] == 1, 'Topsis Score'].values[0]:.2f}
@@ -240,26 +349,87 @@ TOPSIS Web Service
 Developed by: Vani Goyal (102303078)
 Thapar Institute of Engineering & Technology
 """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Attach CSV file
-        attachment = MIMEBase('application', 'octet-stream')
-        attachment.set_payload(csv_content.encode())
-        encoders.encode_base64(attachment)
-        attachment.add_header('Content-Disposition', f'attachment; filename=topsis_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
-        msg.attach(attachment)
-        
-        # Send email
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
-        
-        return csv_content, f"✅ Results sent successfully to {recipient_email}!"
-        
-    except Exception as e:
-        return csv_content if 'csv_content' in locals() else None, f"⚠️ Could not send email: {str(e)}. Download results below."
+
+    msg.attach(MIMEText(body, 'plain'))
+
+    # Attach CSV file
+    attachment = MIMEBase('application', 'octet-stream')
+    attachment.set_payload(data)
+    encoders.encode_base64(attachment)
+    attachment.add_header('Content-Disposition', f'attachment; filename=topsis_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
+    msg.attach(attachment)
+
+    # Send over a pooled connection (retries transient failures itself)
+    mailer.send(msg)
+
+
+@st.cache_resource
+def get_job_queue():
+    """Background workers and result store shared by all sessions"""
+    store = JobStore(os.getenv('TOPSIS_JOBS_DIR'), ttl=int(os.getenv('TOPSIS_JOB_TTL', '3600')))
+    # several notify threads keep the mailer's connections busy with batches
+    return JobQueue(store, workers=2, notify=partial(send_email, mailer=get_mailer()), notify_workers=8, retries=1)
+
+
+def show_job(job_id):
+    """Status of a background job, and its results once it is done"""
+    job = get_job_queue().status(job_id)
+    if job is None:
+        st.error(f"❌ Job `{job_id}` was not found. Results are only kept for a limited time.")
+        return
+
+    st.header("📊 Results")
+    st.caption(f"Job ID: `{job_id}`")
+
+    if job['status'] == FAILED:
+        st.error(f"❌ Error during TOPSIS calculation: {job['error']}")
+        return
+    if job['status'] != DONE:
+        st.info(f"⏳ Job is {job['status']}. Large files can take a while.")
+        st.button("🔄 Check Status", use_container_width=True)
+        return
+
+    result_df, data, media_type = load_result(job_id)
+    name_col = result_df.columns[0]
+
+    st.success("✅ TOPSIS analysis completed successfully!")
+
+    # Summary metrics
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("Total Alternatives", len(result_df))
+
+    with col2:
+        best_alt = result_df.loc[result_df['Rank'] == 1, name_col].values[0]
+        st.metric("Best Alternative", best_alt)
+
+    with col3:
+        best_score = result_df.loc[result_df['Rank'] == 1, 'Topsis Score'].values[0]
+        st.metric("Best Score", f"{best_score:.2f}")
+
+    # Results table
+    with st.expander("📋 Detailed Results", expanded=True):
+        show_frame(result_df, key=f"result_page_{job_id}", hide_index=True)
+
+    # Email is a separate stage and may still be retrying
+    notify = job.get('notify')
+    if notify:
+        if notify['status'] == SENT:
+            st.success(f"✅ Results sent successfully to {notify['to']}!")
+        elif notify['status'] == FAILED:
+            st.warning(f"⚠️ Could not send email: {notify['error']}. Download results below.")
+        else:
+            st.info(f"📧 Sending results to {notify['to']}...")
+
+    # Download button
+    st.download_button(
+        label="⬇️ Download Results (CSV)",
+        data=data,
+        file_name=f"topsis_results_{job_id[:8]}.csv",
+        mime=media_type,
+        use_container_width=True
+    )
 
 
 # Main application
@@ -308,33 +478,21 @@ with col2:
 
 if uploaded_file is not None:
     try:
-        # Read file
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
+        # Read and validate the file once per upload; reruns reuse the parsed matrix
+        digest = upload_digest(uploaded_file)
+        df, data, upload_error = parse_upload(digest, uploaded_file.name, uploaded_file)
         
         # Display data preview
         st.success(f"✅ File uploaded successfully! Shape: {df.shape[0]} rows × {df.shape[1]} columns")
         
         with st.expander("📊 Preview Data", expanded=True):
-            st.dataframe(df, use_container_width=True)
+            show_frame(df, key=f"preview_page_{digest}")
         
-        # Validate minimum columns
-        if df.shape[1] < 3:
-            st.error("❌ File must contain at least 3 columns (1 for names + 2 criteria)")
+        if upload_error:
+            st.error(f"❌ {upload_error}")
             st.stop()
         
-        # Check numeric columns
         n_criteria = df.shape[1] - 1
-        try:
-            numeric_cols = df.iloc[:, 1:].apply(pd.to_numeric, errors='coerce')
-            if numeric_cols.isnull().any().any():
-                st.error("❌ Columns 2 onwards must contain only numeric values")
-                st.stop()
-        except:
-            st.error("❌ Error checking numeric values in data")
-            st.stop()
         
         st.markdown("---")
         
@@ -357,6 +515,14 @@ if uploaded_file is not None:
                 help=f"Enter {n_criteria} comma-separated '+' or '-' signs. '+' means higher is better, '-' means lower is better"
             )
         
+        top_k_input = st.number_input(
+            "🏆 Show only the top K alternatives (0 = all)",
+            min_value=0,
+            value=0,
+            step=1,
+            help="Only the K best alternatives are returned, which is much faster for large files"
+        )
+        
         # Email option
         send_email_option = st.checkbox(
             "📧 Send results via email",
@@ -401,67 +567,35 @@ if uploaded_file is not None:
                     for error in parse_errors:
                         st.error(f"❌ {error}")
                 else:
-                    try:
-                        # Show progress
-                        with st.spinner("🔄 Running TOPSIS analysis..."):
-                            # Perform TOPSIS
-                            result_df = topsis(df, weights, impacts)
-                        
-                        st.success("✅ TOPSIS analysis completed successfully!")
-                        
-                        # Display results
-                        st.header("📊 Results")
-                        
-                        # Summary metrics
-                        col1, col2, col3 = st.columns(3)
-                        
-                        with col1:
-                            st.metric("Total Alternatives", len(result_df))
-                        
-                        with col2:
-                            best_alt = result_df.loc[result_df['Rank'] == 1, df.columns[0]].values[0]
-                            st.metric("Best Alternative", best_alt)
-                        
-                        with col3:
-                            best_score = result_df.loc[result_df['Rank'] == 1, 'Topsis Score'].values[0]
-                            st.metric("Best Score", f"{best_score:.2f}")
-                        
-                        # Results table
-                        with st.expander("📋 Detailed Results", expanded=True):
-                            st.dataframe(
-                                result_df.sort_values('Rank'),
-                                use_container_width=True,
-                                hide_index=True
-                            )
-                        
-                        # Send email if requested
-                        csv_content = None
-                        if send_email_option:
-                            with st.spinner("📧 Sending email..."):
-                                csv_content, message = send_email(email_input, result_df)
-                            
-                            if "successfully" in message.lower():
-                                st.success(message)
-                            else:
-                                st.warning(message)
+                    notify_to = None
+                    if send_email_option:
+                        if email_configured():
+                            notify_to = email_input
                         else:
-                            # Generate CSV content for download
-                            csv_buffer = io.StringIO()
-                            result_df.to_csv(csv_buffer, index=False)
-                            csv_content = csv_buffer.getvalue()
-                        
-                        # Download button
-                        if csv_content:
-                            st.download_button(
-                                label="⬇️ Download Results (CSV)",
-                                data=csv_content,
-                                file_name=f"topsis_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                                mime="text/csv",
-                                use_container_width=True
-                            )
-                        
-                    except Exception as e:
-                        st.error(f"❌ Error during TOPSIS calculation: {str(e)}")
+                            st.warning("No email configuration. Download results below.")
+
+                    # Same inputs as an earlier run: reuse its result (unless it has to be emailed)
+                    queue = get_job_queue()
+                    key = (digest, tuple(weights), tuple(impacts), int(top_k_input))
+                    job_id = get_result_index().get(key) if notify_to is None else None
+                    if job_id is not None and (queue.status(job_id) or {}).get('status') in (None, FAILED):
+                        get_result_index().discard(key)
+                        job_id = None
+
+                    if job_id is not None:
+                        st.session_state['job_id'] = job_id
+                    else:
+                        # Run in the background; small files are usually done within the wait
+                        try:
+                            job_id = queue.submit(run_job, df, data, weights, impacts, int(top_k_input),
+                                                  get_norm_cache().keyed(digest), notify_to=notify_to)
+                        except QueueFull:
+                            st.error("❌ Too many analyses are queued right now. Please try again in a minute.")
+                        else:
+                            get_result_index().put(key, job_id)
+                            st.session_state['job_id'] = job_id
+                            with st.spinner("🔄 Running TOPSIS analysis..."):
+                                queue.wait(job_id, timeout=2)
     
     except Exception as e:
         st.error(f"❌ Error reading file: {str(e)}")
@@ -478,6 +612,11 @@ else:
         st.write("- Weights: `1,1,1,1`")
         st.write("- Impacts: `+,+,-,+` (P1, P2, P4 higher is better; P3 lower is better)")
 
+# Results of the current (or looked up) job
+if st.session_state.get('job_id'):
+    st.markdown("---")
+    show_job(st.session_state['job_id'])
+
 # Footer
 st.markdown("---")
 st.markdown("""